@@ -1,20 +1,134 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from strategies.base_strategy import BaseStrategy
+from data.storage.price_cube import PriceCube
+from data.storage.minute_bars import MinuteBars, BarView
+from backtest_execution import ExecutionSimulator
+from backtest_cache import BacktestResultCache
+from utils.ledger import ColumnarLedger, TRADE_FIELDS, DAILY_STATS_FIELDS
+from utils.profiler import PhaseProfiler
+
+class PriceSnapshot:
+    """当前bar的价格快照：按股票O(1)读取收盘价（停牌沿用最近收盘价）
+
+    引擎每个bar只移动行号，不复制数据。
+    """
+    __slots__ = ('_close', '_symbol_index', 't')
+
+    def __init__(self, close: np.ndarray, symbol_index: Dict[str, int]):
+        self._close = close
+        self._symbol_index = symbol_index
+        self.t = 0
+
+    def get(self, symbol: str, default: float = 0.0) -> float:
+        i = self._symbol_index.get(symbol)
+        if i is None:
+            return default
+        price = self._close[self.t, i]
+        return default if price != price else float(price)
+
+    def __getitem__(self, symbol: str) -> float:
+        return float(self._close[self.t, self._symbol_index[symbol]])
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbol_index
+
+class DailyBarView:
+    """当日行情的只读视图：按行区间直接取列数组，不构造DataFrame
+
+    支持 bar.index、bar['symbol']/bar['close'] 等按列取值（返回当日的Series切片）和 len(bar)；
+    需要完整DataFrame的策略调用to_frame()。引擎每个bar只移动行号。
+    """
+    __slots__ = ('_data', '_bounds', '_columns', 't')
+
+    def __init__(self, data: pd.DataFrame, bounds: np.ndarray):
+        self._data = data
+        self._bounds = bounds
+        self._columns: Dict[str, pd.Series] = {}
+        self.t = 0
+
+    @property
+    def index(self) -> pd.Index:
+        return self._data.index[self._bounds[self.t]:self._bounds[self.t + 1]]
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self['symbol'].to_numpy()
+
+    def __getitem__(self, field: str) -> pd.Series:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = self._data[field]
+        return column.iloc[self._bounds[self.t]:self._bounds[self.t + 1]]
+
+    def __len__(self) -> int:
+        return int(self._bounds[self.t + 1] - self._bounds[self.t])
+
+    def to_frame(self) -> pd.DataFrame:
+        return self._data.iloc[self._bounds[self.t]:self._bounds[self.t + 1]]
+
+class RollingWindow:
+    """最近size个bar的收盘价环形缓冲（bar × 股票），股票数可随数据增长
+
+    流式回测中策略只保留回看窗口，不持有完整历史。
+    """
+    def __init__(self, size: int, symbol_index: Dict[str, int]):
+        self.size = size
+        self.symbol_index = symbol_index
+        self._buffer = np.full((size, 0), np.nan)
+        self._pos = 0
+        self._count = 0
+
+    def push(self, row: np.ndarray):
+        if len(row) > self._buffer.shape[1]:
+            grown = np.full((self.size, len(row)), np.nan)
+            grown[:, :self._buffer.shape[1]] = self._buffer
+            self._buffer = grown
+        self._buffer[self._pos, :len(row)] = row
+        self._buffer[self._pos, len(row):] = np.nan
+        self._pos = (self._pos + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_array(self) -> np.ndarray:
+        """按时间先后排列的窗口数据"""
+        rows = (self._pos - self._count + np.arange(self._count)) % self.size
+        return self._buffer[rows]
 
 class BacktestEngine:
+    # 开启profile时计时的引擎阶段
+    PROFILED_PHASES = ['_prepare_data', '_build_price_arrays', '_update_positions_value', '_record_daily_stats']
+
     def __init__(self, 
                  data_source,
                  initial_capital: float = 1000000.0,
-                 commission_rate: float = 0.0003):
+                 commission_rate: float = 0.0003,
+                 price_cube: Optional[PriceCube] = None,
+                 execution: Optional[ExecutionSimulator] = None,
+                 profile: bool = False):
         self.data_source = data_source
         self.initial_capital = initial_capital
         self.commission_rate = commission_rate
+        self.price_cube = price_cube                # 已挂载的价格立方体，优先于逐只拉取
+        self.execution = execution                  # A股撮合模拟，为None时buy/sell即时成交
         self.positions: Dict[str, int] = {}
-        self.trades: List[Dict] = []
-        self.daily_stats: List[Dict] = []  # 每日统计数据
+        self.trades = ColumnarLedger(TRADE_FIELDS)
+        self.daily_stats = ColumnarLedger(DAILY_STATS_FIELDS)  # 每日统计数据
+        # 稠密价格数组（日期 × 股票），回测开始时构建一次
+        self._dates: Optional[pd.DatetimeIndex] = None
+        self._symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self._close: Optional[np.ndarray] = None
+        self._tradable: Optional[np.ndarray] = None  # 当日有行情（未停牌）
+        self._volume: Optional[np.ndarray] = None    # 成交量矩阵，仅撮合模拟需要
+        # 分阶段计时，结果中附带profile报告；关闭时不做任何包装
+        self.profiler = PhaseProfiler() if profile else None
+        if self.profiler is not None:
+            self.profiler.wrap(self, self.PROFILED_PHASES)
         
     def run(self, 
             strategy: BaseStrategy,
@@ -23,6 +137,7 @@ class BacktestEngine:
             symbols: List[str]) -> Dict:
         """运行回测"""
         # 初始化策略
+        self._instrument(strategy)
         strategy.cash = self.initial_capital
         strategy.initialize()
         
@@ -30,24 +145,265 @@ class BacktestEngine:
         data = self._prepare_data(symbols, start_date, end_date)
         
         # 按时间顺序遍历数据
-        for date, bars in data.groupby(level=0):
-            # 更新策略当前时间
+        self._run_bars(strategy, data)
+            
+        # 计算回测结果
+        return self._calculate_results()
+        
+    def run_stream(self, strategy: BaseStrategy, feed: Iterable[pd.DataFrame]) -> Dict:
+        """流式回测：逐块消费行情（如ChunkedDailyFeed），峰值内存由块大小决定
+
+        跨块沿用股票索引、最近收盘价和策略的回看窗口。
+        """
+        self._instrument(strategy)
+        strategy.cash = self.initial_capital
+        strategy.initialize()
+        
+        self._symbols, self._symbol_index, self._close = [], {}, None
+        strategy.history = None
+        for chunk in feed:
+            self._run_bars(strategy, chunk, carry_over=True)
+        
+        if not len(self.daily_stats):
+            raise ValueError("没有获取到任何数据")
+        return self._calculate_results()
+        
+    def run_weights(self,
+                    weights: pd.DataFrame,
+                    start_date: str = None,
+                    end_date: str = None,
+                    data: pd.DataFrame = None) -> Dict:
+        """向量化回测：按目标权重矩阵（日期×股票）每日收盘调仓
+
+        与事件循环中的TargetWeightStrategy等价：当日先按收盘价计市值，
+        再按权重×总资产调整到目标持仓（允许零碎股），佣金按成交额收取；
+        停牌股票当日不交易。未给出的日期沿用最近一次权重。
+        data: 已准备好的长表行情，不传则按weights的股票和日期加载
+        """
+        if data is None:
+            start_date = start_date or weights.index[0].strftime('%Y%m%d')
+            end_date = end_date or weights.index[-1].strftime('%Y%m%d')
+            data = self._prepare_data(weights.columns.tolist(), start_date, end_date)
+        self._build_price_arrays(data)
+        
+        w = weights.reindex(columns=self._symbols)
+        w = w.reindex(self._dates, method='ffill').fillna(0.0).to_numpy(dtype=float)
+        sim = self._simulate_weights(w)
+        
+        self.trades = ColumnarLedger(TRADE_FIELDS)
+        self.daily_stats = ColumnarLedger(DAILY_STATS_FIELDS, capacity=len(self._dates))
+        self.daily_stats.extend({
+            'date': self._dates.values,
+            'cash': sim['cash'],
+            'positions_value': sim['positions_value'],
+            'total_value': sim['cash'] + sim['positions_value']
+        })
+        results = self._calculate_results()
+        
+        results['total_trades'] = int(np.count_nonzero(sim['traded']))
+        results['holdings'] = pd.DataFrame(sim['holdings'], index=self._dates, columns=self._symbols)
+        results['turnover'] = pd.Series(sim['turnover'], index=self._dates)
+        results['commission'] = pd.Series(sim['commission'], index=self._dates)
+        results['equity_curve'] = pd.Series(sim['cash'] + sim['positions_value'], index=self._dates)
+        return results
+
+    def run_intraday(self, strategy: BaseStrategy, bars: MinuteBars) -> Dict:
+        """日内回测：逐根分钟线驱动策略的on_minute_bar
+
+        bars为MinuteBars稠密数组，每根bar只移动BarView和价格快照的行号，
+        不构造DataFrame；每日统计在当日最后一根bar记录。
+        """
+        self._instrument(strategy)
+        strategy.cash = self.initial_capital
+        strategy.initialize()
+        if not len(bars):
+            raise ValueError("没有获取到任何数据")
+
+        close = bars.field('close')
+        self._dates = bars.time_index
+        self._symbols = bars.symbols.tolist()
+        self._symbol_index = {s: i for i, s in enumerate(self._symbols)}
+        self._tradable = ~np.isnan(close)
+        self._close = pd.DataFrame(close).ffill().to_numpy()
+        self._volume = bars.fields.get('volume')
+        if self.execution is not None:
+            self.execution.bind(strategy, self._symbols, self._symbol_index,
+                                self._close, self._tradable, self._volume)
+
+        snapshot = PriceSnapshot(self._close, self._symbol_index)
+        strategy.price_snapshot = snapshot
+        if strategy.history_window:
+            strategy.history = RollingWindow(strategy.history_window, self._symbol_index)
+        self.trades = strategy.trades
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_bars()
+        view = BarView(bars)
+        day_starts = np.zeros(len(bars), dtype=bool)
+        day_starts[bars.day_bounds[:-1]] = True
+        day_ends = np.zeros(len(bars), dtype=bool)
+        day_ends[bars.day_bounds[1:] - 1] = True
+        days = iter(pd.DatetimeIndex(bars.days))
+        for t, (is_day_start, is_day_end) in enumerate(zip(day_starts.tolist(), day_ends.tolist())):
+            strategy.current_time = self._dates[t]
+            snapshot.t = view.t = t
+            if strategy.history is not None:
+                strategy.history.push(np.where(self._tradable[t], self._close[t], np.nan))
+
+            if is_day_end:
+                self._update_positions_value(strategy, t)
+                self._record_daily_stats(strategy, next(days))
+
+            if self.execution is not None and is_day_start:
+                self.execution.new_day(t)
+            strategy.on_minute_bar(view)
+            if self.execution is not None:
+                self.execution.match(t)
+            if profiler is not None:
+                profiler.mark_bar()
+
+        return self._calculate_results()
+
+    def _simulate_weights(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """按权重矩阵模拟持仓与资金
+
+        佣金会影响下一日的总资产，总资产又决定下一日目标持仓，
+        因此只在日期维度逐日递推，股票维度全部为数组运算。
+        返回的cash/positions_value为每日调仓前的值（与事件循环的每日统计一致）。
+        """
+        n_dates, n_symbols = self._close.shape
+        prices = np.nan_to_num(self._close)
+        tradable = self._tradable & (prices > 0)
+        safe_prices = np.where(tradable, prices, 1.0)
+        
+        holdings = np.zeros((n_dates, n_symbols))
+        traded = np.zeros((n_dates, n_symbols))
+        cash = np.empty(n_dates)
+        positions_value = np.empty(n_dates)
+        turnover = np.zeros(n_dates)
+        commission = np.zeros(n_dates)
+        
+        held = np.zeros(n_symbols)
+        balance = self.initial_capital
+        for t in range(n_dates):
+            value = held @ prices[t]
+            cash[t] = balance
+            positions_value[t] = value
+            equity = balance + value
+            
+            target = np.where(tradable[t], weights[t] * equity / safe_prices[t], held)
+            delta = target - held
+            notional = np.abs(delta) @ prices[t]
+            
+            commission[t] = notional * self.commission_rate
+            turnover[t] = notional / equity if equity else 0.0
+            balance -= delta @ prices[t] + commission[t]
+            traded[t] = delta
+            holdings[t] = held = target
+        
+        return {
+            'holdings': holdings,
+            'traded': traded,
+            'cash': cash,
+            'positions_value': positions_value,
+            'turnover': turnover,
+            'commission': commission
+        }
+        
+    def _run_bars(self, strategy: BaseStrategy, data: pd.DataFrame, carry_over: bool = False):
+        """逐日驱动策略
+
+        价格先转换为稠密数组，每日市值只做一次数组取值和点积；
+        当日行情以DailyBarView交给on_daily_bar，只有需要DataFrame的策略才构造切片。
+        carry_over: 流式回测中data为后续数据块，沿用之前的状态
+        """
+        bounds = self._build_price_arrays(data, carry_over)
+        if self.execution is not None:
+            self.execution.bind(strategy, self._symbols, self._symbol_index,
+                                self._close, self._tradable, self._volume, carry_over)
+        snapshot = PriceSnapshot(self._close, self._symbol_index)
+        strategy.price_snapshot = snapshot
+        bar = DailyBarView(data, bounds)
+        if strategy.history_window and (strategy.history is None or not carry_over):
+            strategy.history = RollingWindow(strategy.history_window, self._symbol_index)
+        # 与策略共用交易记录，结果中可直接统计
+        self.trades = strategy.trades
+        self._instrument(strategy)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_bars()
+        for t, date in enumerate(self._dates):
+            # 更新策略当前时间和价格快照
             strategy.current_time = date
+            snapshot.t = t
+            bar.t = t
+            if strategy.history is not None:
+                strategy.history.push(np.where(self._tradable[t], self._close[t], np.nan))
             
             # 更新持仓市值
-            self._update_positions_value(strategy, bars)
+            self._update_positions_value(strategy, t)
             
             # 记录每日统计数据
             self._record_daily_stats(strategy, date)
             
-            # 运行策略
-            strategy.on_bar(bars)
+            # 运行策略，挂单在当日收盘统一撮合
+            if self.execution is not None:
+                self.execution.new_day(t)
+            strategy.on_daily_bar(bar)
+            if self.execution is not None:
+                self.execution.match(t)
+            if profiler is not None:
+                profiler.mark_bar()
             
-        # 计算回测结果
-        return self._calculate_results()
+    def _build_price_arrays(self, data: pd.DataFrame, carry_over: bool = False) -> np.ndarray:
+        """将长表收盘价转换为 日期×股票 矩阵，返回每日在data中的行边界
+
+        carry_over: 在已有股票索引后追加新股票，并以上一块最后的收盘价续接停牌股票
+        """
+        date_codes, self._dates = pd.factorize(data.index, sort=True)
+        last_close = None
+        if carry_over:
+            if self._close is not None and len(self._close):
+                last_close = self._close[-1]
+            for symbol in pd.unique(data['symbol']):
+                if symbol not in self._symbol_index:
+                    self._symbol_index[symbol] = len(self._symbols)
+                    self._symbols.append(symbol)
+            symbol_codes = pd.Index(self._symbols).get_indexer(data['symbol'])
+        else:
+            symbol_codes, symbols = pd.factorize(data['symbol'])
+            self._symbols = symbols.tolist()
+            self._symbol_index = {s: i for i, s in enumerate(self._symbols)}
+        
+        close = np.full((len(self._dates), len(self._symbols)), np.nan)
+        close[date_codes, symbol_codes] = data['close'].to_numpy(dtype=float)
+        self._tradable = ~np.isnan(close)
+        # 停牌日沿用最近收盘价
+        if last_close is not None:
+            close = np.vstack([np.pad(last_close, (0, close.shape[1] - len(last_close)),
+                                      constant_values=np.nan), close])
+            self._close = pd.DataFrame(close).ffill().to_numpy()[1:]
+        else:
+            self._close = pd.DataFrame(close).ffill().to_numpy()
+        
+        self._volume = None
+        if self.execution is not None and 'volume' in data.columns:
+            self._volume = np.zeros(self._close.shape)
+            self._volume[date_codes, symbol_codes] = data['volume'].to_numpy(dtype=float)
+        
+        # data已按日期排序，日期编码单调递增
+        return np.searchsorted(date_codes, np.arange(len(self._dates) + 1))
         
     def _prepare_data(self, symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
         """准备回测数据"""
+        if self.price_cube is not None:
+            # 直接从内存映射立方体切片，无需逐只拉取和concat
+            data = self.price_cube.to_bars(symbols, start_date, end_date)
+            if data.empty:
+                raise ValueError("没有获取到任何数据")
+            return data
+        
         all_data = []
         for symbol in symbols:
             df = self.data_source.get_daily_data(symbol, start_date, end_date)
@@ -69,32 +425,56 @@ class BacktestEngine:
         print(f"数据字段: {data.columns.tolist()}")
         return data
         
-    def _update_positions_value(self, strategy: BaseStrategy, bars: pd.DataFrame):
-        """更新持仓市值"""
-        for symbol, quantity in strategy.positions.items():
-            symbol_data = bars[bars['symbol'] == symbol]
-            if not symbol_data.empty:
-                current_price = symbol_data['close'].iloc[0]
-                strategy.positions_value[symbol] = quantity * current_price
+    def _update_positions_value(self, strategy: BaseStrategy, t: int) -> float:
+        """更新持仓市值（持仓向量 × 当日价格行），返回持仓总市值"""
+        held = [s for s in strategy.positions if s in self._symbol_index]
+        if not held:
+            return 0.0
+        
+        columns = np.fromiter((self._symbol_index[s] for s in held), dtype=np.intp, count=len(held))
+        quantities = np.fromiter((strategy.positions[s] for s in held), dtype=float, count=len(held))
+        prices = self._close[t, columns]
+        priced = ~np.isnan(prices)
+        
+        values = quantities * prices
+        strategy.positions_value.update(
+            (s, v) for s, v, ok in zip(held, values.tolist(), priced.tolist()) if ok
+        )
+        return float(quantities[priced] @ prices[priced])
                 
     def _record_daily_stats(self, 
                            strategy: BaseStrategy, 
                            date: datetime):
         """记录每日统计数据"""
-        stats = {
-            'date': pd.to_datetime(date),  # 确保日期是datetime类型
-            'cash': strategy.cash,
-            'positions_value': strategy.get_positions_value(),
-            'total_value': strategy.get_total_value()
-        }
-        self.daily_stats.append(stats)
+        positions_value = strategy.get_positions_value()
+        self.daily_stats.append(
+            date=date,
+            cash=strategy.cash,
+            positions_value=positions_value,
+            total_value=strategy.cash + positions_value
+        )
+        
+    def _instrument(self, strategy: BaseStrategy):
+        """开启profile时为策略回调和撮合加计时（重复调用无副作用）"""
+        if self.profiler is None:
+            return
+        self.profiler.wrap(strategy, ['initialize', 'on_bar', 'on_minute_bar'], prefix='strategy.')
+        if self.execution is not None:
+            self.profiler.wrap(self.execution, ['new_day', 'match'], prefix='execution.')
         
     def _calculate_results(self) -> Dict:
-        """计算回测指标"""
-        df = pd.DataFrame(self.daily_stats)
+        """计算回测指标，开启profile时附带各阶段耗时报告（报告后计时清零）"""
+        if self.profiler is None:
+            return self._compute_results()
+        with self.profiler.phase('calculate_results'):
+            results = self._compute_results()
+        results['profile'] = self.profiler.report()
+        self.profiler.reset()
+        return results
         
-        # 将日期字符串转换为datetime类型
-        df['date'] = pd.to_datetime(df['date'])
+    def _compute_results(self) -> Dict:
+        """计算回测指标"""
+        df = self.daily_stats.to_frame()
         
         # 计算每日收益率
         df['returns'] = df['total_value'].pct_change()
@@ -116,9 +496,9 @@ class BacktestEngine:
         max_drawdown = df['drawdown'].max()
         
         # 计算交易统计
-        trades_df = pd.DataFrame(self.trades)
+        trades_df = self.trades.to_frame()
         if not trades_df.empty:
-            win_trades = trades_df[trades_df['revenue'] > trades_df['cost']].shape[0] if 'revenue' in trades_df else 0
+            win_trades = int((trades_df['revenue'] > trades_df['cost']).sum())
             total_trades = len(trades_df)
             win_rate = win_trades / total_trades if total_trades > 0 else 0
         else:
@@ -132,14 +512,23 @@ class BacktestEngine:
             'max_drawdown': max_drawdown,
             'win_rate': win_rate,
             'total_trades': total_trades,
-            'trades': self.trades,
-            'daily_stats': df.to_dict('records'),
-            'positions_history': self.positions
+            'trades': trades_df,
+            'daily_stats': df,
+            'positions_history': self.positions,
+            'memory_usage': {
+                'trades': self.trades.memory_usage(),
+                'daily_stats': self.daily_stats.memory_usage()
+            }
         }
 
 class Backtest:
-    def __init__(self, data_source):
-        self.engine = BacktestEngine(data_source)
+    def __init__(self, data_source, price_cube: Optional[PriceCube] = None,
+                 execution: Optional[ExecutionSimulator] = None,
+                 result_cache: Optional[BacktestResultCache] = None,
+                 profile: bool = False):
+        self.engine = BacktestEngine(data_source, price_cube=price_cube, execution=execution,
+                                     profile=profile)
+        self.result_cache = result_cache            # 相同输入和行情直接返回已有结果
         
     def run(self, 
             strategy_class,
@@ -151,119 +540,60 @@ class Backtest:
         print(f"开始回测: {start_date} 到 {end_date}")
         print(f"股票池: {symbols}")
         
+        # 获取回测数据
+        data = self.engine._prepare_data(symbols, start_date, end_date)
+        
+        # 缓存键包含行情内容哈希，新数据入库后自动失效
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(strategy_class, strategy_params, symbols,
+                                                   start_date, end_date, data, self._engine_config())
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print("命中回测结果缓存")
+                return cached
+        
         # 初始化策略
         strategy = strategy_class(self.engine.data_source, strategy_params)
+        self.engine._instrument(strategy)
         strategy.cash = self.engine.initial_capital
         strategy.initialize()
         
-        # 获取回测数据
-        data = self.engine._prepare_data(symbols, start_date, end_date)
-        
         # 按时间顺序遍历数据
-        for date, bars in data.groupby(level=0):
-            # 更新策略当前时间
-            strategy.current_time = date
-            
-            # 更新持仓市值
-            self.engine._update_positions_value(strategy, bars)
-            
-            # 记录每日统计数据
-            self.engine._record_daily_stats(strategy, date)
-            
-            # 运行策略
-            strategy.on_bar(bars)
+        self.engine._run_bars(strategy, data)
             
         # 计算回测结果
-        return self.engine._calculate_results()
-        
-    def _prepare_data(self, symbols: List[str], 
-                     start_date: str, 
-                     end_date: str) -> pd.DataFrame:
-        """准备回测数据"""
-        all_data = []
-        for symbol in symbols:
-            df = self.engine.data_source.get_daily_data(symbol, start_date, end_date)
-            if df is not None and not df.empty:
-                df['symbol'] = symbol
-                all_data.append(df)
-        
-        if not all_data:
-            raise ValueError("没有获取到任何数据")
-        
-        # 合并所有股票数据
-        data = pd.concat({sym: df for sym, df in zip(symbols, all_data)}, 
-                    axis=0)
-        data.set_index('trade_date', inplace=True)
-        data.sort_index(inplace=True)
-        print(f"获取到 {len(data)} 条数据记录")
-        return data
+        results = self.engine._calculate_results()
+        if self.result_cache is not None:
+            self.result_cache.put(cache_key, results)
+        return results
         
-    def _update_positions_value(self, 
-                              strategy: BaseStrategy, 
-                              bars: pd.DataFrame):
-        """更新持仓市值"""
-        for symbol, quantity in strategy.positions.items():
-            symbol_data = bars[bars['symbol'] == symbol]
-            if not symbol_data.empty:
-                current_price = symbol_data['close'].iloc[0]
-                strategy.positions_value[symbol] = quantity * current_price
-                
-    def _record_daily_stats(self, 
-                           strategy: BaseStrategy, 
-                           date: datetime):
-        """记录每日统计数据"""
-        stats = {
-            'date': pd.to_datetime(date),  # 确保日期是datetime类型
-            'cash': strategy.cash,
-            'positions_value': strategy.get_positions_value(),
-            'total_value': strategy.get_total_value()
+    def _engine_config(self) -> Dict:
+        """影响回测结果的引擎配置"""
+        execution = self.engine.execution
+        return {
+            'initial_capital': self.engine.initial_capital,
+            'commission_rate': self.engine.commission_rate,
+            'execution': execution.config() if execution is not None else None
         }
-        self.engine.daily_stats.append(stats)
-        
-    def _calculate_results(self) -> Dict:
-        """计算回测指标"""
-        df = pd.DataFrame(self.engine.daily_stats)
-        
-        # 将日期字符串转换为datetime类型
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # 计算每日收益率
-        df['returns'] = df['total_value'].pct_change()
-        df['cum_returns'] = (1 + df['returns']).cumprod()
-        
-        # 计算基础指标
-        total_return = (df['total_value'].iloc[-1] - self.engine.initial_capital) / self.engine.initial_capital
-        days = (df['date'].iloc[-1] - df['date'].iloc[0]).days
-        annual_return = (1 + total_return) ** (365 / days) - 1
-        
-        # 计算风险指标
-        risk_free_rate = 0.03  # 假设无风险利率为3%
-        excess_returns = df['returns'] - risk_free_rate / 252
-        sharpe_ratio = np.sqrt(252) * excess_returns.mean() / excess_returns.std()
-        
-        # 计算回撤
-        df['cum_max'] = df['cum_returns'].cummax()
-        df['drawdown'] = (df['cum_max'] - df['cum_returns']) / df['cum_max']
-        max_drawdown = df['drawdown'].max()
         
-        # 计算交易统计
-        trades_df = pd.DataFrame(self.engine.trades)
-        if not trades_df.empty:
-            win_trades = trades_df[trades_df['revenue'] > trades_df['cost']].shape[0] if 'revenue' in trades_df else 0
-            total_trades = len(trades_df)
-            win_rate = win_trades / total_trades if total_trades > 0 else 0
-        else:
-            win_rate = 0
-            total_trades = 0
+    def sweep(self,
+              strategy_class,
+              symbols: List[str],
+              start_date: str,
+              end_date: str,
+              param_grid: Dict[str, List],
+              strategy_params: Dict = None,
+              workers: int = None) -> pd.DataFrame:
+        """参数网格扫描：行情只加载一次，各组合在进程池中并行回测"""
+        from backtest_sweep import ParameterSweep
         
-        return {
-            'total_return': total_return,
-            'annual_return': annual_return,
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'win_rate': win_rate,
-            'total_trades': total_trades,
-            'trades': self.engine.trades,
-            'daily_stats': df.to_dict('records'),
-            'positions_history': self.engine.positions
-        } 
\ No newline at end of file
+        sweep = ParameterSweep(
+            self.engine.data_source,
+            initial_capital=self.engine.initial_capital,
+            commission_rate=self.engine.commission_rate,
+            workers=workers
+        )
+        data = self.engine._prepare_data(symbols, start_date, end_date)
+        return sweep.run(strategy_class, symbols, start_date, end_date,
+                         param_grid, strategy_params, data=data)
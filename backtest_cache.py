@@ -0,0 +1,147 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class BacktestResultCache:
+    """持久化的回测结果缓存（每个结果一个pickle文件，可在多个进程/会话间共享）
+
+    键由策略类、规范化后的策略参数、股票列表、回测区间、引擎配置和
+    行情切片的内容哈希组成。新行情写入覆盖区间后内容哈希随之变化，
+    旧结果不再命中，无需显式失效；超过max_entries时删除最久未使用的文件。
+    """
+
+    def __init__(self, cache_dir: str = 'data/backtest_cache', max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self,
+                 strategy_class,
+                 strategy_params: Optional[Dict],
+                 symbols: List[str],
+                 start_date: str,
+                 end_date: str,
+                 data: pd.DataFrame,
+                 engine_config: Dict = None) -> Optional[str]:
+        """生成缓存键；参数中含无法稳定序列化的对象时返回None（不缓存）"""
+        try:
+            payload = {
+                'strategy': f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+                'params': _normalize(strategy_params or {}),
+                'symbols': list(symbols),
+                'start_date': str(start_date),
+                'end_date': str(end_date),
+                'engine': _normalize(engine_config or {}),
+                'data': data_hash(data)
+            }
+        except TypeError as e:
+            logger.debug(f"回测参数无法生成缓存键: {str(e)}")
+            return None
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        """读取缓存结果，未命中返回None"""
+        if key is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"回测缓存文件损坏，已忽略: {path}: {str(e)}")
+            self.misses += 1
+            return None
+        # 更新访问时间，淘汰时按最久未使用
+        os.utime(path)
+        self.hits += 1
+        return result
+
+    def put(self, key: Optional[str], result: Dict):
+        """写入结果（先写临时文件再原子替换，并发写同一键不会读到半个文件）"""
+        if key is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def clear(self):
+        """删除全部缓存结果"""
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> Dict[str, int]:
+        entries = sum(1 for name in os.listdir(self.cache_dir) if name.endswith('.pkl'))
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _evict(self):
+        with self._lock:
+            files = [os.path.join(self.cache_dir, name)
+                     for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+            if len(files) <= self.max_entries:
+                return
+            files.sort(key=lambda path: os.stat(path).st_mtime)
+            for path in files[:len(files) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+def data_hash(data: pd.DataFrame) -> str:
+    """行情切片的内容哈希（含索引、列名和全部取值）"""
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([str(c) for c in data.columns]).encode('utf-8'))
+    hasher.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+def _normalize(value: Any) -> Any:
+    """把参数转换为可稳定JSON序列化的结构（dict按键排序，集合排序）"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        return _normalize(value.tolist())
+    if isinstance(value, np.ndarray):
+        return {'__ndarray__': hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest(),
+                'shape': list(value.shape), 'dtype': value.dtype.str}
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return {'__frame__': hashlib.sha256(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()).hexdigest()}
+    raise TypeError(f"不支持的参数类型: {type(value).__name__}")
@@ -0,0 +1,251 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+class ExecutionSimulator:
+    """A股撮合模拟：整手、T+1、涨跌停、成交量约束、滑点、佣金与印花税
+
+    挂载到BacktestEngine后，策略的buy/sell只提交订单；引擎在每根bar的
+    on_bar之后调用match，对该bar内全部挂单一次性做数组撮合：
+    - 成交价为当前bar收盘价加滑点（买入上浮、卖出下调）
+    - 收盘价处于涨停（跌停）时买单（卖单）不成交，停牌不成交
+    - 同一股票的所有订单按提交顺序共享 bar成交量 × volume_limit 的可成交量
+    - 买入数量按整手向下取整；卖出不足一手的零股只能一次性全部卖出
+    - 当日买入的股票次日才能卖出（T+1）
+    - 先卖后买，卖出回笼资金可用于同一bar的买单；买单按提交顺序占用资金，
+      资金不足的买单及其后的买单不成交
+    未成交部分在bar结束时撤销。
+    volume_unit: 成交量单位对应的股数（Tushare日线成交量单位为手，即100股）
+    """
+    # 按代码前缀区分的涨跌幅限制，其余为10%
+    LIMIT_RULES = [(('300', '301', '688', '689'), 0.2)]
+    BJ_LIMIT = 0.3
+    DEFAULT_LIMIT = 0.1
+
+    def __init__(self,
+                 commission_rate: float = 0.0003,
+                 min_commission: float = 5.0,
+                 stamp_duty: float = 0.0005,
+                 slippage: float = 0.0005,
+                 volume_limit: float = 0.1,
+                 volume_unit: float = 100,
+                 lot_size: int = 100):
+        self.commission_rate = commission_rate
+        self.min_commission = min_commission
+        self.stamp_duty = stamp_duty              # 卖出单边征收
+        self.slippage = slippage
+        self.volume_limit = volume_limit          # 单根bar最多成交该bar成交量的比例
+        self.volume_unit = volume_unit
+        self.lot_size = lot_size
+
+        self.strategy = None
+        self._symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self._close: Optional[np.ndarray] = None
+        self._tradable: Optional[np.ndarray] = None
+        self._volume: Optional[np.ndarray] = None
+        self._carry: Optional[np.ndarray] = None  # 上一数据块最后的收盘价（流式回测）
+        self._limit_pct = np.zeros(0)
+        self._limit_up = np.zeros(0)
+        self._limit_down = np.zeros(0)
+        self._locked = np.zeros(0)                # 当日买入、尚不可卖的数量
+        self.reset()
+
+    def config(self) -> Dict:
+        """撮合参数（用于回测结果缓存键）"""
+        return {
+            'commission_rate': self.commission_rate,
+            'min_commission': self.min_commission,
+            'stamp_duty': self.stamp_duty,
+            'slippage': self.slippage,
+            'volume_limit': self.volume_limit,
+            'volume_unit': self.volume_unit,
+            'lot_size': self.lot_size
+        }
+
+    def reset(self):
+        """清空挂单和统计"""
+        self._order_codes: List[int] = []
+        self._order_qty: List[float] = []
+        self._reserved = 0.0                      # 买单冻结资金
+        self._sell_credit = 0.0                   # 卖单预计回笼资金（先卖后买）
+        self._pending_sell: Dict[int, float] = {}
+        self._locked[:] = 0
+        self.stats = {'submitted': 0, 'filled': 0, 'partial': 0,
+                      'limit_blocked': 0, 'volume_capped': 0, 'cash_rejected': 0}
+
+    def bind(self,
+             strategy,
+             symbols: List[str],
+             symbol_index: Dict[str, int],
+             close: np.ndarray,
+             tradable: np.ndarray,
+             volume: Optional[np.ndarray],
+             carry_over: bool = False):
+        """绑定策略和引擎的稠密价格数组（日期/时间 × 股票）
+
+        carry_over: 流式回测的后续数据块，沿用挂单外的状态并以上一块最后收盘价计算涨跌停
+        """
+        if strategy is not self.strategy or not carry_over:
+            self.strategy = strategy
+            strategy.execution = self
+            self._carry = None
+            self._locked = np.zeros(0)
+            self._limit_pct = np.zeros(0)
+            self.reset()
+        elif self._close is not None and len(self._close):
+            self._carry = self._close[-1]
+
+        self._symbols = symbols
+        self._symbol_index = symbol_index
+        self._close = close
+        self._tradable = tradable
+        self._volume = volume
+
+        n = len(symbols)
+        if n > len(self._locked):
+            self._locked = np.pad(self._locked, (0, n - len(self._locked)))
+        # 后续数据块的股票只在末尾追加，已有股票的涨跌幅不变，只补算新增股票
+        if n > len(self._limit_pct):
+            added = [self._price_limit(s) for s in symbols[len(self._limit_pct):]]
+            self._limit_pct = np.concatenate([self._limit_pct, added])
+        if self._carry is not None and len(self._carry) < n:
+            self._carry = np.pad(self._carry, (0, n - len(self._carry)), constant_values=np.nan)
+
+    def _price_limit(self, symbol: str) -> float:
+        if symbol.endswith('.BJ'):
+            return self.BJ_LIMIT
+        for prefixes, limit in self.LIMIT_RULES:
+            if symbol.startswith(prefixes):
+                return limit
+        return self.DEFAULT_LIMIT
+
+    def new_day(self, t: int):
+        """交易日开始：解除T+1锁定，按前一日收盘价计算当日涨跌停价"""
+        self._locked[:] = 0
+        prev = self._close[t - 1] if t > 0 else self._carry
+        if prev is None:
+            prev = np.full(len(self._symbols), np.nan)
+        self._limit_up = np.round(prev * (1 + self._limit_pct), 2)
+        self._limit_down = np.round(prev * (1 - self._limit_pct), 2)
+
+    def submit(self, symbol: str, quantity: float, price: float) -> bool:
+        """提交订单（quantity为正买入、为负卖出），不满足整手/资金/可卖数量时拒绝"""
+        i = self._symbol_index.get(symbol)
+        if i is None or quantity == 0 or not price > 0:
+            return False
+
+        strategy = self.strategy
+        if quantity > 0:
+            quantity = quantity // self.lot_size * self.lot_size
+            if quantity <= 0:
+                return False
+            notional = quantity * price * (1 + self.slippage)
+            required = notional + max(notional * self.commission_rate, self.min_commission)
+            if required > strategy.cash + self._sell_credit - self._reserved:
+                return False
+            self._reserved += required
+        else:
+            position = strategy.positions.get(symbol, 0)
+            sellable = position - self._locked[i] - self._pending_sell.get(i, 0)
+            quantity = -quantity
+            if quantity > sellable:
+                return False
+            if quantity < position:
+                quantity = quantity // self.lot_size * self.lot_size
+            if quantity <= 0:
+                return False
+            self._pending_sell[i] = self._pending_sell.get(i, 0) + quantity
+            notional = quantity * price * (1 - self.slippage)
+            self._sell_credit += notional * (1 - self.stamp_duty) - max(notional * self.commission_rate,
+                                                                         self.min_commission)
+            quantity = -quantity
+
+        self._order_codes.append(i)
+        self._order_qty.append(quantity)
+        self.stats['submitted'] += 1
+        return True
+
+    def match(self, t: int) -> int:
+        """撮合第t根bar的全部挂单，返回成交笔数"""
+        if not self._order_codes:
+            return 0
+        codes = np.array(self._order_codes, dtype=np.intp)
+        qty = np.array(self._order_qty, dtype=float)
+        self._order_codes, self._order_qty = [], []
+        self._reserved = self._sell_credit = 0.0
+        self._pending_sell.clear()
+
+        buy = qty > 0
+        requested = np.abs(qty)
+        price = self._close[t, codes]
+        ok = self._tradable[t, codes] & (price > 0)
+        at_limit = np.where(buy, price >= self._limit_up[codes] - 1e-9,
+                            price <= self._limit_down[codes] + 1e-9)
+        self.stats['limit_blocked'] += int(np.count_nonzero(ok & at_limit))
+        ok &= ~at_limit
+        wanted = np.where(ok, requested, 0.0)
+
+        # 同一股票的订单按提交顺序共享成交量上限
+        fill = wanted
+        if self._volume is not None:
+            cap = np.floor(np.nan_to_num(self._volume[t, codes]) * self.volume_unit * self.volume_limit)
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            before = np.cumsum(wanted[order]) - wanted[order]
+            first = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+            used = np.empty_like(before)
+            used[order] = before - before[first][np.cumsum(first) - 1]
+            fill = np.clip(np.minimum(wanted, cap - used), 0, None)
+            self.stats['volume_capped'] += int(np.count_nonzero(fill < wanted))
+        # 部分成交按整手取整，零股卖单只能全部成交
+        fill = np.where(fill < requested, fill // self.lot_size * self.lot_size, fill)
+
+        exec_price = np.where(buy, price * (1 + self.slippage), price * (1 - self.slippage))
+        exec_price = np.nan_to_num(exec_price)
+        notional = fill * exec_price
+        commission = np.where(fill > 0, np.maximum(notional * self.commission_rate, self.min_commission), 0.0)
+        stamp_duty = np.where(buy, 0.0, notional * self.stamp_duty)
+
+        # 先卖后买，买单按提交顺序占用资金
+        strategy = self.strategy
+        cash = strategy.cash + (np.where(buy, 0.0, notional - commission - stamp_duty)).sum()
+        buy_cost = np.where(buy, notional + commission, 0.0)
+        affordable = np.cumsum(buy_cost) <= cash + 1e-6
+        rejected = buy & (fill > 0) & ~affordable
+        self.stats['cash_rejected'] += int(np.count_nonzero(rejected))
+        fill[rejected] = 0
+        filled = fill > 0
+        if not filled.any():
+            return 0
+
+        codes, fill, buy = codes[filled], fill[filled], buy[filled]
+        exec_price, notional = exec_price[filled], notional[filled]
+        commission, stamp_duty = commission[filled], stamp_duty[filled]
+        cost = np.where(buy, notional + commission, np.nan)
+        revenue = np.where(buy, np.nan, notional - commission - stamp_duty)
+        strategy.cash += float(np.nansum(revenue) - np.nansum(cost))
+
+        np.add.at(self._locked, codes[buy], fill[buy])
+        positions = strategy.positions
+        symbols = [self._symbols[i] for i in codes.tolist()]
+        for symbol, quantity in zip(symbols, np.where(buy, fill, -fill).astype(np.int64).tolist()):
+            remaining = positions.get(symbol, 0) + quantity
+            if remaining > 0:
+                positions[symbol] = remaining
+            else:
+                positions.pop(symbol, None)
+
+        self.stats['filled'] += len(fill)
+        self.stats['partial'] += int(np.count_nonzero(fill < requested[filled]))
+        strategy.trades.extend({
+            'time': np.full(len(fill), np.datetime64(strategy.current_time, 'ns')),
+            'symbol': symbols,
+            'direction': np.where(buy, 'buy', 'sell'),
+            'quantity': fill,
+            'price': exec_price,
+            'cost': cost,
+            'revenue': revenue,
+            'commission': commission,
+            'stamp_duty': stamp_duty
+        })
+        return len(fill)
@@ -0,0 +1,231 @@
+import os
+import bisect
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from backtest import BacktestEngine
+
+METRICS = ['total_return', 'annual_return', 'sharpe_ratio', 'max_drawdown', 'win_rate', 'total_trades']
+
+class SharedFrame:
+    """把回测长表（日期索引 + symbol列 + 数值列）放入共享内存
+
+    主进程create后只需把spec（块名、dtype、形状）传给子进程，
+    子进程attach后按列挂载，不再pickle整张行情表。
+    另存一份按股票分组的行号（长表按日期排序），子进程按股票取数时直接切片。
+    """
+    def __init__(self, spec: Dict, blocks: List[shared_memory.SharedMemory]):
+        self.spec = spec
+        self._blocks = blocks
+
+    @classmethod
+    def create(cls, data: pd.DataFrame) -> 'SharedFrame':
+        symbol_codes, symbols = pd.factorize(data['symbol'])
+        order, offsets = _group_rows(symbol_codes, len(symbols))
+        arrays = {
+            '__index__': data.index.values.astype('datetime64[ns]').view('int64'),
+            'symbol': symbol_codes.astype(np.int32),
+            '__by_symbol__': order
+        }
+        for col in data.columns:
+            if col != 'symbol' and pd.api.types.is_numeric_dtype(data[col]):
+                arrays[col] = data[col].to_numpy(dtype=float)
+
+        spec = {'symbols': symbols.tolist(), 'symbol_offsets': offsets.tolist(),
+                'index_name': data.index.name, 'columns': []}
+        blocks = []
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            spec['columns'].append((name, block.name, array.dtype.str, len(array)))
+            blocks.append(block)
+        return cls(spec, blocks)
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedFrame':
+        blocks = []
+        for _, block_name, _, _ in spec['columns']:
+            blocks.append(shared_memory.SharedMemory(name=block_name))
+        return cls(spec, blocks)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+                for (name, _, dtype, length), block in zip(self.spec['columns'], self._blocks)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """还原为长表（列数据直接引用共享内存）"""
+        columns = self._arrays()
+        columns.pop('__by_symbol__')
+        index = pd.DatetimeIndex(columns.pop('__index__').view('datetime64[ns]'), name=self.spec['index_name'])
+        symbols = np.asarray(self.spec['symbols'], dtype=object)[columns.pop('symbol')]
+        data = pd.DataFrame(columns, index=index, copy=False)
+        data.insert(0, 'symbol', symbols)
+        return data
+
+    def groups(self) -> tuple:
+        """按股票分组的行号：(股票列表, 行号数组, 各股票在行号数组中的起止位置)"""
+        return self.spec['symbols'], self._arrays()['__by_symbol__'], self.spec['symbol_offsets']
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+
+    def unlink(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+def _group_rows(codes: np.ndarray, n_groups: int) -> tuple:
+    """按编码分组的行号（组内保持原顺序）及各组的起止位置"""
+    order = np.argsort(codes, kind='stable').astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_groups))])
+    return order, offsets
+
+class FrameDataSource:
+    """基于已加载长表的只读数据源，供子进程中的策略使用（不访问网络/数据库）
+
+    只保存每只股票的行号区间，取数时再从长表切片，不预先按股票复制整张表
+    groups: SharedFrame.groups()的结果，为None时按data['symbol']分组
+    """
+
+    def __init__(self, data: pd.DataFrame, groups: tuple = None):
+        self.data = data
+        self.clock = None  # 回测中的策略对象，用于按当前时间取价
+        if groups is None:
+            codes, symbols = pd.factorize(data['symbol'])
+            groups = (symbols.tolist(), *_group_rows(codes, len(symbols)))
+        symbols, self._order, offsets = groups
+        self._rows = {symbol: (offsets[i], offsets[i + 1]) for i, symbol in enumerate(symbols)}
+        self._dates = data.index.values
+        self._close = data['close'].to_numpy()
+
+    def _symbol_rows(self, symbol: str) -> np.ndarray:
+        lo, hi = self._rows.get(symbol, (0, 0))
+        return self._order[lo:hi]
+
+    def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        rows = self._symbol_rows(symbol)
+        if not len(rows):
+            return pd.DataFrame()
+        dates = self._dates[rows]
+        i = dates.searchsorted(pd.Timestamp(start_date).to_datetime64(), side='left')
+        j = dates.searchsorted(pd.Timestamp(end_date).to_datetime64(), side='right')
+        return self.data.iloc[rows[i:j]]
+
+    def get_latest_price(self, symbol: str) -> float:
+        """当前回测时间（含）之前的最近收盘价"""
+        rows = self._symbol_rows(symbol)
+        if not len(rows):
+            return 0.0
+        if self.clock is None or self.clock.current_time is None:
+            return float(self._close[rows[-1]])
+        # 组内行号按日期递增，二分查找不需要取出该股票的全部日期
+        i = bisect.bisect_right(rows, pd.Timestamp(self.clock.current_time).to_datetime64(),
+                                key=self._dates.__getitem__) - 1
+        return float(self._close[rows[i]]) if i >= 0 else 0.0
+
+def _param_grid(grid: Dict[str, List]) -> List[Dict]:
+    """参数网格展开为参数组合列表"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+_worker: Dict = {}
+
+def _init_worker(spec: Dict):
+    """子进程初始化：挂载共享行情，整个进程生命周期内复用"""
+    shared = SharedFrame.attach(spec)
+    data = shared.to_frame()
+    _worker.update(shared=shared, data=data, source=FrameDataSource(data, shared.groups()))
+
+def _run_point(strategy_class, params: Dict, engine_options: Dict, quiet: bool) -> Dict:
+    """在子进程中运行单个参数组合，只返回汇总指标"""
+    data, source = _worker['data'], _worker['source']
+    engine = BacktestEngine(source, **engine_options)
+    strategy = strategy_class(source, params)
+    source.clock = strategy
+
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        strategy.cash = engine.initial_capital
+        strategy.initialize()
+        engine._run_bars(strategy, data)
+        results = engine._calculate_results()
+    return {name: results[name] for name in METRICS}
+
+class ParameterSweep:
+    """参数网格并行回测
+
+    行情只加载一次并放入共享内存，各参数组合在进程池中运行，
+    结果按完成顺序逐条写入紧凑的结果表（参数列 + 指标列）。
+    """
+    def __init__(self,
+                 data_source,
+                 initial_capital: float = 1000000.0,
+                 commission_rate: float = 0.0003,
+                 workers: int = None,
+                 quiet: bool = True):
+        self.data_source = data_source
+        self.engine_options = {'initial_capital': initial_capital, 'commission_rate': commission_rate}
+        self.workers = workers or os.cpu_count() or 1
+        self.quiet = quiet
+
+    def run(self,
+            strategy_class,
+            symbols: List[str],
+            start_date: str,
+            end_date: str,
+            param_grid: Dict[str, List],
+            base_params: Dict = None,
+            data: pd.DataFrame = None,
+            on_result: Optional[Callable[[Dict], None]] = None) -> pd.DataFrame:
+        """运行参数扫描
+        param_grid: {参数名: 候选值列表}
+        base_params: 所有组合共用的参数（股票池、起止日期会自动补上）
+        on_result: 每完成一个组合时回调，参数为该行结果
+        """
+        if data is None:
+            data = BacktestEngine(self.data_source, **self.engine_options)._prepare_data(
+                symbols, start_date, end_date)
+        base = {'symbols': symbols, 'start_date': start_date, 'end_date': end_date,
+                'initial_capital': self.engine_options['initial_capital']}
+        base.update(base_params or {})
+        points = [dict(base, **point) for point in _param_grid(param_grid)]
+
+        keys = list(param_grid)
+        table = {key: [None] * len(points) for key in keys}
+        table.update({name: np.full(len(points), np.nan) for name in METRICS})
+
+        def record(i: int, metrics: Dict):
+            for key in keys:
+                table[key][i] = points[i][key]
+            for name in METRICS:
+                table[name][i] = metrics[name]
+            if on_result is not None:
+                on_result({**{k: points[i][k] for k in keys}, **metrics})
+
+        if self.workers <= 1:
+            _worker.update(data=data, source=FrameDataSource(data))
+            try:
+                for i, params in enumerate(points):
+                    record(i, _run_point(strategy_class, params, self.engine_options, self.quiet))
+            finally:
+                _worker.clear()
+            return pd.DataFrame(table)
+
+        shared = SharedFrame.create(data)
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                     initargs=(shared.spec,)) as pool:
+                futures = {
+                    pool.submit(_run_point, strategy_class, params, self.engine_options, self.quiet): i
+                    for i, params in enumerate(points)
+                }
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+        finally:
+            shared.unlink()
+        return pd.DataFrame(table)
@@ -3,6 +3,8 @@ class BaseConfig:
     DATA_START_YEAR = 2005      # 数据起始年份
     MAX_API_CALLS = 500         # 每日最大API调用次数
     API_CALL_INTERVAL = 1.0     # API调用间隔（秒）
+    API_BURST = 1               # 令牌桶容量（允许的突发调用数）
+    INGEST_WORKERS = 4          # 并发拉取日线的线程数
 
 class TestConfig(BaseConfig):
     """测试环境配置"""
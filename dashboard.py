@@ -6,14 +6,19 @@ from datetime import datetime, timedelta
 from typing import Dict, List
 
 from data.data_source.tushare_api import TushareAPI
+from data.data_source.cached_source import CachedDataSource
 from strategies.factor_strategy import SimpleFactorStrategy
 from backtest import Backtest
+from backtest_cache import BacktestResultCache
 
 class Dashboard:
     def __init__(self):
         # 初始化数据源
         api_key = st.secrets["tushare_api_key"]  # 从 Streamlit secrets 获取
-        self.data_source = TushareAPI(api_key)
+        # 本地读穿透缓存：相同股票和区间不再重复下载
+        self.data_source = CachedDataSource(TushareAPI(api_key, raise_errors=True))
+        # 回测结果缓存：相同参数和行情直接返回，新数据入库后自动失效
+        self.result_cache = BacktestResultCache()
         
     def run(self):
         st.title("量化交易回测系统")
@@ -81,7 +86,7 @@ class Dashboard:
                 }
                 
                 # 运行回测
-                backtest = Backtest(self.data_source)
+                backtest = Backtest(self.data_source, result_cache=self.result_cache)
                 results = backtest.run(
                     strategy_class=SimpleFactorStrategy,
                     symbols=symbols,
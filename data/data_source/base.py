@@ -6,11 +6,17 @@ from datetime import datetime
 class BaseDataSource(ABC):
     """数据源基类"""
     
+    SUPPORTS_DAILY_BY_DATE = False  # 是否支持按交易日获取全市场日线
+    
     @abstractmethod
     def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
         pass
     
+    def get_daily_data_by_date(self, trade_date: str) -> pd.DataFrame:
+        """获取某个交易日的全市场日线数据"""
+        raise NotImplementedError(f"{type(self).__name__} 不支持按交易日获取日线")
+    
     @abstractmethod
     def get_min_data(self, symbol: str, freq: str = '1min') -> pd.DataFrame:
         """获取分钟数据"""
@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from data.storage.market_data import MarketDataStorage, _format_trade_dates
+
+logger = logging.getLogger(__name__)
+
+class CachedDataSource:
+    """带本地持久化的日线读穿透缓存
+
+    包装TushareAPI/TushareDataSource等数据源：按股票记录已拉取的日期区间，
+    请求时只拉取缺失的子区间并写入本地存储，再统一从本地读取。
+    当日数据在收盘前可能变化，超过today_ttl秒后重新拉取；
+    收盘后拉取的当日数据视为最终数据。
+    拉取失败（数据源抛出异常）的区间不记为已覆盖，下次请求时重新拉取；
+    数据源吞掉异常返回空表时（如TushareAPI未设置raise_errors）无法区分失败和无数据，
+    空结果同样不记为已覆盖。
+    其余方法（get_latest_price等）直接转发给被包装的数据源。
+    """
+
+    DAILY_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+    def __init__(self,
+                 source,
+                 storage: MarketDataStorage = None,
+                 today_ttl: float = 300.0,
+                 close_time: str = '15:30'):
+        self.source = source
+        self.storage = storage or MarketDataStorage()
+        self.today_ttl = today_ttl
+        self.close_time = close_time
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # 避免反序列化时source尚未设置导致递归
+        if name == 'source' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.source, name)
+
+    def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """获取日线数据（以trade_date为索引）"""
+        today = datetime.now().strftime('%Y%m%d')
+        start = _format_trade_dates([start_date]).tolist()[0]
+        end = min(_format_trade_dates([end_date]).tolist()[0], today)
+
+        with self._lock:
+            missing = self._missing_ranges(symbol, start, end) if start <= end else []
+            if missing:
+                self.misses += 1
+            else:
+                self.hits += 1
+            for lo, hi in missing:
+                try:
+                    df = self.source.get_daily_data(symbol, lo, hi)
+                except Exception as e:
+                    logger.error(f"拉取{symbol} {lo}~{hi}日线失败: {str(e)}")
+                    continue
+                if df is not None and not df.empty:
+                    self.storage.save_daily_data_bulk(self._normalize(df, symbol))
+                elif not getattr(self.source, 'raise_errors', True):
+                    continue
+                self._record_coverage(symbol, lo, hi)
+
+        df = self.storage.get_daily_panel([symbol], start, end, self.DAILY_FIELDS)
+        return df.reset_index('symbol')
+
+    def cache_stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _normalize(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """统一为存储层的日线格式"""
+        df = self.storage._trade_date_as_column(df)
+        df = df.rename(columns={'vol': 'volume', 'ts_code': 'symbol'})
+        return df.assign(symbol=symbol)
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        """当日数据是否仍然有效"""
+        fetched = datetime.fromtimestamp(fetched_at)
+        close = datetime.combine(fetched.date(), datetime.strptime(self.close_time, '%H:%M').time())
+        if fetched >= close and fetched.date() == datetime.now().date():
+            return True
+        return time.time() - fetched_at <= self.today_ttl
+
+    def _load_coverage(self, symbol: str) -> List[Tuple[str, str, float]]:
+        with self.storage._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT start_date, end_date, fetched_at FROM daily_cache_coverage "
+                "WHERE symbol = ? ORDER BY start_date",
+                (symbol,)
+            ).fetchall()
+        return rows
+
+    def _missing_ranges(self, symbol: str, start: str, end: str) -> List[Tuple[str, str]]:
+        """请求区间扣除已覆盖区间后的缺失子区间"""
+        today = datetime.now().strftime('%Y%m%d')
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+
+        missing, cursor = [], start
+        for lo, hi, fetched_at in self._load_coverage(symbol):
+            # 覆盖到当日但已过期时，当日视为未覆盖
+            if hi >= today and not self._is_fresh(fetched_at):
+                hi = yesterday
+            if hi < cursor or lo > hi:
+                continue
+            if lo > end:
+                break
+            if lo > cursor:
+                missing.append((cursor, _shift_date(lo, -1)))
+            cursor = max(cursor, _shift_date(hi, 1))
+            if cursor > end:
+                return missing
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def _record_coverage(self, symbol: str, start: str, end: str):
+        """记录新拉取的区间，并与相邻/重叠区间合并
+
+        fetched_at只用于判断当日数据是否过期：合并后的区间覆盖当日时，
+        沿用覆盖当日的那段的拉取时间，补拉更早的历史区间不会刷新当日数据的时间
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        intervals = [list(row) for row in self._load_coverage(symbol)]
+        intervals.append([start, end, time.time()])
+        intervals.sort()
+
+        merged = [intervals[0]]
+        for lo, hi, fetched_at in intervals[1:]:
+            last = merged[-1]
+            if lo <= _shift_date(last[1], 1):
+                if (hi >= today) == (last[1] >= today):
+                    last[2] = max(last[2], fetched_at)
+                elif hi >= today:
+                    last[2] = fetched_at
+                last[1] = max(last[1], hi)
+            else:
+                merged.append([lo, hi, fetched_at])
+
+        with self.storage._get_connection() as conn:
+            conn.execute("DELETE FROM daily_cache_coverage WHERE symbol = ?", (symbol,))
+            conn.executemany(
+                "INSERT INTO daily_cache_coverage VALUES (?, ?, ?, ?)",
+                [(symbol, lo, hi, fetched_at) for lo, hi, fetched_at in merged]
+            )
+
+def _shift_date(date: str, days: int) -> str:
+    """YYYYMMDD日期加减天数"""
+    return (datetime.strptime(date, '%Y%m%d') + timedelta(days=days)).strftime('%Y%m%d')
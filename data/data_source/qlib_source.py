@@ -1,40 +1,150 @@
 from data.data_source.base import BaseDataSource
 from qlib.data import D
-from qlib.config import REG_CN as REGION_CN
+from qlib.config import C, REG_CN as REGION_CN
 import qlib
+import os
+import json
+import hashlib
+import logging
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+def _init_worker(init_options: Dict):
+    """子进程按主进程的配置初始化Qlib"""
+    qlib.init(**init_options)
+
+def _fetch_features(instruments: List[str], fields: List[str], start_time, end_time,
+                    freq: str) -> pd.DataFrame:
+    return D.features(instruments, fields, start_time=start_time, end_time=end_time, freq=freq)
+
+class QlibFeatureLoader:
+    """Qlib特征批量读取
+
+    所有股票、所有字段合并为一次D.features调用；股票数超过shard_size时
+    按股票分片交给进程池并行读取（子进程用init_options初始化Qlib），再按原顺序拼接。
+    结果按(数据目录, 股票池, 字段, 区间, 频率, 数据最新交易日)落盘到cache_dir，
+    Qlib数据更新到新交易日后键随之变化，不会读到旧结果。
+    init_options为None时（Qlib已在本进程初始化）不分片，缓存键取当前生效的provider_uri。
+    """
+    def __init__(self,
+                 init_options: Optional[Dict] = None,
+                 workers: int = None,
+                 shard_size: int = 800,
+                 cache_dir: Optional[str] = 'data/qlib_cache'):
+        self.init_options = init_options
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def features(self,
+                 instruments: Union[str, List[str]],
+                 fields: List[str],
+                 start_time: str,
+                 end_time: str,
+                 freq: str = 'day') -> pd.DataFrame:
+        """读取特征，返回以(instrument, datetime)为索引、列与fields一致的表
+
+        instruments可以是股票列表，也可以是市场名（如 'csi300'、'all'）
+        """
+        if isinstance(instruments, str):
+            instruments = D.list_instruments(D.instruments(instruments), start_time=start_time,
+                                             end_time=end_time, freq=freq, as_list=True)
+        instruments = list(dict.fromkeys(instruments))
+        fields = list(fields)
+
+        path = self._cache_path(instruments, fields, start_time, end_time, freq)
+        if path and os.path.exists(path):
+            return pd.read_parquet(path)
+
+        df = self._fetch(instruments, fields, start_time, end_time, freq)
+        if path:
+            tmp_path = path + '.tmp'
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        return df
+
+    def _fetch(self, instruments: List[str], fields: List[str], start_time, end_time,
+               freq: str) -> pd.DataFrame:
+        shards = [instruments[i:i + self.shard_size] for i in range(0, len(instruments), self.shard_size)]
+        if len(shards) <= 1 or self.workers <= 1 or self.init_options is None:
+            return _fetch_features(instruments, fields, start_time, end_time, freq)
+
+        logger.info(f"Qlib特征读取: {len(instruments)} 只股票分 {len(shards)} 片，{self.workers} 个进程")
+        # 子进程内Qlib自身的joblib并行关掉，避免进程数相乘
+        options = dict(self.init_options, kernels=1)
+        with ProcessPoolExecutor(min(self.workers, len(shards)), initializer=_init_worker,
+                                 initargs=(options,)) as pool:
+            futures = [pool.submit(_fetch_features, shard, fields, start_time, end_time, freq)
+                       for shard in shards]
+            return pd.concat([future.result() for future in futures])
+
+    def _cache_path(self, instruments: List[str], fields: List[str], start_time, end_time,
+                    freq: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        calendar = D.calendar(start_time=start_time, end_time=end_time, freq=freq)
+        payload = {
+            'provider': C['provider_uri'],
+            'instruments': sorted(instruments),
+            'fields': fields,
+            'start': str(pd.Timestamp(start_time).date()),
+            'end': str(pd.Timestamp(end_time).date()),
+            'last_date': str(calendar[-1]) if len(calendar) else None,
+            'freq': freq
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(encoded).hexdigest()}.parquet")
 
 class QlibDataSource(BaseDataSource):
-    """Qlib数据源适配器"""
-    
-    def __init__(self, provider_name: str = 'cn_data'):
+    """Qlib数据源适配器
+
+    开启Qlib的表达式/数据集磁盘缓存和日历内存缓存（磁盘缓存依赖redis锁，
+    redis不可用时Qlib会自动关闭），批量读取经由QlibFeatureLoader。
+    """
+
+    def __init__(self,
+                 provider_name: str = 'cn_data',
+                 expression_cache: Optional[str] = 'DiskExpressionCache',
+                 dataset_cache: Optional[str] = 'DiskDatasetCache',
+                 workers: int = None,
+                 shard_size: int = 800,
+                 cache_dir: Optional[str] = 'data/qlib_cache'):
         # 初始化Qlib
-        qlib.init(
-            provider_name=provider_name,
-            region=REGION_CN,
-            expression_cache=None,
-            calendar_cache=None
-        )
+        self.init_options = {
+            'provider_name': provider_name,
+            'region': REGION_CN,
+            'expression_cache': expression_cache,
+            'dataset_cache': dataset_cache,
+            'calendar_cache': 'MemoryCalendarCache'
+        }
+        if cache_dir:
+            self.init_options['local_cache_path'] = os.path.join(cache_dir, 'qlib')
+        qlib.init(**self.init_options)
         self.provider = D
-        
+        self.loader = QlibFeatureLoader(self.init_options, workers, shard_size, cache_dir)
+
     def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
+        return self.get_daily_data_batch([symbol], start_date, end_date)
+
+    def get_daily_data_batch(self, symbols: Union[str, List[str]], start_date: str,
+                             end_date: str) -> pd.DataFrame:
+        """一次读取多只股票（或整个市场）的日线数据"""
         fields = [
-            '$open', '$high', '$low', '$close', 
-            '$volume', '$factor', 
+            '$open', '$high', '$low', '$close',
+            '$volume', '$factor',
             '$vwap', '$turnover'
         ]
-        
-        df = self.provider.features(
-            instruments=[symbol],
-            fields=fields,
-            start_time=start_date,
-            end_time=end_date,
-            freq='day'
-        )
-        
+
+        df = self.loader.features(symbols, fields, start_date, end_date, freq='day')
+
         return self._convert_to_standard_format(df)
-        
+
     def _convert_to_standard_format(self, df: pd.DataFrame) -> pd.DataFrame:
         """转换为标准格式"""
         df = df.copy()
@@ -50,4 +160,4 @@ class QlibDataSource(BaseDataSource):
             '$turnover': 'turnover'
         }
         df.rename(columns=rename_dict, inplace=True)
-        return df 
\ No newline at end of file
+        return df
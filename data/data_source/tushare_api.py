@@ -4,8 +4,10 @@ from datetime import datetime
 import pandas as pd
 
 class TushareAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, raise_errors: bool = False):
         self.api = ts.pro_api(api_key)
+        # 为True时get_daily_data出错直接抛出，而不是返回空表（供CachedDataSource区分失败和无数据）
+        self.raise_errors = raise_errors
         
     def get_daily_data(self, symbol: str, 
                       start_date: str, 
@@ -53,6 +55,8 @@ class TushareAPI:
             return df_daily
         
         except Exception as e:
+            if self.raise_errors:
+                raise
             print(f"获取数据时出错: {str(e)}")
             import traceback
             print(f"错误详情:\n{traceback.format_exc()}")
@@ -3,35 +3,43 @@ import pandas as pd
 from datetime import datetime
 from data.data_source.base import BaseDataSource
 from utils.retry import retry_on_error
-import time
+from utils.rate_limiter import RateLimiter
 from config.base_config import current_config
 
 class TushareDataSource(BaseDataSource):
     """Tushare数据源适配器"""
     
-    def __init__(self, token: str):
+    SUPPORTS_DAILY_BY_DATE = True
+    
+    def __init__(self, token: str, rate_limiter: RateLimiter = None):
         self.pro = ts.pro_api(token)
         self.ts = ts
-        self.last_call_time = 0  # 新增调用间隔控制
-        self.call_count = 0
+        # 调用频率和配额控制（线程安全，可在多个数据源间共享）
+        self.rate_limiter = rate_limiter or RateLimiter.from_config(current_config)
+        
+    @property
+    def call_count(self) -> int:
+        return self.rate_limiter.calls
+    
+    @call_count.setter
+    def call_count(self, value: int):
+        self.rate_limiter.calls = value
         
-    @retry_on_error(max_retries=3, delay=2.0)
     def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
-        if self.call_count >= current_config.MAX_API_CALLS:
-            raise Exception("达到每日API调用上限")
-        self.call_count += 1
-        
-        # 控制调用频率
-        time_since_last = time.time() - self.last_call_time
-        if time_since_last < 1:  # 至少1秒间隔
-            time.sleep(1 - time_since_last)
-        self.last_call_time = time.time()
-        
+        # 控制调用频率，超出配额时抛出QuotaExceededError；每次请求只计一次，网络重试不再扣配额
+        self.rate_limiter.acquire()
+        return self._fetch_daily(ts_code=symbol, start_date=start_date, end_date=end_date)
+    
+    def get_daily_data_by_date(self, trade_date: str) -> pd.DataFrame:
+        """获取某个交易日的全市场日线数据（一次调用）"""
+        self.rate_limiter.acquire()
+        return self._fetch_daily(trade_date=trade_date)
+    
+    @retry_on_error(max_retries=3, delay=2.0)
+    def _fetch_daily(self, **query) -> pd.DataFrame:
         df = self.pro.daily(
-            ts_code=symbol,
-            start_date=start_date,
-            end_date=end_date,
+            **query,
             fields='ts_code,trade_date,open,high,low,close,vol,amount'
         )
         return self._convert_to_standard_format(df)
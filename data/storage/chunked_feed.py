@@ -0,0 +1,64 @@
+import logging
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from data.storage.market_data import MarketDataStorage
+
+logger = logging.getLogger(__name__)
+
+class ChunkedDailyFeed:
+    """按交易日分块读取日线的流式行情
+
+    每次迭代产出一块长表（trade_date索引 + symbol列），格式与
+    BacktestEngine._prepare_data一致。读取当前块的同时在后台线程预取下一块，
+    内存中最多同时存在两块数据。
+    """
+    DEFAULT_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self,
+                 storage: MarketDataStorage,
+                 symbols: Optional[List[str]],
+                 start_date: str,
+                 end_date: str,
+                 chunk_days: int = 60,
+                 fields: List[str] = None,
+                 prefetch: bool = True):
+        self.storage = storage
+        self.symbols = symbols
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunk_days = chunk_days
+        self.fields = fields or self.DEFAULT_FIELDS
+        self.prefetch = prefetch
+
+    def chunks(self) -> List[Tuple[str, str]]:
+        """按交易日切分的 (开始, 结束) 区间"""
+        dates = self.storage._get_open_dates(self.start_date, self.end_date)
+        return [
+            (dates[i], dates[min(i + self.chunk_days, len(dates)) - 1])
+            for i in range(0, len(dates), self.chunk_days)
+        ]
+
+    def _load(self, start: str, end: str) -> pd.DataFrame:
+        df = self.storage.get_daily_panel(self.symbols, start, end, self.fields)
+        return df.reset_index('symbol')
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        chunks = self.chunks()
+        if not self.prefetch:
+            for start, end in chunks:
+                chunk = self._load(start, end)
+                if not chunk.empty:
+                    yield chunk
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self._load, *chunks[0]) if chunks else None
+            for i in range(len(chunks)):
+                chunk = future.result()
+                if i + 1 < len(chunks):
+                    future = pool.submit(self._load, *chunks[i + 1])
+                logger.debug(f"行情块 {chunks[i][0]}-{chunks[i][1]}: {len(chunk)} 条")
+                if not chunk.empty:
+                    yield chunk
+                del chunk
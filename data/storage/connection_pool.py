@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class SQLiteConnectionPool:
+    """SQLite连接池
+
+    每个线程持有一个长连接，连接创建时统一设置PRAGMA，
+    WAL模式写入数据库文件后只需设置一次。
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 cache_size_kb: int = 64 * 1024,
+                 mmap_size: int = 256 * 1024 * 1024,
+                 synchronous: str = 'NORMAL',
+                 cached_statements: int = 256,
+                 timeout: float = 30.0):
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb          # 页缓存大小（KB）
+        self.mmap_size = mmap_size                  # 内存映射大小（字节）
+        self.synchronous = synchronous              # WAL下NORMAL即可保证一致性
+        self.cached_statements = cached_statements  # 每个连接的语句缓存数量
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._wal_enabled = False
+        self._created = 0
+        self._reused = 0
+
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            with self._lock:
+                self._connections[threading.get_ident()] = conn
+                self._created += 1
+        else:
+            self._reused += 1
+        return conn
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建连接并设置PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+
+        # WAL模式是持久化的，只需对数据库文件设置一次
+        with self._lock:
+            if not self._wal_enabled and self.db_path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_enabled = True
+
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        logger.debug(f"创建数据库连接: {self.db_path} (线程 {threading.get_ident()})")
+        return conn
+
+    def close_all(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._wal_enabled = False
+
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"关闭数据库连接失败: {str(e)}")
+
+        # 当前线程的本地引用也需要失效
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        """连接池统计"""
+        with self._lock:
+            return {
+                'open_connections': len(self._connections),
+                'created': self._created,
+                'reused': self._reused
+            }
@@ -0,0 +1,248 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from data.storage.market_data import MarketDataStorage
+from strategies.factor_base import BaseFactor
+
+logger = logging.getLogger(__name__)
+
+class FactorStore:
+    """持久化因子库：按因子类、参数和股票池分目录存放计算结果
+
+    目录结构:
+        {因子类名}_{键哈希}/meta.json     - 因子类、参数、股票池、已计算到的日期、行情数据版本
+        {因子类名}_{键哈希}/{年份}.parquet - 长表 (trade_date, symbol, value)，按日期、股票排序
+    每日行情入库后update只计算last_date之后的新交易日（向前多取warmup_period天预热）；
+    日线写入日志显示上次计算后有历史日期被补录/修正时，从最早被改写的日期起重算；
+    请求的起始日期早于已有起点时只补算前面缺少的区间。
+    """
+    FIELDS = ['trade_date', 'symbol', 'value']
+
+    def __init__(self, storage: MarketDataStorage, root_dir: str = 'data/factors',
+                 start_date: str = '20100101'):
+        self.storage = storage
+        self.root_dir = root_dir
+        self.start_date = start_date
+        os.makedirs(root_dir, exist_ok=True)
+
+    def key(self, factor: BaseFactor, symbols: Optional[List[str]] = None) -> str:
+        """因子目录名：类名 + (类路径, 参数, 股票池)的哈希"""
+        payload = {
+            'factor': f"{type(factor).__module__}.{type(factor).__qualname__}",
+            'params': factor.params,
+            'universe': sorted(symbols) if symbols is not None else None
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return f"{type(factor).__name__}_{hashlib.sha1(encoded).hexdigest()[:8]}"
+
+    def update(self,
+               factor: BaseFactor,
+               end_date: str = None,
+               symbols: Optional[List[str]] = None,
+               start_date: str = None) -> int:
+        """把因子计算到end_date（默认今天），返回新写入的交易日数
+
+        start_date早于已有起点时向前补算到start_date
+        """
+        path = os.path.join(self.root_dir, self.key(factor, symbols))
+        meta = self._load_meta(path)
+        start = pd.Timestamp(start_date or (meta or {}).get('start_date') or self.start_date)
+        end = pd.Timestamp(end_date or datetime.now().date())
+        added = 0
+        if meta is not None and start < pd.Timestamp(meta['start_date']):
+            added = self._extend_back(factor, symbols, path, meta, start)
+        if meta is None:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+            meta = {
+                'factor': f"{type(factor).__module__}.{type(factor).__qualname__}",
+                'params': factor.params,
+                'universe': list(symbols) if symbols is not None else None,
+                'start_date': start.strftime('%Y%m%d'),
+                'last_date': None,
+                'data_version': 0
+            }
+
+        # 先取版本号再读数据，计算期间的新写入留到下次处理
+        version = self.storage.daily_data_version()
+        compute_from = self._compute_from(path, meta, version)
+        if compute_from > end:
+            return added
+        if meta['last_date'] is not None:
+            # 历史改动重算时至少算到已有的last_date，否则之后的已存值会被删掉
+            end = max(end, pd.Timestamp(meta['last_date']))
+
+        panel = self._load_panel(factor, symbols, compute_from, end)
+        first = panel[factor.fields[0]]
+        if first.empty or first.index[-1] < compute_from:
+            return added
+
+        values = factor.calculate_panel(panel).loc[compute_from:].dropna(how='all')
+        self._write_values(path, values, compute_from)
+
+        meta['last_date'] = first.index[-1].strftime('%Y%m%d')
+        meta['data_version'] = version
+        self._save_meta(path, meta)
+        logger.info(f"{os.path.basename(path)} 计算 {len(values)} 个交易日 "
+                    f"({compute_from:%Y%m%d} ~ {meta['last_date']})")
+        return added + len(values)
+
+    def update_all(self,
+                   factors: Iterable[BaseFactor],
+                   end_date: str = None,
+                   symbols: Optional[List[str]] = None) -> Dict[str, int]:
+        """批量更新（如每日行情入库后），返回 {因子目录名: 新写入的交易日数}"""
+        return {self.key(factor, symbols): self.update(factor, end_date, symbols) for factor in factors}
+
+    def read(self,
+             factor: BaseFactor,
+             start_date: str,
+             end_date: str,
+             symbols: Optional[List[str]] = None,
+             layout: str = 'wide',
+             universe: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取已计算的因子值（只扫描区间内年份的文件，谓词下推过滤日期和股票）
+
+        universe: 因子库的股票池（与update时一致），symbols: 本次读取的股票
+        layout: wide 返回日期×股票矩阵；long 返回以(trade_date, symbol)为索引的长表
+        """
+        if layout not in ('long', 'wide'):
+            raise ValueError(f"不支持的layout: {layout}")
+        path = os.path.join(self.root_dir, self.key(factor, universe))
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        files = [self._year_file(path, year) for year in range(start.year, end.year + 1)]
+        files = [f for f in files if os.path.exists(f)]
+
+        if files:
+            row_filter = (ds.field('trade_date') >= start) & (ds.field('trade_date') <= end)
+            if symbols is not None:
+                row_filter &= ds.field('symbol').isin(list(symbols))
+            df = ds.dataset(files, format='parquet').to_table(filter=row_filter).to_pandas()
+        else:
+            df = pd.DataFrame({
+                'trade_date': pd.Series(dtype='datetime64[ns]'),
+                'symbol': pd.Series(dtype=object),
+                'value': pd.Series(dtype=float)
+            })
+
+        if layout == 'long':
+            return df.set_index(['trade_date', 'symbol']).sort_index()
+        wide = df.pivot(index='trade_date', columns='symbol', values='value')
+        wide.columns.name = None
+        if symbols is not None:
+            wide = wide.reindex(columns=list(dict.fromkeys(symbols)))
+        return wide
+
+    def load(self,
+             factor: BaseFactor,
+             start_date: str,
+             end_date: str,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """先增量更新到end_date再读取，返回日期×股票矩阵
+
+        首次只从start_date起计算；之后请求更早的区间时向前补算，不重算已有部分
+        """
+        self.update(factor, end_date, symbols, start_date=start_date)
+        return self.read(factor, start_date, end_date, symbols, universe=symbols)
+
+    def _extend_back(self, factor: BaseFactor, symbols: Optional[List[str]], path: str,
+                     meta: Dict, start: pd.Timestamp) -> int:
+        """向前补算[start, 原起始日)，已有部分计算时已带预热，保持不变"""
+        until = pd.Timestamp(meta['start_date']) - pd.Timedelta(days=1)
+        count = 0
+        if meta['last_date'] is not None:
+            panel = self._load_panel(factor, symbols, start, until)
+            values = factor.calculate_panel(panel).loc[start:until].dropna(how='all')
+            self._write_values(path, values, start, until)
+            count = len(values)
+            logger.info(f"{os.path.basename(path)} 向前补算 {count} 个交易日 "
+                        f"({start:%Y%m%d} ~ {until:%Y%m%d})")
+        meta['start_date'] = start.strftime('%Y%m%d')
+        self._save_meta(path, meta)
+        return count
+
+    def _compute_from(self, path: str, meta: Dict, version: int) -> pd.Timestamp:
+        """需要开始计算的日期：last_date之后，或上次计算后被改写的最早历史日期"""
+        if meta['last_date'] is None:
+            return pd.Timestamp(meta['start_date'])
+
+        next_date = pd.Timestamp(meta['last_date']) + pd.Timedelta(days=1)
+        if version < meta['data_version']:
+            # 行情库被替换（如从备份恢复），无法判断改动范围
+            earliest = meta['start_date']
+        else:
+            earliest = self.storage.daily_changes_since(meta['data_version'])
+        if earliest is None or pd.Timestamp(earliest) >= next_date:
+            return next_date
+
+        logger.info(f"{os.path.basename(path)} {earliest} 起历史行情有改动，重算")
+        return max(pd.Timestamp(earliest), pd.Timestamp(meta['start_date']))
+
+    def _load_panel(self, factor: BaseFactor, symbols: Optional[List[str]],
+                    start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        """读取 [start, end] 的行情面板，并在前面保留warmup_period个交易日"""
+        # 按自然日粗略回溯（覆盖长假），再截取最后warmup_period个交易日
+        lookback = pd.Timedelta(days=factor.warmup_period * 2 + 20)
+        panel = self.storage.get_daily_panel(symbols, start - lookback, end, factor.fields, layout='wide')
+        index = panel[factor.fields[0]].index
+        first = max(int(index.searchsorted(start)) - factor.warmup_period, 0)
+        return {field: df.iloc[first:] for field, df in panel.items()}
+
+    def _write_values(self, path: str, values: pd.DataFrame, since: pd.Timestamp,
+                      until: Optional[pd.Timestamp] = None):
+        """替换[since, until]（until为None时直到最后）的因子值
+
+        区间两端所在年份保留区间外的部分后重写，中间的年份整体重写
+        """
+        long = values.stack().dropna().rename('value').rename_axis(['trade_date', 'symbol']).reset_index()
+        long['trade_date'] = long['trade_date'].astype('datetime64[ns]')
+        long['symbol'] = long['symbol'].astype(str)
+        chunks = dict(list(long.groupby(long['trade_date'].dt.year, sort=True)))
+
+        existing_years = [int(name.split('.')[0]) for name in os.listdir(path) if name.endswith('.parquet')]
+        last_year = until.year if until is not None else max(existing_years + list(chunks) + [since.year])
+        for year in sorted(set(chunks) | {y for y in existing_years if since.year <= y <= last_year}):
+            file = self._year_file(path, year)
+            chunk = chunks.get(year, long.iloc[:0])
+            if year in (since.year, last_year) and os.path.exists(file):
+                existing = pq.read_table(file).to_pandas()
+                keep = existing['trade_date'] < since
+                if until is not None:
+                    keep |= existing['trade_date'] > until
+                chunk = pd.concat([existing[keep], chunk], ignore_index=True)
+            if chunk.empty:
+                if os.path.exists(file):
+                    os.remove(file)
+                continue
+            chunk = chunk.sort_values(['trade_date', 'symbol'], ignore_index=True)
+            tmp_file = file + '.tmp'
+            pq.write_table(pa.Table.from_pandas(chunk[self.FIELDS], preserve_index=False),
+                           tmp_file, compression='zstd')
+            os.replace(tmp_file, file)
+
+    @staticmethod
+    def _year_file(path: str, year: int) -> str:
+        return os.path.join(path, f"{year}.parquet")
+
+    @staticmethod
+    def _load_meta(path: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _save_meta(path: str, meta: Dict):
+        tmp_file = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(tmp_file, os.path.join(path, 'meta.json'))
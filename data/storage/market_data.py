@@ -1,23 +1,61 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from data.data_source.base import BaseDataSource
-from data.data_source.qlib_source import QlibDataSource
-from typing import List, Dict
+from data.storage.connection_pool import SQLiteConnectionPool
+from data.storage.read_cache import ReadCache
+from config.base_config import current_config
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Union
 import logging
+import queue
+import threading
 import time
-from utils.retry import retry_with_log
+from utils.retry import retry_with_log, retry_on_error
+from utils.rate_limiter import RateLimiter, QuotaExceededError
 
 logger = logging.getLogger(__name__)
 
+def _format_trade_dates(dates) -> np.ndarray:
+    """向量化转换为YYYYMMDD字符串"""
+    dt = pd.DatetimeIndex(pd.to_datetime(dates))
+    ymd = dt.year.to_numpy() * 10000 + dt.month.to_numpy() * 100 + dt.day.to_numpy()
+    return ymd.astype(str)
+
 class MarketDataStorage:
-    def __init__(self, db_path: str = 'data/market.db'):
+    DAILY_COLUMNS = [
+        'symbol', 'trade_date', 'open', 'high', 'low',
+        'close', 'volume', 'amount', 'adj_factor'
+    ]
+    DAILY_INSERT_SQL = """
+        INSERT OR REPLACE INTO daily_price 
+        (symbol, trade_date, open, high, low, close, volume, amount, adj_factor)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    FINANCIAL_COLUMNS = [
+        'symbol', 'report_date', 'announce_date', 'total_assets', 'total_liab',
+        'total_revenue', 'net_income', 'roe', 'asset_turnover', 'current_ratio'
+    ]
+    PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'adj_factor']
+    MINUTE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+    STAGING_THRESHOLD = 200000  # 超过该行数时走临时表批量写入
+    MAX_INLINE_SYMBOLS = 500    # 超过该数量时股票列表经临时表JOIN
+
+    def __init__(self, db_path: str = 'data/market.db', pool_options: Dict = None,
+                 cache_size: int = 4096, realtime_ttl: float = 3.0):
         self.db_path = db_path
+        # 长连接池：每线程一个连接，PRAGMA只在建连时设置一次
+        self._pool = SQLiteConnectionPool(db_path, **(pool_options or {}))
+        # 热点读缓存：写入时按股票/表精确失效，cache_size=0 关闭
+        self._cache = ReadCache(cache_size)
+        # 最新价/K线可能由其他进程（实时更新脚本、调度器）写入，本进程收不到失效，只缓存realtime_ttl秒
+        self.realtime_ttl = realtime_ttl
         self._init_db()
         
     def _init_db(self):
         """初始化数据库表结构"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             # 创建股票基本信息表
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS stock_info (
@@ -97,6 +135,8 @@ class MarketDataStorage:
             # 添加索引
             conn.execute('CREATE INDEX IF NOT EXISTS idx_industry ON stock_info(industry)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_is_active ON stock_info(is_active)')
+            # 截面查询按交易日范围扫描
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_daily_trade_date ON daily_price(trade_date)')
 
             # 交易日历表
             conn.execute('''
@@ -117,6 +157,28 @@ class MarketDataStorage:
                 )
             ''')
             
+            # 日线缓存覆盖区间表（读穿透缓存记录已拉取的日期区间）
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_cache_coverage (
+                    symbol TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    fetched_at REAL,
+                    PRIMARY KEY (symbol, start_date)
+                )
+            ''')
+            
+            # 日线写入日志（派生数据据此判断历史行情是否被补录/修正）
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_write_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    rows INTEGER,
+                    written_at REAL
+                )
+            ''')
+            
             # 财务数据表
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS financial_data (
@@ -134,28 +196,280 @@ class MarketDataStorage:
                 )
             ''')
 
-    @retry_with_log(tries=3, delay=2)
-    def update_daily_data(self, data_source: BaseDataSource):
-        """改进后的增量更新"""
+    @retry_with_log(tries=3, delay=2, no_retry=(QuotaExceededError,))
+    def update_daily_data(self, data_source: BaseDataSource, workers: int = 1,
+                          rate_limiter: RateLimiter = None, mode: str = 'auto') -> Dict:
+        """改进后的增量更新
+
+        workers > 1 时并发拉取：令牌桶限流，单写线程批量落库
+        rate_limiter: 数据源自身未限流时使用，默认按current_config创建
+        mode: symbol 逐只拉取；date 按交易日拉取全市场；
+              auto 按缺失交易日数与缺失股票数自动组合两种方式
+        """
+        if mode not in ('auto', 'symbol', 'date'):
+            raise ValueError(f"不支持的拉取方式: {mode}")
+        if mode == 'date' and not getattr(data_source, 'SUPPORTS_DAILY_BY_DATE', False):
+            raise ValueError(f"{type(data_source).__name__} 不支持按交易日拉取")
+        
+        tasks = self._daily_update_tasks(data_source)
+        summary = {'symbols': len(tasks), 'saved': 0, 'failed': [], 'failed_dates': [],
+                   'quota_exceeded': False}
+        
+        if mode != 'symbol' and getattr(data_source, 'SUPPORTS_DAILY_BY_DATE', False):
+            trade_dates, tasks, starts = self._plan_daily_update(tasks, force_date=(mode == 'date'))
+            if trade_dates:
+                by_date = self._update_daily_by_date(data_source, trade_dates, starts, workers, rate_limiter)
+                summary['saved'] += by_date['saved']
+                summary['quota_exceeded'] = by_date['quota_exceeded']
+                summary['failed_dates'] = by_date['failed_dates']
+                summary['by_date'] = len(trade_dates)
+            if summary['quota_exceeded']:
+                return summary
+        
+        if workers > 1:
+            by_symbol = self._update_daily_concurrent(data_source, tasks, workers, rate_limiter)
+        else:
+            by_symbol = self._update_daily_sequential(data_source, tasks, rate_limiter)
+        summary['saved'] += by_symbol['saved']
+        summary['failed'].extend(by_symbol['failed'])
+        summary['quota_exceeded'] = by_symbol.get('quota_exceeded', False)
+        summary['by_symbol'] = len(tasks)
+        return summary
+
+    def _update_daily_sequential(self, data_source: BaseDataSource, tasks: List[tuple],
+                                 rate_limiter: RateLimiter = None) -> Dict:
+        """逐只拉取日线"""
+        summary = {'symbols': len(tasks), 'saved': 0, 'failed': [], 'quota_exceeded': False}
+        for symbol, start_date, end_date in tasks:
+            # 带重试机制的数据获取（复用utils/retry），配额用尽不重试
+            @retry_with_log(tries=3, delay=1, no_retry=(QuotaExceededError,))
+            def fetch_data():
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+                return data_source.get_daily_data(symbol, start_date, end_date)
+            
+            try:
+                df = fetch_data()
+            except QuotaExceededError as e:
+                # 配额用尽：停止拉取，已写入的数据保留，下次增量续传
+                logger.warning(f"{str(e)}，停止拉取剩余股票")
+                summary['quota_exceeded'] = True
+                break
+            if df is not None and not df.empty and self._validate_data(df):
+                self._save_daily_data(symbol, df)
+                summary['saved'] += len(df)
+        return summary
+
+    def _plan_daily_update(self, tasks: List[tuple], force_date: bool = False):
+        """选择按日或按股票拉取
+
+        将任务按起始日期倒序排列，前k只股票按日覆盖的调用数为
+        “最早起始日之后的交易日数”，其余股票逐只拉取，取总调用数最小的k。
+        本地交易日历未覆盖的区间无法估算、也会漏拉，这部分只逐只拉取；
+        force_date时改按工作日拉取（节假日返回空数据）。
+        返回 (按日拉取的交易日, 仍需逐只拉取的任务, {按日覆盖的股票: 起始日期})
+        """
+        if not tasks:
+            return [], tasks, {}
+        
+        end_date = max(t[2] for t in tasks)
+        ordered = sorted(tasks, key=lambda t: t[1], reverse=True)
+        starts = np.array([t[1] for t in ordered])
+        earliest = ordered[-1][1]
+        calendar = self._get_calendar_range()
+        if calendar is None:
+            in_calendar = np.ones(len(starts), dtype=bool)
+        else:
+            in_calendar = (starts >= calendar[0]) & (end_date <= calendar[1])
+        
+        if force_date and not in_calendar[-1]:
+            logger.warning(f"交易日历未覆盖 {earliest} ~ {end_date}，按工作日拉取")
+            open_dates = np.array(pd.bdate_range(earliest, end_date).strftime('%Y%m%d'))
+        else:
+            open_dates = np.array(self._get_open_dates(earliest, end_date))
+        
+        days_needed = len(open_dates) - np.searchsorted(open_dates, starts, side='left')
+        cost = days_needed + (len(ordered) - np.arange(1, len(ordered) + 1))
+        if force_date:
+            k = len(ordered) - 1
+        else:
+            if not in_calendar.all():
+                logger.info(f"交易日历未覆盖 {earliest} ~ {end_date}，未覆盖部分逐只拉取")
+            cost = np.where(in_calendar, cost, np.inf)
+            k = int(np.argmin(cost))
+            if cost[k] >= len(ordered):
+                return [], tasks, {}
+        
+        cutoff = np.searchsorted(open_dates, starts[k], side='left')
+        trade_dates = open_dates[cutoff:].tolist()
+        covered = {symbol: start for symbol, start, _ in ordered[:k + 1]}
+        logger.info(f"按日拉取 {len(trade_dates)} 个交易日覆盖 {len(covered)} 只股票，"
+                    f"逐只拉取 {len(ordered) - k - 1} 只股票")
+        return trade_dates, ordered[k + 1:], covered
+
+    def _get_calendar_range(self) -> Optional[tuple]:
+        """本地交易日历覆盖的 (首日, 末日)（YYYYMMDD），没有日历返回None"""
+        with self._get_connection() as conn:
+            try:
+                row = conn.execute("SELECT MIN(date), MAX(date) FROM trade_calendar").fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or row[0] is None:
+            return None
+        first, last = _format_trade_dates(list(row))
+        return first, last
+
+    def _get_open_dates(self, start_date: str, end_date: str) -> List[str]:
+        """交易日列表（YYYYMMDD），交易日历缺失时退化为工作日"""
+        with self._get_connection() as conn:
+            try:
+                df = pd.read_sql("SELECT date, is_open FROM trade_calendar", conn)
+            except Exception:
+                df = pd.DataFrame()
+        
+        if not df.empty:
+            dates = _format_trade_dates(df.loc[df['is_open'].astype(int) == 1, 'date'])
+            dates = np.unique(dates)
+            dates = dates[(dates >= start_date) & (dates <= end_date)]
+            if len(dates):
+                return dates.tolist()
+        
+        return pd.bdate_range(start_date, end_date).strftime('%Y%m%d').tolist()
+
+    def _update_daily_by_date(self, data_source: BaseDataSource, trade_dates: List[str],
+                              starts: Dict[str, str], workers: int = 1,
+                              rate_limiter: RateLimiter = None) -> Dict:
+        """按交易日拉取全市场日线，单事务批量写入
+
+        返回的failed_dates包含拉取失败的交易日及因此未写入的之后各交易日
+        """
+        if rate_limiter is None and getattr(data_source, 'rate_limiter', None) is None:
+            rate_limiter = RateLimiter.from_config(current_config)
+        
+        @retry_on_error(max_retries=3, delay=1.0, exceptions=(ConnectionError, TimeoutError, OSError))
+        def fetch(trade_date: str) -> pd.DataFrame:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            return data_source.get_daily_data_by_date(trade_date)
+        
+        frames, failed_dates, quota_exceeded = {}, [], False
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='daily-date') as pool:
+            futures = {pool.submit(fetch, d): d for d in trade_dates}
+            for future in as_completed(futures):
+                trade_date = futures[future]
+                try:
+                    frames[trade_date] = future.result()
+                except QuotaExceededError as e:
+                    logger.warning(f"{str(e)}，停止按日拉取")
+                    quota_exceeded = True
+                    failed_dates.append(trade_date)
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    break
+                except Exception as e:
+                    logger.error(f"拉取{trade_date}全市场日线失败: {str(e)}")
+                    failed_dates.append(trade_date)
+        
+        # 某日失败时只写入其之前的交易日，避免增量更新留下缺口
+        if failed_dates or quota_exceeded:
+            first_missing = min(d for d in trade_dates if d not in frames)
+            frames = {d: df for d, df in frames.items() if d < first_missing}
+            failed_dates = [d for d in trade_dates if d >= first_missing]
+            logger.warning(f"按日拉取在{first_missing}中断，{len(failed_dates)}个交易日未写入")
+        
+        frames = [df for df in frames.values() if df is not None and not df.empty]
+        if not frames:
+            return {'saved': 0, 'failed_dates': failed_dates, 'quota_exceeded': quota_exceeded}
+        
+        data = self._trade_date_as_column(pd.concat(frames, ignore_index=True))
+        # 只保留股票池内、且晚于各股票已有数据的记录
+        symbol_starts = data['symbol'].map(starts)
+        data = data[symbol_starts.notna().to_numpy() &
+                    (_format_trade_dates(data['trade_date']) >= symbol_starts.fillna('').to_numpy())]
+        
+        saved = self.save_daily_data_bulk(data)
+        return {'saved': saved, 'failed_dates': failed_dates, 'quota_exceeded': quota_exceeded}
+
+    def _daily_update_tasks(self, data_source: BaseDataSource) -> List[tuple]:
+        """生成 (symbol, start_date, end_date) 增量拉取任务"""
         symbol_last_dates = self._get_symbol_last_dates()
         
         # 获取全量股票列表（复用Qlib/Tushare接口）
-        symbols = self._get_all_symbols(data_source)  
+        symbols = self._get_all_symbols(data_source)
+        end_date = datetime.now().strftime('%Y%m%d')
         
+        tasks = []
         for symbol in symbols:
             # 个股增量逻辑
             last_date = symbol_last_dates.get(symbol)
             start_date = (last_date + timedelta(days=1)).strftime('%Y%m%d') if last_date else '19900101'
-            end_date = datetime.now().strftime('%Y%m%d')
-            
-            # 带重试机制的数据获取（复用utils/retry）
-            @retry_with_log(tries=3, delay=1)
-            def fetch_data():
-                return data_source.get_daily_data(symbol, start_date, end_date)
-            
-            df = fetch_data()
-            if self._validate_data(df):
-                self._save_daily_data(symbol, df)
+            if start_date <= end_date:
+                tasks.append((symbol, start_date, end_date))
+        return tasks
+
+    def _update_daily_concurrent(self, data_source: BaseDataSource, tasks: List[tuple],
+                                 workers: int, rate_limiter: RateLimiter = None) -> Dict:
+        """并发拉取日线：线程池拉取 + 单写线程批量写入"""
+        # 数据源自身已限流（如TushareDataSource）时不重复计数
+        if rate_limiter is None and getattr(data_source, 'rate_limiter', None) is None:
+            rate_limiter = RateLimiter.from_config(current_config)
+        
+        summary = {'symbols': len(tasks), 'saved': 0, 'failed': [], 'quota_exceeded': False}
+        write_queue = queue.Queue(maxsize=workers * 4)
+        writer = threading.Thread(
+            target=self._daily_writer, args=(write_queue, summary), name='daily-writer', daemon=True
+        )
+        writer.start()
+        
+        @retry_on_error(max_retries=3, delay=1.0, exceptions=(ConnectionError, TimeoutError, OSError))
+        def fetch(symbol: str, start_date: str, end_date: str):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            df = data_source.get_daily_data(symbol, start_date, end_date)
+            if df is not None and not df.empty and self._validate_data(df):
+                write_queue.put((symbol, df))
+        
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='daily-fetch')
+        try:
+            futures = {pool.submit(fetch, *task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    future.result()
+                except QuotaExceededError as e:
+                    # 配额用尽：取消剩余任务，已拉取的数据照常落库，下次增量续传
+                    logger.warning(f"{str(e)}，停止拉取剩余股票")
+                    summary['quota_exceeded'] = True
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    break
+                except Exception as e:
+                    logger.error(f"拉取{symbol}日线数据失败: {str(e)}")
+                    summary['failed'].append(symbol)
+        finally:
+            pool.shutdown(wait=True)
+            write_queue.put(None)
+            writer.join()
+        
+        logger.info(f"并发更新日线完成: {summary['symbols']}只股票，写入{summary['saved']}条，"
+                    f"失败{len(summary['failed'])}只")
+        return summary
+
+    def _daily_writer(self, write_queue: queue.Queue, summary: Dict, batch_symbols: int = 50):
+        """单写线程：合并多只股票后批量写入，避免多线程争用写锁"""
+        batch = {}
+        while True:
+            item = write_queue.get()
+            if item is not None:
+                symbol, df = item
+                batch[symbol] = df
+            if batch and (item is None or len(batch) >= batch_symbols or write_queue.empty()):
+                try:
+                    summary['saved'] += self.save_daily_data_bulk(batch)
+                except Exception as e:
+                    logger.error(f"批量写入日线数据失败: {str(e)}")
+                    summary['failed'].extend(batch.keys())
+                batch = {}
+            if item is None:
+                break
 
     def update_minute_data(self, data_source, symbols: List[str], freq: str = '1min'):
         """更新分钟数据"""
@@ -181,41 +495,145 @@ class MarketDataStorage:
             # 数据清洗和格式转换
             df = self._clean_daily_data(df, symbol)
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 使用参数化查询
-                insert_sql = """
-                    INSERT OR REPLACE INTO daily_price 
-                    (symbol, trade_date, open, high, low, close, volume, amount, adj_factor)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                # 准备数据
-                data = [
-                    (
-                        symbol,
-                        row['trade_date'].strftime('%Y%m%d'),
-                        row['open'],
-                        row['high'],
-                        row['low'],
-                        row['close'],
-                        row['volume'],
-                        row.get('amount', 0),
-                        row.get('adj_factor', 1.0)
-                    )
-                    for _, row in df.iterrows()
-                ]
-                
+            # 按列转换，避免逐行iterrows
+            data = self._daily_rows(df, symbol)
+            
+            with self._get_connection() as conn:
                 # 批量执行
-                cursor.executemany(insert_sql, data)
-                conn.commit()
+                conn.executemany(self.DAILY_INSERT_SQL, data)
+                self._log_daily_write(conn, [row[1] for row in data])
                 
                 logger.info(f"成功保存{symbol}日线数据，共{len(data)}条")
+            self._invalidate_symbols([symbol])
             
         except Exception as e:
             logger.error(f"保存{symbol}日线数据失败: {str(e)}")
             raise
+
+    def save_daily_data_bulk(self,
+                             data: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+                             use_staging: Optional[bool] = None) -> int:
+        """批量保存多只股票的日线数据（单事务）
+
+        data: 含symbol列的长表，或 {symbol: DataFrame}
+        use_staging: 是否经临时表 INSERT ... SELECT 写入，默认按行数自动选择
+        """
+        data = self._prepare_daily_bulk(data)
+        if data is None:
+            return 0
+        
+        rows = self._daily_rows(data)
+        
+        if use_staging is None:
+            use_staging = len(rows) >= self.STAGING_THRESHOLD
+        
+        with self._get_connection() as conn:
+            if use_staging:
+                self._upsert_via_staging(
+                    conn, 'daily_price', self.DAILY_COLUMNS, rows,
+                    order_by='symbol, trade_date'
+                )
+            else:
+                conn.executemany(self.DAILY_INSERT_SQL, rows)
+            self._log_daily_write(conn, [row[1] for row in rows])
+        self._invalidate_symbols(data['symbol'].unique())
+        
+        logger.info(f"批量保存日线数据成功，共{len(rows)}条，"
+                    f"{data['symbol'].nunique()}只股票")
+        return len(rows)
+
+    def _prepare_daily_bulk(self, data: Union[pd.DataFrame, Dict[str, pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """批量日线数据统一为含symbol列的长表，并完成质量检查与清洗"""
+        if isinstance(data, dict):
+            frames = [
+                self._trade_date_as_column(df).assign(symbol=symbol)
+                for symbol, df in data.items()
+                if df is not None and not df.empty
+            ]
+            if not frames:
+                return None
+            data = pd.concat(frames, ignore_index=True)
+        
+        if data is None or data.empty:
+            return None
+        data = self._trade_date_as_column(data)
+        if 'symbol' not in data.columns:
+            raise ValueError("批量日线数据缺少symbol列")
+        
+        if not self._check_data_quality(data, 'daily'):
+            logger.error("批量日线数据质量检查未通过")
+            return None
+        
+        return self._clean_daily_data(data, 'bulk')
+
+    @staticmethod
+    def _trade_date_as_column(df: pd.DataFrame) -> pd.DataFrame:
+        """trade_date在索引中时还原为列"""
+        if 'trade_date' not in df.columns and df.index.name == 'trade_date':
+            return df.reset_index()
+        return df
+
+    def _daily_rows(self, df: pd.DataFrame, symbol: str = None) -> List[tuple]:
+        """将日线DataFrame按列转换为executemany参数"""
+        n = len(df)
+        if symbol is not None:
+            symbols = [symbol] * n
+        else:
+            symbols = df['symbol'].astype(str).tolist()
+        
+        columns = [
+            df[col].to_numpy(dtype=float).tolist()
+            for col in ['open', 'high', 'low', 'close', 'volume']
+        ]
+        amount = df['amount'].to_numpy(dtype=float) if 'amount' in df.columns else np.zeros(n)
+        adj_factor = df['adj_factor'].to_numpy(dtype=float) if 'adj_factor' in df.columns else np.ones(n)
+        
+        return list(zip(
+            symbols,
+            _format_trade_dates(df['trade_date']).tolist(),
+            *columns,
+            amount.tolist(),
+            adj_factor.tolist()
+        ))
+
+    @staticmethod
+    def _log_daily_write(conn: sqlite3.Connection, trade_dates: List[str]):
+        """记录一次日线写入覆盖的日期范围（YYYYMMDD，与写入同一事务）"""
+        if len(trade_dates):
+            conn.execute(
+                "INSERT INTO daily_write_log (start_date, end_date, rows, written_at) VALUES (?, ?, ?, ?)",
+                (str(min(trade_dates)), str(max(trade_dates)), len(trade_dates), time.time())
+            )
+
+    def daily_data_version(self) -> int:
+        """日线数据版本号：每次写入日线递增"""
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT MAX(seq) FROM daily_write_log").fetchone()
+        return row[0] or 0
+
+    def daily_changes_since(self, version: int) -> Optional[str]:
+        """版本号version之后写入的最早交易日（YYYYMMDD），没有新写入返回None"""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT MIN(start_date) FROM daily_write_log WHERE seq > ?", (version,)
+            ).fetchone()
+        return row[0]
+
+    def _upsert_via_staging(self, conn: sqlite3.Connection, table: str,
+                            columns: List[str], rows: List[tuple], order_by: str):
+        """先写入无索引的临时表，再按主键顺序一次性 INSERT ... SELECT"""
+        staging = f"{table}_staging"
+        cols = ', '.join(columns)
+        placeholders = ', '.join(['?'] * len(columns))
+        
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS SELECT {cols} FROM {table} WHERE 0")
+        conn.execute(f"DELETE FROM {staging}")
+        conn.executemany(f"INSERT INTO {staging} ({cols}) VALUES ({placeholders})", rows)
+        conn.execute(f"""
+            INSERT OR REPLACE INTO {table} ({cols})
+            SELECT {cols} FROM {staging} ORDER BY {order_by}
+        """)
+        conn.execute(f"DELETE FROM {staging}")
         
     def _save_minute_data(self, symbol: str, df: pd.DataFrame, freq: str):
         """保存分钟数据"""
@@ -232,7 +650,7 @@ class MarketDataStorage:
             df['freq'] = freq
             df['symbol'] = symbol
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 # 先删除可能存在的重复数据
                 conn.execute(
                     "DELETE FROM minute_price WHERE symbol = ? AND freq = ? AND time >= ? AND time <= ?",
@@ -242,6 +660,7 @@ class MarketDataStorage:
                 # 保存新数据
                 df.to_sql('minute_price', conn, if_exists='append', index=False)
                 logger.info(f"保存{symbol}分钟数据成功，共{len(df)}条")
+            self._invalidate_symbols([symbol])
             
         except Exception as e:
             logger.error(f"保存{symbol}分钟数据失败: {str(e)}")
@@ -249,17 +668,18 @@ class MarketDataStorage:
         
     def _save_realtime_data(self, symbol: str, df: pd.DataFrame):
         """保存实时数据到内存表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             # 先清除该股票的旧数据
             conn.execute(
                 "DELETE FROM realtime_price WHERE symbol = ?", 
                 (symbol,)
             )
             df.to_sql('realtime_price', conn, if_exists='append', index=False)
+        self._invalidate_symbols([symbol])
 
     def cleanup_old_data(self):
         """清理过期数据"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             # 清理分钟数据
             conn.execute("""
                 DELETE FROM minute_price 
@@ -278,10 +698,19 @@ class MarketDataStorage:
                 DELETE FROM realtime_price 
                 WHERE time < datetime('now', '-1 day')
             """)
+        self._cache.clear()
             
     def get_latest_price(self, symbol: str) -> dict:
         """获取最新价格"""
-        with sqlite3.connect(self.db_path) as conn:
+        return self._cache.get_or_load(
+            ('latest', symbol),
+            lambda: self._load_latest_price(symbol),
+            tags=[f'symbol:{symbol}'],
+            ttl=self.realtime_ttl
+        )
+
+    def _load_latest_price(self, symbol: str) -> dict:
+        with self._get_connection() as conn:
             # 先查实时数据
             df = pd.read_sql(
                 "SELECT * FROM realtime_price WHERE symbol = ? ORDER BY time DESC LIMIT 1",
@@ -292,23 +721,26 @@ class MarketDataStorage:
             if not df.empty:
                 return df.iloc[0].to_dict()
             
-            # 如果没有实时数据，查询最新日线数据
-            df = pd.read_sql(
-                "SELECT * FROM daily_price WHERE symbol = ? ORDER BY trade_date DESC LIMIT 1",
-                conn,
-                params=(symbol,)
-            )
-            
-            if not df.empty:
-                return df.iloc[0].to_dict()
-            
-            return None
+        # 如果没有实时数据，查询最新日线数据
+        df = self.get_kline_data(symbol, freq='1d', limit=1)
+        if not df.empty:
+            return df.iloc[0].to_dict()
+        
+        return None
 
     def get_kline_data(self, symbol: str, freq: str = '1min', limit: int = 100) -> pd.DataFrame:
         """获取K线数据
         freq: 1min, 5min, 15min, 30min, 60min, 1d
         """
-        with sqlite3.connect(self.db_path) as conn:
+        return self._cache.get_or_load(
+            ('kline', symbol, freq, limit),
+            lambda: self._load_kline_data(symbol, freq, limit),
+            tags=[f'symbol:{symbol}'],
+            ttl=self.realtime_ttl
+        )
+
+    def _load_kline_data(self, symbol: str, freq: str, limit: int) -> pd.DataFrame:
+        with self._get_connection() as conn:
             if freq == '1d':
                 sql = """
                     SELECT * FROM daily_price 
@@ -316,6 +748,7 @@ class MarketDataStorage:
                     ORDER BY trade_date DESC 
                     LIMIT ?
                 """
+                params = (symbol, limit)
             else:
                 sql = """
                     SELECT * FROM minute_price 
@@ -328,11 +761,144 @@ class MarketDataStorage:
             df = pd.read_sql(sql, conn, params=params)
             return df 
 
+    def get_daily_panel(self,
+                        symbols: Optional[List[str]],
+                        start_date: str,
+                        end_date: str,
+                        fields: List[str] = None,
+                        layout: str = 'long') -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        """获取多只股票的日线面板数据（单次范围查询）
+
+        symbols: 股票列表，None表示全部股票
+        layout: long 返回以(trade_date, symbol)为索引的长表；
+                wide 返回 {字段: 日期×股票矩阵}
+        """
+        fields = fields or ['open', 'high', 'low', 'close', 'volume']
+        invalid = [f for f in fields if f not in self.PANEL_FIELDS]
+        if invalid:
+            raise ValueError(f"不支持的字段: {invalid}")
+        if layout not in ('long', 'wide'):
+            raise ValueError(f"不支持的layout: {layout}")
+        
+        start = _format_trade_dates([start_date])[0]
+        end = _format_trade_dates([end_date])[0]
+        df = self._query_daily_panel(symbols, start, end, fields)
+        
+        df['trade_date'] = pd.to_datetime(df['trade_date'], format='%Y%m%d')
+        df = df.set_index(['trade_date', 'symbol']).sort_index()
+        
+        if layout == 'long':
+            return df
+        
+        wide = {}
+        for field in fields:
+            matrix = df[field].unstack('symbol')
+            if symbols is not None:
+                matrix = matrix.reindex(columns=list(dict.fromkeys(symbols)))
+            wide[field] = matrix
+        return wide
+
+    def get_minute_panel(self,
+                         symbols: Optional[List[str]],
+                         start_time,
+                         end_time,
+                         freq: str = '1min',
+                         fields: List[str] = None) -> pd.DataFrame:
+        """获取多只股票的分钟线长表（单次范围查询），按(time, symbol)排序
+
+        end_time只给日期时包含当天全部分钟线
+        """
+        fields = fields or self.MINUTE_FIELDS
+        invalid = [f for f in fields if f not in self.MINUTE_FIELDS]
+        if invalid:
+            raise ValueError(f"不支持的字段: {invalid}")
+        
+        start = pd.Timestamp(start_time)
+        end = pd.Timestamp(end_time)
+        if end == end.normalize():
+            end += pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        df = self._query_minute_panel(symbols, start, end, freq, fields)
+        
+        df['time'] = pd.to_datetime(df['time'])
+        return df.sort_values(['time', 'symbol'], ignore_index=True)
+
+    def _query_minute_panel(self, symbols: Optional[List[str]], start: pd.Timestamp,
+                            end: pd.Timestamp, freq: str, fields: List[str]) -> pd.DataFrame:
+        """单次范围查询分钟线，返回含time/symbol列的长表"""
+        columns = ', '.join(f"m.{f}" for f in fields)
+        params = [freq, str(start), str(end)]
+        
+        with self._get_connection() as conn:
+            sql = f"""
+                SELECT m.time, m.symbol, {columns}
+                FROM minute_price m
+            """
+            if symbols is not None and len(symbols) > self.MAX_INLINE_SYMBOLS:
+                # 股票数量过多时写入临时表，避免超出SQL参数上限
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS panel_symbols (symbol TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM panel_symbols")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO panel_symbols VALUES (?)",
+                    [(s,) for s in symbols]
+                )
+                sql += " JOIN panel_symbols p ON m.symbol = p.symbol"
+            sql += " WHERE m.freq = ? AND m.time BETWEEN ? AND ?"
+            if symbols is not None and len(symbols) <= self.MAX_INLINE_SYMBOLS:
+                sql += f" AND m.symbol IN ({', '.join(['?'] * len(symbols))})"
+                params.extend(symbols)
+            df = pd.read_sql(sql, conn, params=params)
+        return df
+
+    def _query_daily_panel(self, symbols: Optional[List[str]], start: str, end: str,
+                           fields: List[str]) -> pd.DataFrame:
+        """单次范围查询日线面板，返回含trade_date/symbol列的长表"""
+        columns = ', '.join(f"d.{f}" for f in fields)
+        params = [start, end]
+        
+        with self._get_connection() as conn:
+            if symbols is None:
+                sql = f"""
+                    SELECT d.trade_date, d.symbol, {columns}
+                    FROM daily_price d
+                    WHERE d.trade_date BETWEEN ? AND ?
+                """
+            elif len(symbols) <= self.MAX_INLINE_SYMBOLS:
+                placeholders = ', '.join(['?'] * len(symbols))
+                sql = f"""
+                    SELECT d.trade_date, d.symbol, {columns}
+                    FROM daily_price d
+                    WHERE d.trade_date BETWEEN ? AND ?
+                    AND d.symbol IN ({placeholders})
+                """
+                params.extend(symbols)
+            else:
+                # 股票数量过多时写入临时表，避免超出SQL参数上限
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS panel_symbols (symbol TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM panel_symbols")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO panel_symbols VALUES (?)",
+                    [(s,) for s in symbols]
+                )
+                sql = f"""
+                    SELECT d.trade_date, d.symbol, {columns}
+                    FROM daily_price d
+                    JOIN panel_symbols p ON d.symbol = p.symbol
+                    WHERE d.trade_date BETWEEN ? AND ?
+                """
+            df = pd.read_sql(sql, conn, params=params)
+        return df
+
+    def _invalidate_symbols(self, symbols):
+        """写入后使相关股票的缓存失效"""
+        self._cache.invalidate(f'symbol:{symbol}' for symbol in symbols)
+
+    def cache_stats(self) -> Dict:
+        """读缓存命中统计"""
+        return self._cache.stats()
+
     def _get_connection(self) -> sqlite3.Connection:
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        """获取数据库连接（复用当前线程的长连接）"""
+        return self._pool.get_connection()
 
     def _check_data_quality(self, df: pd.DataFrame, data_type: str) -> bool:
         """检查数据质量
@@ -375,7 +941,7 @@ class MarketDataStorage:
             f"market_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         )
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._get_connection() as conn:
             # 确保所有数据写入磁盘
             conn.execute("PRAGMA wal_checkpoint(FULL)")
         
@@ -387,16 +953,24 @@ class MarketDataStorage:
         try:
             df = data_source.get_stock_info()
             if df is not None and not df.empty:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._get_connection() as conn:
                     df['last_update'] = datetime.now()
                     df.to_sql('stock_info', conn, if_exists='replace', index=False)
-                    logger.info(f"更新股票信息成功，共 {len(df)} 只股票")
+                self._cache.invalidate(['stock_info'])
+                logger.info(f"更新股票信息成功，共 {len(df)} 只股票")
         except Exception as e:
             logger.error(f"更新股票信息失败: {str(e)}")
 
     def get_active_stocks(self, industry: str = None) -> List[str]:
         """获取活跃股票列表"""
-        with sqlite3.connect(self.db_path) as conn:
+        return self._cache.get_or_load(
+            ('active_stocks', industry),
+            lambda: self._load_active_stocks(industry),
+            tags=['stock_info']
+        )
+
+    def _load_active_stocks(self, industry: str) -> List[str]:
+        with self._get_connection() as conn:
             sql = "SELECT symbol FROM stock_info WHERE is_active = 1"
             if industry:
                 sql += f" AND industry = ?"
@@ -411,14 +985,15 @@ class MarketDataStorage:
         """更新交易日历"""
         df = data_source.get_trade_calendar(start_date, end_date)
         if df is not None and not df.empty:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 df.to_sql('trade_calendar', conn, if_exists='replace', index=True)
+            self._cache.invalidate(['trade_calendar'])
 
     def update_industry_info(self, data_source: BaseDataSource):
         """更新行业分类信息"""
         df = data_source.get_industry_info()
         if df is not None and not df.empty:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 # 清空旧数据
                 conn.execute("DELETE FROM industry_info")
                 # 验证必要字段存在
@@ -433,36 +1008,25 @@ class MarketDataStorage:
                     if_exists='append', 
                     index=False
                 )
+            self._cache.invalidate(['industry_info'])
 
     def update_financial_data(self, data_source, symbol: str, start_date: str, end_date: str):
         """更新财务数据"""
         df = data_source.get_financial_data(symbol, start_date, end_date)
         if df is not None and not df.empty:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                insert_sql = """
-                    INSERT OR REPLACE INTO financial_data 
-                    (symbol, report_date, announce_date, total_assets, total_liab, 
-                     total_revenue, net_income, roe, asset_turnover, current_ratio)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            with self._get_connection() as conn:
+                cols = ', '.join(self.FINANCIAL_COLUMNS)
+                placeholders = ', '.join(['?'] * len(self.FINANCIAL_COLUMNS))
+                insert_sql = f"""
+                    INSERT OR REPLACE INTO financial_data ({cols})
+                    VALUES ({placeholders})
                 """
-                data = [
-                    (
-                        row['symbol'],
-                        row['report_date'],
-                        row['announce_date'],
-                        row['total_assets'],
-                        row['total_liab'],
-                        row['total_revenue'],
-                        row['net_income'],
-                        row['roe'],
-                        row['asset_turnover'],
-                        row['current_ratio']
-                    )
-                    for _, row in df.iterrows()
-                ]
-                cursor.executemany(insert_sql, data)
-                conn.commit()
+                # 按列转换，避免逐行iterrows
+                data = list(zip(*(
+                    df[col].to_numpy(dtype=object).tolist()
+                    for col in self.FINANCIAL_COLUMNS
+                )))
+                conn.executemany(insert_sql, data)
 
     def get_financial_indicators(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """获取财务指标"""
@@ -485,6 +1049,13 @@ class MarketDataStorage:
 
     def get_industry_stocks(self, industry_name: str) -> List[str]:
         """获取行业成分股"""
+        return self._cache.get_or_load(
+            ('industry_stocks', industry_name),
+            lambda: self._load_industry_stocks(industry_name),
+            tags=['industry_info']
+        )
+
+    def _load_industry_stocks(self, industry_name: str) -> List[str]:
         with self._get_connection() as conn:
             sql = """
                 SELECT symbol FROM industry_info 
@@ -495,6 +1066,13 @@ class MarketDataStorage:
 
     def get_trading_dates(self, start_date: str, end_date: str) -> List[str]:
         """获取交易日期列表"""
+        return self._cache.get_or_load(
+            ('trading_dates', start_date, end_date),
+            lambda: self._load_trading_dates(start_date, end_date),
+            tags=['trade_calendar']
+        )
+
+    def _load_trading_dates(self, start_date: str, end_date: str) -> List[str]:
         with self._get_connection() as conn:
             sql = """
                 SELECT date FROM trade_calendar 
@@ -560,11 +1138,11 @@ class MarketDataStorage:
         
         try:
             # 关闭所有连接
-            with self._get_connection() as conn:
-                conn.close()
+            self._pool.close_all()
             
             # 恢复数据
             shutil.copy2(backup_file, self.db_path)
+            self._cache.clear()
             logger.info(f"数据已从 {backup_file} 恢复")
             
         except Exception as e:
@@ -576,7 +1154,6 @@ class MarketDataStorage:
     def close_all_connections(self):
         """关闭所有数据库连接"""
         try:
-            conn = None
             try:
                 conn = self._get_connection()
                 # 强制提交所有更改
@@ -586,11 +1163,7 @@ class MarketDataStorage:
                 # 切换到普通模式
                 conn.execute("PRAGMA journal_mode=DELETE")
             finally:
-                if conn:
-                    try:
-                        conn.close()
-                    except:
-                        pass
+                self._pool.close_all()
                     
             # 等待文件释放
             time.sleep(1)  # 增加等待时间
@@ -601,16 +1174,29 @@ class MarketDataStorage:
         """获取各股票最后更新日期"""
         with self._get_connection() as conn:
             df = pd.read_sql(
-                "SELECT ts_code as symbol, MAX(trade_date) as last_date FROM daily_price GROUP BY ts_code",
+                "SELECT symbol, MAX(trade_date) as last_date FROM daily_price GROUP BY symbol",
                 conn
             )
-        return df.set_index('symbol')['last_date'].dt.date.to_dict()
+        return self._last_dates_to_dict(df)
+
+    @staticmethod
+    def _last_dates_to_dict(df: pd.DataFrame) -> Dict[str, datetime]:
+        last_dates = pd.to_datetime(df['last_date'], format='%Y%m%d')
+        return dict(zip(df['symbol'], last_dates.dt.date))
 
     def _get_all_symbols(self, data_source: BaseDataSource) -> List[str]:
-        # Implementation of _get_all_symbols method
-        # This method should return a list of all symbols available in the data source
-        # This is a placeholder and should be implemented based on the actual data source
-        return []
+        """获取全量股票代码（优先使用数据源，失败时回退到本地stock_info）"""
+        try:
+            df = data_source.get_stock_info()
+            if df is not None and not df.empty:
+                column = 'ts_code' if 'ts_code' in df.columns else 'symbol'
+                return df[column].dropna().astype(str).unique().tolist()
+        except Exception as e:
+            logger.warning(f"从数据源获取股票列表失败: {str(e)}")
+        
+        with self._get_connection() as conn:
+            df = pd.read_sql("SELECT ts_code FROM stock_info WHERE is_active = 1", conn)
+        return df['ts_code'].tolist()
 
     def _validate_data(self, df: pd.DataFrame) -> bool:
         """增强型数据校验"""
@@ -639,7 +1225,8 @@ class MarketDataStorage:
         df['trade_date'] = pd.to_datetime(df['trade_date'])
         
         # 去除重复数据（保留最新）
-        df = df.drop_duplicates(subset=['trade_date'], keep='last')
+        subset = ['symbol', 'trade_date'] if 'symbol' in df.columns else ['trade_date']
+        df = df.drop_duplicates(subset=subset, keep='last')
         
         # 验证价格有效性
         df = df[
@@ -0,0 +1,157 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+from data.storage.market_data import MarketDataStorage
+
+logger = logging.getLogger(__name__)
+
+FREQ_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60}
+
+# A股连续竞价时段（分钟数，自零点起）：上午 9:30-11:30，下午 13:00-15:00
+MORNING_OPEN = 9 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+SESSION_MINUTES = 120
+
+class MinuteBars:
+    """分钟线稠密数组（时间 × 股票），按交易日分组
+
+    times:      datetime64[ns] 时间轴（bar结束时间，如 09:31 ... 11:30, 13:01 ... 15:00）
+    symbols:    股票轴
+    fields:     {字段: 时间×股票矩阵}，缺失为NaN
+    day_bounds: 每个交易日在时间轴上的起止行号，第d天为 [day_bounds[d], day_bounds[d+1])
+    """
+    FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+    def __init__(self, times: np.ndarray, symbols: np.ndarray, fields: Dict[str, np.ndarray], freq: str):
+        self.times = np.asarray(times, dtype='datetime64[ns]')
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.fields = fields
+        self.freq = freq
+        self.time_index = pd.DatetimeIndex(self.times)
+
+        days = self.times.astype('datetime64[D]')
+        self.days = np.unique(days)
+        self.day_bounds = np.searchsorted(days, np.append(self.days, self.days[-1] + 1) if len(days) else [0])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, freq: str = '1min', dtype: str = 'float64') -> 'MinuteBars':
+        """由 time/symbol/字段 长表构建"""
+        time_codes, times = pd.factorize(pd.DatetimeIndex(df['time']), sort=True)
+        symbol_codes, symbols = pd.factorize(df['symbol'])
+        fields = {}
+        for name in cls.FIELDS:
+            if name not in df.columns:
+                continue
+            matrix = np.full((len(times), len(symbols)), np.nan, dtype=dtype)
+            matrix[time_codes, symbol_codes] = df[name].to_numpy(dtype=dtype)
+            fields[name] = matrix
+        return cls(times.values, symbols.to_numpy(), fields, freq)
+
+    @classmethod
+    def from_storage(cls,
+                     storage: MarketDataStorage,
+                     symbols: Optional[List[str]],
+                     start_time,
+                     end_time,
+                     freq: str = '1min',
+                     dtype: str = 'float64') -> 'MinuteBars':
+        """从minute_price读取；存储中没有目标频率时读取1分钟线再重采样"""
+        if freq not in FREQ_MINUTES:
+            raise ValueError(f"不支持的频率: {freq}")
+        df = storage.get_minute_panel(symbols, start_time, end_time, freq)
+        if df.empty and freq != '1min':
+            logger.info(f"存储中没有{freq}数据，由1min重采样")
+            df = storage.get_minute_panel(symbols, start_time, end_time, '1min')
+            return cls.from_frame(df, '1min', dtype).resample(freq)
+        return cls.from_frame(df, freq, dtype)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def field(self, name: str) -> np.ndarray:
+        return self.fields[name]
+
+    def sessions(self) -> Iterator[Tuple[np.datetime64, slice]]:
+        """按交易日遍历 (日期, 时间轴切片)"""
+        for d, day in enumerate(self.days):
+            yield day, slice(int(self.day_bounds[d]), int(self.day_bounds[d + 1]))
+
+    def resample(self, freq: str) -> 'MinuteBars':
+        """按交易时段重采样到更低频率，不跨午休和交易日"""
+        minutes = FREQ_MINUTES[freq]
+        if minutes < FREQ_MINUTES[self.freq] or minutes % FREQ_MINUTES[self.freq]:
+            raise ValueError(f"不能从{self.freq}重采样到{freq}")
+        if not len(self.times):
+            return MinuteBars(self.times, self.symbols, dict(self.fields), freq)
+
+        labels = _bar_labels(self.time_index, minutes)
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        ends = np.r_[starts[1:], len(labels)]
+
+        fields = {}
+        rows = np.arange(len(labels))[:, None]
+        valid = ~np.isnan(self.fields['close'])
+        if 'open' in self.fields:
+            first = np.minimum.reduceat(np.where(valid, rows, len(labels)), starts, axis=0)
+            fields['open'] = _take_rows(self.fields['open'], first, first < ends[:, None])
+        if 'high' in self.fields:
+            fields['high'] = np.fmax.reduceat(self.fields['high'], starts, axis=0)
+        if 'low' in self.fields:
+            fields['low'] = np.fmin.reduceat(self.fields['low'], starts, axis=0)
+        last = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        fields['close'] = _take_rows(self.fields['close'], last, last >= starts[:, None])
+        for name in ['volume', 'amount']:
+            if name in self.fields:
+                fields[name] = np.add.reduceat(np.nan_to_num(self.fields[name]), starts, axis=0)
+        # 整段都没有成交的bar保持缺失
+        for name in fields:
+            fields[name][np.isnan(fields['close'])] = np.nan
+        return MinuteBars(labels[starts], self.symbols, fields, freq)
+
+    def to_frame(self, t: int) -> pd.DataFrame:
+        """第t根bar的长表（只含有行情的股票）"""
+        valid = ~np.isnan(self.fields['close'][t])
+        data = {name: matrix[t, valid] for name, matrix in self.fields.items()}
+        df = pd.DataFrame(data, index=pd.DatetimeIndex([self.times[t]] * int(valid.sum()), name='time'))
+        df.insert(0, 'symbol', self.symbols[valid])
+        return df
+
+class BarView:
+    """当前bar的只读视图：直接按行取稠密数组，不构造DataFrame"""
+    __slots__ = ('bars', 't')
+
+    def __init__(self, bars: MinuteBars):
+        self.bars = bars
+        self.t = 0
+
+    @property
+    def time(self) -> pd.Timestamp:
+        return self.bars.time_index[self.t]
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self.bars.symbols
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.bars.fields[field][self.t]
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.bars.to_frame(self.t)
+
+def _bar_labels(times: pd.DatetimeIndex, minutes: int) -> np.ndarray:
+    """每根分钟线所属的重采样bar结束时间（上午、下午分别从开盘起对齐）"""
+    minute_of_day = times.hour.to_numpy() * 60 + times.minute.to_numpy()
+    afternoon = minute_of_day >= 12 * 60
+    session_open = np.where(afternoon, AFTERNOON_OPEN, MORNING_OPEN)
+    # 9:30集合竞价bar并入第一根，收盘后的bar并入最后一根
+    elapsed = np.clip(minute_of_day - session_open, 1, SESSION_MINUTES)
+    bucket_end = session_open + np.ceil(elapsed / minutes).astype(int) * minutes
+    days = times.normalize().values
+    return days + bucket_end.astype('timedelta64[m]')
+
+def _take_rows(matrix: np.ndarray, rows: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """按每列的行号取值，无效位置为NaN"""
+    safe = np.where(valid, rows, 0)
+    taken = np.take_along_axis(matrix, safe, axis=0)
+    return np.where(valid, taken, np.nan)
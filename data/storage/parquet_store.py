@@ -0,0 +1,251 @@
+import os
+import zlib
+import logging
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from typing import Dict, Iterator, List, Optional, Union
+from data.storage.market_data import MarketDataStorage, _format_trade_dates
+
+logger = logging.getLogger(__name__)
+
+class ParquetMarketDataStorage(MarketDataStorage):
+    """列式分区存储后端
+
+    daily_price / minute_price 按 年/月/股票分桶 分区写入Parquet或Arrow IPC文件，
+    读取时按日期范围和股票分桶裁剪分区，并只解码需要的列。
+    股票信息、交易日历等元数据表仍保存在SQLite中。
+    """
+    FILE_FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+
+    def __init__(self,
+                 db_path: str = 'data/market.db',
+                 root_dir: str = 'data/columnar',
+                 file_format: str = 'parquet',
+                 n_buckets: int = 16,
+                 pool_options: Dict = None,
+                 cache_size: int = 4096,
+                 realtime_ttl: float = 3.0):
+        if file_format not in self.FILE_FORMATS:
+            raise ValueError(f"不支持的文件格式: {file_format}")
+        self.root_dir = root_dir
+        self.file_format = file_format
+        self.n_buckets = n_buckets
+        self._write_lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+        super().__init__(db_path, pool_options, cache_size, realtime_ttl)
+
+    def _save_daily_data(self, symbol: str, df: pd.DataFrame):
+        """保存日线数据"""
+        try:
+            df = self._trade_date_as_column(df)
+            count = self.save_daily_data_bulk(df.assign(symbol=symbol))
+            logger.info(f"成功保存{symbol}日线数据，共{count}条")
+        except Exception as e:
+            logger.error(f"保存{symbol}日线数据失败: {str(e)}")
+            raise
+
+    def save_daily_data_bulk(self,
+                             data: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+                             use_staging: Optional[bool] = None) -> int:
+        """批量保存多只股票的日线数据（按分区合并写入）"""
+        data = self._prepare_daily_bulk(data)
+        if data is None:
+            return 0
+
+        df = pd.DataFrame({
+            'symbol': data['symbol'].astype(str).to_numpy(),
+            'trade_date': _format_trade_dates(data['trade_date'])
+        })
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = data[col].to_numpy(dtype=float)
+        df['amount'] = data['amount'].to_numpy(dtype=float) if 'amount' in data.columns else 0.0
+        df['adj_factor'] = data['adj_factor'].to_numpy(dtype=float) if 'adj_factor' in data.columns else 1.0
+
+        dates = pd.to_datetime(df['trade_date'], format='%Y%m%d')
+        count = self._upsert_partitions('daily_price', df, dates, keys=['symbol', 'trade_date'])
+        with self._get_connection() as conn:
+            self._log_daily_write(conn, df['trade_date'].tolist())
+        self._invalidate_symbols(df['symbol'].unique())
+        logger.info(f"批量保存日线数据成功，共{count}条，{df['symbol'].nunique()}只股票")
+        return count
+
+    def _save_minute_data(self, symbol: str, df: pd.DataFrame, freq: str):
+        """保存分钟数据"""
+        try:
+            required_columns = ['time', 'open', 'high', 'low', 'close', 'volume', 'amount']
+            if not all(col in df.columns for col in required_columns):
+                missing = [col for col in required_columns if col not in df.columns]
+                raise ValueError(f"缺少必要的列: {missing}")
+
+            df = df[required_columns].copy()
+            df['time'] = pd.to_datetime(df['time'])
+            df.insert(0, 'symbol', symbol)
+
+            self._upsert_partitions('minute_price', df, df['time'], keys=['symbol', 'time'], freq=freq)
+            self._invalidate_symbols([symbol])
+            logger.info(f"保存{symbol}分钟数据成功，共{len(df)}条")
+        except Exception as e:
+            logger.error(f"保存{symbol}分钟数据失败: {str(e)}")
+            raise
+
+    def _load_kline_data(self, symbol: str, freq: str, limit: int) -> pd.DataFrame:
+        """按时间倒序读取K线数据"""
+        if freq == '1d':
+            table, time_col, part_freq = 'daily_price', 'trade_date', None
+        else:
+            table, time_col, part_freq = 'minute_price', 'time', freq
+
+        # 从最新分区向前扫描，直到取满limit条
+        frames, count = [], 0
+        for path in self._symbol_files_desc(table, symbol, part_freq):
+            df = self._scan([path], filter=ds.field('symbol') == symbol)
+            if df.empty:
+                continue
+            frames.append(df)
+            count += len(df)
+            if count >= limit:
+                break
+
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        if part_freq:
+            df.insert(2, 'freq', part_freq)
+        return df.sort_values(time_col, ascending=False).head(limit).reset_index(drop=True)
+
+    def _get_symbol_last_dates(self) -> Dict:
+        """获取各股票最后更新日期（只投影symbol/trade_date两列）"""
+        table_dir = self._table_dir('daily_price')
+        if not os.path.isdir(table_dir):
+            return {}
+        dataset = ds.dataset(table_dir, format=self.FILE_FORMATS[self.file_format], partitioning='hive')
+        df = dataset.to_table(columns=['symbol', 'trade_date']).to_pandas()
+        if df.empty:
+            return {}
+        df = df.groupby('symbol', as_index=False)['trade_date'].max().rename(columns={'trade_date': 'last_date'})
+        return self._last_dates_to_dict(df)
+
+    def _query_daily_panel(self, symbols: Optional[List[str]], start: str, end: str,
+                           fields: List[str]) -> pd.DataFrame:
+        """按分区裁剪后扫描日线面板"""
+        files = self._partition_files(
+            'daily_price',
+            pd.to_datetime(start, format='%Y%m%d'),
+            pd.to_datetime(end, format='%Y%m%d'),
+            symbols
+        )
+        columns = ['trade_date', 'symbol'] + fields
+        if not files:
+            return pd.DataFrame(columns=columns)
+
+        row_filter = (ds.field('trade_date') >= str(start)) & (ds.field('trade_date') <= str(end))
+        if symbols is not None:
+            row_filter &= ds.field('symbol').isin(list(symbols))
+        return self._scan(files, columns=columns, filter=row_filter)
+
+    def _query_minute_panel(self, symbols: Optional[List[str]], start: pd.Timestamp,
+                            end: pd.Timestamp, freq: str, fields: List[str]) -> pd.DataFrame:
+        """按分区裁剪后扫描分钟线"""
+        files = self._partition_files('minute_price', start, end, symbols, freq)
+        columns = ['time', 'symbol'] + fields
+        if not files:
+            return pd.DataFrame(columns=columns)
+
+        row_filter = (ds.field('time') >= pa.scalar(start.to_datetime64())) & \
+                     (ds.field('time') <= pa.scalar(end.to_datetime64()))
+        if symbols is not None:
+            row_filter &= ds.field('symbol').isin(list(symbols))
+        return self._scan(files, columns=columns, filter=row_filter)
+
+    def _bucket(self, symbol: str) -> int:
+        """股票分桶（稳定哈希）"""
+        return zlib.crc32(symbol.encode('utf-8')) % self.n_buckets
+
+    def _table_dir(self, table: str, freq: str = None) -> str:
+        if freq:
+            return os.path.join(self.root_dir, table, f"freq={freq}")
+        return os.path.join(self.root_dir, table)
+
+    def _partition_file(self, table: str, year: int, month: int, bucket: int, freq: str = None) -> str:
+        ext = 'parquet' if self.file_format == 'parquet' else 'arrow'
+        return os.path.join(
+            self._table_dir(table, freq),
+            f"year={year}", f"month={month:02d}", f"bucket={bucket:03d}",
+            f"part.{ext}"
+        )
+
+    def _partition_files(self, table: str, start: pd.Timestamp, end: pd.Timestamp,
+                         symbols: Optional[List[str]] = None, freq: str = None) -> List[str]:
+        """按日期范围和股票分桶裁剪分区"""
+        if symbols is None:
+            buckets = range(self.n_buckets)
+        else:
+            buckets = sorted({self._bucket(s) for s in symbols})
+
+        files = []
+        for period in pd.period_range(start, end, freq='M'):
+            for bucket in buckets:
+                path = self._partition_file(table, period.year, period.month, bucket, freq)
+                if os.path.exists(path):
+                    files.append(path)
+        return files
+
+    def _symbol_files_desc(self, table: str, symbol: str, freq: str = None) -> Iterator[str]:
+        """按时间倒序遍历某只股票所在分桶的分区文件"""
+        table_dir = self._table_dir(table, freq)
+        if not os.path.isdir(table_dir):
+            return
+        bucket = self._bucket(symbol)
+        for year_dir in sorted(os.listdir(table_dir), reverse=True):
+            year_path = os.path.join(table_dir, year_dir)
+            for month_dir in sorted(os.listdir(year_path), reverse=True):
+                year, month = int(year_dir.split('=')[1]), int(month_dir.split('=')[1])
+                path = self._partition_file(table, year, month, bucket, freq)
+                if os.path.exists(path):
+                    yield path
+
+    def _scan(self, files: List[str], columns: List[str] = None, filter=None) -> pd.DataFrame:
+        """列投影 + 谓词下推扫描"""
+        dataset = ds.dataset(files, format=self.FILE_FORMATS[self.file_format])
+        return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+    def _read_file(self, path: str) -> pd.DataFrame:
+        if self.file_format == 'parquet':
+            return pq.read_table(path).to_pandas()
+        return feather.read_table(path).to_pandas()
+
+    def _write_file(self, df: pd.DataFrame, path: str):
+        """先写临时文件再替换，避免读到半写入的分区"""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = path + '.tmp'
+        if self.file_format == 'parquet':
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            feather.write_feather(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def _upsert_partitions(self, table: str, df: pd.DataFrame, times: pd.Series,
+                           keys: List[str], freq: str = None) -> int:
+        """按分区合并写入，同一主键保留最新数据"""
+        bucket_map = {s: self._bucket(s) for s in df['symbol'].unique()}
+        groups = df.groupby([
+            times.dt.year.to_numpy(),
+            times.dt.month.to_numpy(),
+            df['symbol'].map(bucket_map).to_numpy()
+        ])
+
+        with self._write_lock:
+            for (year, month, bucket), part in groups:
+                path = self._partition_file(table, year, month, bucket, freq)
+                if os.path.exists(path):
+                    part = pd.concat([self._read_file(path), part], ignore_index=True)
+                    part = part.drop_duplicates(subset=keys, keep='last')
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                # 分区内按主键排序，便于行组统计信息裁剪
+                self._write_file(part.sort_values(keys), path)
+        return len(df)
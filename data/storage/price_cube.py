@@ -0,0 +1,277 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from data.storage.market_data import MarketDataStorage
+
+logger = logging.getLogger(__name__)
+
+class PriceCube:
+    """内存映射价格立方体（字段 × 日期 × 股票）
+
+    目录结构:
+        cube.dat     - 按 (字段, 日期容量, 股票容量) 存放的np.memmap
+        dates.npy    - 日期索引 (datetime64[D])
+        symbols.npy  - 股票索引
+        meta.json    - 字段、容量、已用长度、行情数据版本等元信息
+    日期和股票两个轴都预留容量，增量追加时只需写入新行，
+    容量不足时才整体扩容一次。
+    日线写入日志显示上次追加后有历史日期被补录/修正时，从最早被改写的日期起重写。
+    """
+    DEFAULT_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+    GROWTH = 1.5
+
+    def __init__(self, path: str, mode: str = 'r', storage: MarketDataStorage = None):
+        """挂载已有的价格立方体
+        mode: r 只读；r+ 可追加
+        storage: 传入时检查历史行情是否被改写，r+模式下重写受影响的日期，r模式下告警
+        """
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.fields: List[str] = self.meta['fields']
+        self._field_index = {f: i for i, f in enumerate(self.fields)}
+        self.dates = np.load(os.path.join(path, 'dates.npy'))
+        self.symbols = np.load(os.path.join(path, 'symbols.npy'))
+        self._symbol_index = {s: i for i, s in enumerate(self.symbols.tolist())}
+        self._cube = self._open_memmap(self.meta['date_capacity'], self.meta['symbol_capacity'])
+
+        if storage is not None and len(self.dates):
+            stale = self.stale_since(storage)
+            if stale is not None and mode == 'r+':
+                self.append(storage, str(self.dates[-1]))
+            elif stale is not None:
+                logger.warning(f"价格立方体 {path} 自 {stale:%Y%m%d} 起的行情已被改写，需要以r+模式追加更新")
+
+    @classmethod
+    def build(cls,
+              storage: MarketDataStorage,
+              path: str,
+              start_date: str,
+              end_date: str,
+              symbols: Optional[List[str]] = None,
+              fields: List[str] = None,
+              dtype: str = 'float64') -> 'PriceCube':
+        """从daily_price构建价格立方体
+        symbols: 股票池，None表示全市场（追加时自动纳入新股票）
+        """
+        os.makedirs(path, exist_ok=True)
+        fields = fields or cls.DEFAULT_FIELDS
+        date_capacity = len(pd.bdate_range(start_date, end_date)) + 250
+        symbol_capacity = len(symbols) if symbols else 0
+
+        meta = {
+            'fields': fields,
+            'dtype': dtype,
+            'universe': list(symbols) if symbols else None,
+            'start_date': pd.Timestamp(start_date).strftime('%Y%m%d'),
+            'n_dates': 0,
+            'n_symbols': 0,
+            'data_version': 0,
+            'date_capacity': date_capacity,
+            'symbol_capacity': symbol_capacity
+        }
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        np.save(os.path.join(path, 'dates.npy'), np.array([], dtype='datetime64[D]'))
+        np.save(os.path.join(path, 'symbols.npy'), np.array(list(symbols or []), dtype=str))
+        cube_file = os.path.join(path, 'cube.dat')
+        if os.path.exists(cube_file):
+            os.remove(cube_file)
+
+        cube = cls(path, mode='r+')
+        cube.append(storage, end_date)
+        return cube
+
+    def stale_since(self, storage: MarketDataStorage, version: int = None) -> Optional[pd.Timestamp]:
+        """上次追加后被改写的最早已有日期，没有则返回None"""
+        if not len(self.dates):
+            return None
+        if version is None:
+            version = storage.daily_data_version()
+        known = self.meta.get('data_version', 0)
+        if version == known:
+            return None
+        if version < known:
+            # 行情库被替换（如从备份恢复），无法判断改动范围
+            earliest = self.meta['start_date']
+        else:
+            earliest = storage.daily_changes_since(known)
+        if earliest is None or pd.Timestamp(earliest) > pd.Timestamp(self.dates[-1]):
+            return None
+        return pd.Timestamp(earliest)
+
+    def append(self, storage: MarketDataStorage, end_date: str, chunk_days: int = 366) -> int:
+        """追加最后一个日期之后的新交易日，返回写入的日期数
+
+        已有日期被改写时先回退到最早被改写的日期，再重写到原最后日期之后
+        """
+        if self.mode != 'r+':
+            raise ValueError("只读模式下不能追加数据")
+
+        # 先取版本号再读数据，读取期间的新写入留到下次处理
+        version = storage.daily_data_version()
+        end = pd.Timestamp(end_date)
+        stale = self.stale_since(storage, version)
+        if stale is not None:
+            end = max(end, pd.Timestamp(self.dates[-1]))
+            keep = int(np.searchsorted(self.dates, np.datetime64(stale.date()), side='left'))
+            logger.info(f"价格立方体 {stale:%Y%m%d} 起历史行情有改动，重写 {len(self.dates) - keep} 个交易日")
+            self.dates = self.dates[:keep]
+
+        if len(self.dates):
+            start = pd.Timestamp(self.dates[-1]) + pd.Timedelta(days=1)
+        else:
+            start = pd.Timestamp(self.meta['start_date'])
+
+        added = 0
+        # 按时间分段读取，控制单次查询的内存占用
+        while start <= end:
+            chunk_end = min(start + pd.Timedelta(days=chunk_days - 1), end)
+            panel = storage.get_daily_panel(
+                self.meta['universe'], start, chunk_end, self.fields, layout='wide'
+            )
+            added += self._write_panel(panel)
+            start = chunk_end + pd.Timedelta(days=1)
+
+        self.meta['data_version'] = version
+        self._save_index()
+        logger.info(f"价格立方体追加 {added} 个交易日，共 {len(self.dates)} 天 x {len(self.symbols)} 只股票")
+        return added
+
+    def _write_panel(self, panel: Dict[str, pd.DataFrame]) -> int:
+        """将宽表面板写入立方体末尾"""
+        first = panel[self.fields[0]]
+        if first.empty:
+            return 0
+
+        new_dates = first.index.values.astype('datetime64[D]')
+        if len(self.dates) and new_dates[0] <= self.dates[-1]:
+            raise ValueError(f"追加日期必须晚于 {self.dates[-1]}")
+
+        new_symbols = [s for s in first.columns if s not in self._symbol_index]
+        if new_symbols:
+            self.symbols = np.concatenate([self.symbols, np.array(new_symbols, dtype=str)])
+            self._symbol_index = {s: i for i, s in enumerate(self.symbols.tolist())}
+
+        n_dates = len(self.dates) + len(new_dates)
+        self._ensure_capacity(n_dates, len(self.symbols))
+
+        rows = slice(len(self.dates), n_dates)
+        columns = np.array([self._symbol_index[s] for s in first.columns])
+        for i, field in enumerate(self.fields):
+            block = np.full((len(new_dates), len(self.symbols)), np.nan, dtype=self._cube.dtype)
+            block[:, columns] = panel[field].to_numpy(dtype=self._cube.dtype)
+            self._cube[i, rows, :len(self.symbols)] = block
+
+        self.dates = np.concatenate([self.dates, new_dates])
+        return len(new_dates)
+
+    def _ensure_capacity(self, n_dates: int, n_symbols: int):
+        """容量不足时扩容（复制到新文件）"""
+        date_capacity = self.meta['date_capacity']
+        symbol_capacity = self.meta['symbol_capacity']
+        if self._cube is not None and n_dates <= date_capacity and n_symbols <= symbol_capacity:
+            return
+
+        if n_dates > date_capacity:
+            date_capacity = max(n_dates, int(date_capacity * self.GROWTH))
+        if n_symbols > symbol_capacity:
+            symbol_capacity = max(n_symbols, int(symbol_capacity * self.GROWTH))
+
+        cube_file = os.path.join(self.path, 'cube.dat')
+        tmp_file = cube_file + '.tmp'
+        grown = np.memmap(
+            tmp_file, dtype=self.meta['dtype'], mode='w+',
+            shape=(len(self.fields), date_capacity, symbol_capacity)
+        )
+        grown[:] = np.nan
+        if self._cube is not None:
+            _, old_dates, old_symbols = self._cube.shape
+            grown[:, :old_dates, :old_symbols] = self._cube
+            del self._cube
+        grown.flush()
+        del grown
+        os.replace(tmp_file, cube_file)
+
+        self.meta['date_capacity'] = date_capacity
+        self.meta['symbol_capacity'] = symbol_capacity
+        self._cube = self._open_memmap(date_capacity, symbol_capacity)
+
+    def _open_memmap(self, date_capacity: int, symbol_capacity: int) -> Optional[np.memmap]:
+        cube_file = os.path.join(self.path, 'cube.dat')
+        if not os.path.exists(cube_file):
+            return None
+        return np.memmap(
+            cube_file, dtype=self.meta['dtype'], mode=self.mode,
+            shape=(len(self.fields), date_capacity, symbol_capacity)
+        )
+
+    def _save_index(self):
+        """落盘日期/股票索引和元信息"""
+        if self._cube is not None:
+            self._cube.flush()
+        self.meta['n_dates'] = len(self.dates)
+        self.meta['n_symbols'] = len(self.symbols)
+        np.save(os.path.join(self.path, 'dates.npy'), self.dates)
+        np.save(os.path.join(self.path, 'symbols.npy'), self.symbols)
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+    def _date_range(self, start_date: str = None, end_date: str = None) -> slice:
+        """日期区间对应的行切片"""
+        lo = 0 if start_date is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(start_date).date()), side='left')
+        hi = len(self.dates) if end_date is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end_date).date()), side='right')
+        return slice(int(lo), int(hi))
+
+    def field(self, name: str, start_date: str = None, end_date: str = None) -> np.ndarray:
+        """单个字段的 日期×股票 矩阵（零拷贝视图）"""
+        if self._cube is None:
+            return np.empty((0, len(self.symbols)), dtype=self.meta['dtype'])
+        rows = self._date_range(start_date, end_date)
+        return self._cube[self._field_index[name], rows, :len(self.symbols)]
+
+    def window(self,
+               start_date: str = None,
+               end_date: str = None,
+               symbols: List[str] = None,
+               fields: List[str] = None) -> Dict[str, np.ndarray]:
+        """按日期区间和股票池取 {字段: 矩阵}
+
+        不指定股票池时返回零拷贝视图；指定股票池时按列取数会产生拷贝。
+        """
+        fields = fields or self.fields
+        result = {}
+        columns = None
+        if symbols is not None:
+            columns = np.array([self._symbol_index.get(s, -1) for s in symbols])
+        for name in fields:
+            matrix = self.field(name, start_date, end_date)
+            if columns is not None:
+                taken = np.full((matrix.shape[0], len(columns)), np.nan, dtype=matrix.dtype)
+                valid = columns >= 0
+                taken[:, valid] = matrix[:, columns[valid]]
+                matrix = taken
+            result[name] = matrix
+        return result
+
+    def to_bars(self, symbols: List[str] = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """转换为回测引擎使用的长表（日期索引 + symbol列）"""
+        rows = self._date_range(start_date, end_date)
+        names = self.symbols if symbols is None else np.asarray(symbols)
+        matrices = self.window(start_date, end_date, symbols)
+
+        # 以收盘价是否存在判断当日是否有行情
+        mask = ~np.isnan(matrices['close'])
+        date_idx, symbol_idx = np.nonzero(mask)
+        data = pd.DataFrame(
+            {name: matrix[mask] for name, matrix in matrices.items()},
+            index=pd.DatetimeIndex(self.dates[rows][date_idx], name='trade_date')
+        )
+        data.insert(0, 'symbol', names[symbol_idx])
+        return data
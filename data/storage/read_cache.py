@@ -0,0 +1,116 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable
+
+class ReadCache:
+    """有界LRU读缓存（线程安全）
+
+    每个缓存项带若干标签（如 symbol:000001.SZ、stock_info），
+    写入时按标签精确失效。加载期间若对应标签被失效，加载结果不入缓存，
+    避免并发写入后缓存旧数据。
+    其他进程的写入不会触发失效，这类数据（如实时行情）用ttl限定缓存时长。
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._items: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._tag_keys: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], tags: Iterable[str] = (),
+                    ttl: float = None) -> Any:
+        """命中则返回缓存副本，否则调用loader加载并缓存
+
+        ttl: 缓存秒数，None表示直到失效或被淘汰
+        """
+        if self.max_size <= 0:
+            return loader()
+
+        tags = tuple(tags)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[2] is not None and item[2] <= time.monotonic():
+                del self._items[key]
+                self._discard_tags(key, item[1])
+                item = None
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return _copy(item[0])
+            self.misses += 1
+            generations = self._snapshot(tags)
+
+        value = loader()
+
+        with self._lock:
+            if generations == self._snapshot(tags):
+                expires = time.monotonic() + ttl if ttl is not None else None
+                self._put(key, value, tags, expires)
+        return _copy(value)
+
+    def _snapshot(self, tags: tuple) -> tuple:
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _put(self, key: Hashable, value: Any, tags: tuple, expires: float = None):
+        self._items[key] = (value, tags, expires)
+        self._items.move_to_end(key)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._items) > self.max_size:
+            old_key, (_, old_tags, _) = self._items.popitem(last=False)
+            self._discard_tags(old_key, old_tags)
+            self.evictions += 1
+
+    def _discard_tags(self, key: Hashable, tags: tuple):
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def invalidate(self, tags: Iterable[str]):
+        """使带有任一标签的缓存项失效"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._tag_keys.pop(tag, ()):
+                    item = self._items.pop(key, None)
+                    if item is not None:
+                        self._discard_tags(key, tuple(t for t in item[1] if t != tag))
+                        self.invalidations += 1
+
+    def clear(self):
+        """清空缓存（如整库恢复后）"""
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._items)
+            self._items.clear()
+            self._tag_keys.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+def _copy(value: Any) -> Any:
+    """返回副本，防止调用方修改缓存中的对象"""
+    if hasattr(value, 'copy'):
+        return value.copy()
+    return copy.copy(value)
@@ -0,0 +1,450 @@
+import re
+import ast
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional
+import numpy as np
+import pandas as pd
+from strategies.factor_base import BaseFactor
+
+logger = logging.getLogger(__name__)
+
+# 算子: (表达式参数个数, 窗口参数个数)
+OPERATORS = {
+    'Ref': (1, 1),     # N日前的值
+    'Mean': (1, 1),    # 滚动均值
+    'Std': (1, 1),     # 滚动标准差
+    'Sum': (1, 1),     # 滚动求和
+    'Max': (1, 1),     # 滚动最大值
+    'Min': (1, 1),     # 滚动最小值
+    'Rank': (1, 1),    # 滚动窗口内的百分位排名（时序）
+    'Corr': (2, 1),    # 滚动相关系数
+    'CSRank': (1, 0),  # 当日截面百分位排名
+    'Abs': (1, 0),
+    'Log': (1, 0),
+}
+BINARY_OPS = {ast.Add: 'Add', ast.Sub: 'Sub', ast.Mult: 'Mul', ast.Div: 'Div'}
+COMMUTATIVE = {'Add', 'Mul'}
+ROLLING_OPS = {'Sum', 'Mean', 'Std', 'Corr', 'Max', 'Min', 'Rank'}  # fast_rolling时改写的算子
+EXPANDING_LOOKBACK = 100000  # 扩展窗口依赖全部历史
+
+_FIELD_PREFIX = '_F_'
+_FIELD_PATTERN = re.compile(r'\$([A-Za-z_]\w*)')
+
+def parse(expression: str) -> tuple:
+    """把表达式字符串解析为规范化的节点键（嵌套元组）
+
+    语法与Qlib表达式一致，如 "Mean($close, 5) / $close - 1"；
+    字段节点为 ('$', 名称)，常数为 ('const', 值)，算子为 (算子名, 子节点..., 窗口)。
+    加法和乘法的两个操作数按键排序，a+b 与 b+a 得到同一个节点。
+    """
+    source = _FIELD_PATTERN.sub(lambda m: _FIELD_PREFIX + m.group(1), expression.strip())
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {expression}: {e.msg}") from None
+    return _build(tree.body, expression)
+
+def _build(node, expression: str) -> tuple:
+    if isinstance(node, ast.Name) and node.id.startswith(_FIELD_PREFIX):
+        return ('$', node.id[len(_FIELD_PREFIX):])
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+        return ('const', float(node.value))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _build(node.operand, expression)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if operand[0] == 'const':
+            return ('const', -operand[1])
+        return ('Mul', *sorted([('const', -1.0), operand], key=repr))
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+        op = BINARY_OPS[type(node.op)]
+        args = [_build(node.left, expression), _build(node.right, expression)]
+        if op in COMMUTATIVE:
+            args.sort(key=repr)
+        return (op, *args)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in OPERATORS \
+            and not node.keywords:
+        name = node.func.id
+        n_expr, n_window = OPERATORS[name]
+        if len(node.args) != n_expr + n_window:
+            raise ValueError(f"{name} 需要 {n_expr + n_window} 个参数: {expression}")
+        args = [_build(arg, expression) for arg in node.args[:n_expr]]
+        for arg in node.args[n_expr:]:
+            if not (isinstance(arg, ast.Constant) and isinstance(arg.value, int)) or arg.value < 0:
+                raise ValueError(f"{name} 的窗口参数必须是非负整数: {expression}")
+            args.append(arg.value)
+        return (name, *args)
+    text = ast.unparse(node).replace(_FIELD_PREFIX, '$')
+    raise ValueError(f"不支持的表达式: {text} (于 {expression})")
+
+def children(key: tuple) -> List[tuple]:
+    """子表达式节点"""
+    if key[0] in ('$', 'const'):
+        return []
+    return [arg for arg in key[1:] if isinstance(arg, tuple)]
+
+def fields_of(key: tuple) -> List[str]:
+    """表达式引用的行情字段（按出现顺序去重）"""
+    if key[0] == '$':
+        return [key[1]]
+    fields = []
+    for child in children(key):
+        fields.extend(f for f in fields_of(child) if f not in fields)
+    return fields
+
+def lookback(key: tuple) -> int:
+    """表达式在时间轴上向前引用的最大天数（窗口和Ref沿嵌套路径累加）"""
+    if key[0] in ('$', 'const'):
+        return 0
+    own = key[-1] if not isinstance(key[-1], tuple) else 0
+    if key[0] != 'Ref' and OPERATORS.get(key[0], (0, 0))[1]:
+        own = own - 1 if own else EXPANDING_LOOKBACK
+    return own + max((lookback(child) for child in children(key)), default=0)
+
+class ExpressionEngine:
+    """在本地 日期×股票 面板上求值因子表达式
+
+    一批表达式先解析为规范化节点并合并，相同子表达式（含跨表达式共享的部分）只计算一次；
+    fast_rolling时滚动Sum/Mean/Std/Corr和Max/Min改写为按2的幂次倍增的块和/块最值，
+    滚动Rank改写为逐日累加的比较计数，同一输入的不同窗口共用同一组中间结果。
+    批内按引用计数及时释放不再需要的中间结果，另外保留最近cache_size个表达式节点的结果，
+    同一面板上后续的求值可直接命中。
+
+    fast_rolling的结果与pandas逐窗口计算有舍入级差异，低于舍入误差的方差按0处理，
+    窗口内的±inf按缺失值处理；fast_rolling=False时全部使用pandas滚动计算（与Qlib一致）。
+    """
+    EPS = 8 * np.finfo(float).eps
+
+    def __init__(self, panel: Mapping[str, pd.DataFrame], cache_size: int = 64,
+                 fast_rolling: bool = True):
+        if not panel:
+            raise ValueError("面板为空")
+        first = next(iter(panel.values()))
+        self.index = first.index
+        self.columns = first.columns
+        self.panel = panel
+        self.cache_size = cache_size
+        self.fast_rolling = fast_rolling
+        self._cache: 'OrderedDict[tuple, np.ndarray]' = OrderedDict()
+        self._lowered: Dict[tuple, tuple] = {}
+        self._logical = set()
+        self.hits = 0
+        self.computed = 0
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self.index), len(self.columns))
+
+    def evaluate(self, expression: str) -> pd.DataFrame:
+        """求值单个表达式"""
+        return self.evaluate_many({expression: expression})[expression]
+
+    def evaluate_many(self, expressions: Mapping[str, str]) -> Dict[str, pd.DataFrame]:
+        """批量求值 {因子名: 表达式}，返回 {因子名: 日期×股票矩阵}"""
+        keys = {name: self._lower(parse(expr)) for name, expr in expressions.items()}
+        outputs: Dict[tuple, List[str]] = {}
+        for name, key in keys.items():
+            outputs.setdefault(key, []).append(name)
+
+        # 合并后的节点按后序排列，子节点总在父节点之前；已缓存的节点先取出，避免批内被淘汰
+        order, refs, values = [], {}, {}
+        for key in outputs:
+            self._collect(key, order, refs, values)
+        for key in outputs:
+            refs[key] += 1
+
+        results = {}
+        for key in order:
+            if key not in values:
+                values[key] = self._value(key, values)
+                for child in children(key):
+                    self._release(child, refs, values)
+            if key in outputs:
+                # 结果即时转换为DataFrame（拷贝，不与缓存共享内存），之后只在仍被引用时保留
+                for name in outputs[key]:
+                    results[name] = pd.DataFrame(np.broadcast_to(values[key], self.shape), index=self.index,
+                                                 columns=self.columns, copy=True)
+                self._release(key, refs, values)
+        return {name: results[name] for name in keys}
+
+    @staticmethod
+    def _release(key: tuple, refs: Dict[tuple, int], values: Dict[tuple, np.ndarray]):
+        refs[key] -= 1
+        if refs[key] == 0:
+            del values[key]
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'computed': self.computed, 'hits': self.hits, 'cached': len(self._cache)}
+
+    def _lower(self, key: tuple) -> tuple:
+        """把表达式节点改写为实际计算的节点"""
+        lowered = self._lowered.get(key)
+        if lowered is not None:
+            return lowered
+        op = key[0]
+        if op in ('$', 'const'):
+            self._logical.add(key)
+            return key
+        args = [self._lower(arg) if isinstance(arg, tuple) else arg for arg in key[1:]]
+        window = args[-1]
+
+        if not self.fast_rolling or op not in ROLLING_OPS or window == 0:
+            lowered = (op, *args)
+        elif op == 'Rank':
+            lowered = ('WinRank', args[0], _rank_counts(args[0], window), _window_count(args[0], window))
+        elif op in ('Max', 'Min'):
+            lowered = _doubling('F' + op.lower(), args[0], window)
+        elif op == 'Corr':
+            # 与pandas一致，只使用两者同时有值的观测
+            zero = ('const', 0.0)
+            x = ('Center', _node('Add', args[0], _node('Mul', zero, args[1])))
+            y = ('Center', _node('Add', args[1], _node('Mul', zero, args[0])))
+            lowered = ('WinCorr', *[_window_sum(z, window) for z in (
+                x, y, _node('Mul', x, y), _node('Mul', x, x), _node('Mul', y, y))],
+                _window_count(x, window))
+        elif op == 'Std':
+            x = ('Center', args[0])
+            lowered = ('WinStd', _window_sum(x, window), _window_sum(_node('Mul', x, x), window),
+                       _window_count(x, window))
+        else:
+            lowered = ('Win' + op, _window_sum(args[0], window), _window_count(args[0], window))
+        self._lowered[key] = lowered
+        self._logical.add(lowered)
+        return lowered
+
+    def _collect(self, key: tuple, order: List[tuple], refs: Dict[tuple, int],
+                 values: Dict[tuple, np.ndarray]):
+        """后序遍历，refs记录每个节点被多少个父节点引用"""
+        if key in refs:
+            return
+        refs[key] = 0
+        cached = self._cache.get(key)
+        if cached is not None:
+            # 已缓存的节点不需要展开子节点
+            self._cache.move_to_end(key)
+            self.hits += 1
+            values[key] = cached
+        else:
+            for child in children(key):
+                self._collect(child, order, refs, values)
+                refs[child] += 1
+        order.append(key)
+
+    def _value(self, key: tuple, values: Dict[tuple, np.ndarray]) -> np.ndarray:
+        result = self._compute(key, values)
+        result.flags.writeable = False
+        self.computed += 1
+        # 只缓存表达式层面的节点，块和、比较计数等改写产生的中间结果用完即释放
+        if self.cache_size and key[0] != 'const' and key in self._logical:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, key: tuple, values: Dict[tuple, np.ndarray]) -> np.ndarray:
+        op = key[0]
+        if op == '$':
+            if key[1] not in self.panel:
+                raise KeyError(f"面板中没有字段: {key[1]}")
+            frame = self.panel[key[1]]
+            if not (frame.index.equals(self.index) and frame.columns.equals(self.columns)):
+                frame = frame.reindex(index=self.index, columns=self.columns)
+            return frame.to_numpy(dtype=float, copy=True)
+        if op == 'const':
+            # 0维数组，算术运算时广播
+            return np.array(key[1])
+
+        args = [values[arg] if isinstance(arg, tuple) else arg for arg in key[1:]]
+        if op not in BINARY_OPS.values():
+            args = [np.broadcast_to(arg, self.shape) if isinstance(arg, np.ndarray) and arg.ndim == 0 else arg
+                    for arg in args]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if op == 'Add':
+                return args[0] + args[1]
+            if op == 'Sub':
+                return args[0] - args[1]
+            if op == 'Mul':
+                return args[0] * args[1]
+            if op == 'Div':
+                return args[0] / args[1]
+            if op == 'Abs':
+                return np.abs(args[0])
+            if op == 'Log':
+                return np.log(args[0])
+            if op in ('Fmax', 'Fmin'):
+                return getattr(np, op.lower())(args[0], args[1])
+            if op == 'Ref':
+                return _shift(args[0], args[1])
+            if op == 'Center':
+                # 方差和相关系数与平移无关，减去列均值以缩小前缀和的量级
+                finite = np.where(np.isfinite(args[0]), args[0], np.nan)
+                center = np.nanmean(finite, axis=0)
+                return args[0] - np.where(np.isnan(center), 0.0, center)
+            if op == 'Fill0':
+                return np.where(np.isfinite(args[0]), args[0], 0.0)
+            if op == 'Valid':
+                return np.isfinite(args[0]).astype(float)
+            if op == 'AddShift':
+                # a + b后移offset行（前面补0）
+                result = args[0].copy()
+                offset = args[2]
+                if offset < len(result):
+                    result[offset:] += args[1][:len(result) - offset]
+                return result
+            if op == 'RankCount':
+                return self._rank_count(*args)
+            if op.startswith('Win'):
+                return self._window(op, args)
+        if op == 'CSRank':
+            return pd.DataFrame(args[0]).rank(axis=1, pct=True).to_numpy()
+        if op == 'Corr':
+            return _rolling(args[0], args[2]).corr(pd.DataFrame(args[1])).to_numpy()
+
+        rolling = _rolling(args[0], args[1])
+        if op == 'Rank':
+            return rolling.rank(pct=True).to_numpy()
+        return getattr(rolling, op.lower())().to_numpy()
+
+    def _rank_count(self, x: np.ndarray, lag: int, previous: np.ndarray = None) -> np.ndarray:
+        """[小于计数, 等于计数]，在回看lag-1天的计数上加入第lag天前的观测"""
+        counts = np.zeros((2,) + self.shape) if previous is None else previous.copy()
+        if 0 < lag < len(x):
+            current, past = x[lag:], x[:len(x) - lag]
+            counts[0, lag:] += past < current
+            counts[1, lag:] += past == current
+        return counts
+
+    def _window(self, op: str, sums: List[np.ndarray]) -> np.ndarray:
+        """由窗口和计算窗口统计（min_periods=1），sums最后一项为窗口内有效观测数"""
+        if op == 'WinRank':
+            # 与pandas rank(pct=True)一致：并列取平均名次，除以窗口内有效观测数
+            x, counts, n = sums
+            with np.errstate(invalid='ignore'):
+                return np.where(np.isnan(x), np.nan, (counts[0] + 1 + counts[1] / 2) / n)
+        n = np.where(sums[-1] > 0, sums[-1], np.nan)
+        s = sums[0]
+        if op == 'WinSum':
+            return s + n * 0
+        if op == 'WinMean':
+            return s / n
+        if op == 'WinStd':
+            m2 = sums[1] - s * s / n
+            # 低于舍入误差的二阶矩（如窗口内全为同一值）按0处理
+            m2[m2 <= self.EPS * n * sums[1]] = 0.0
+            return np.sqrt(m2 / np.where(n >= 2, n - 1, np.nan))
+
+        # WinCorr
+        sy = sums[1]
+        mxy = sums[2] - s * sy / n
+        mxx = sums[3] - s * s / n
+        myy = sums[4] - sy * sy / n
+        mxx[mxx <= self.EPS * n * sums[3]] = np.nan
+        myy[myy <= self.EPS * n * sums[4]] = np.nan
+        return np.clip(mxy / np.sqrt(mxx * myy), -1.0, 1.0)
+
+def _node(op: str, a: tuple, b: tuple) -> tuple:
+    """构造二元节点（可交换算子的操作数按键排序）"""
+    if op in COMMUTATIVE:
+        a, b = sorted([a, b], key=repr)
+    return (op, a, b)
+
+def _doubling(op: str, x: tuple, window: int) -> tuple:
+    """滚动最值改写：长度2^k的窗口由两个2^(k-1)窗口合并，任意窗口由两个重叠的2^k窗口合并"""
+    span, node = 1, x
+    while span * 2 <= window:
+        node = (op, node, ('Ref', node, span))
+        span *= 2
+    if span == window:
+        return node
+    return (op, node, ('Ref', node, window - span))
+
+def _window_sum(x: tuple, window: int) -> tuple:
+    """最近window个有效值之和：长度2^k的块和由两个2^(k-1)块相加，窗口按二进制位拼接若干块
+
+    各块和只做O(log window)次两两相加，不同窗口共用同一组块和
+    """
+    return _blocks(('Fill0', x), window)
+
+def _window_count(x: tuple, window: int) -> tuple:
+    """最近window行中的有效观测数"""
+    return _blocks(('Valid', x), window)
+
+def _blocks(z: tuple, window: int) -> tuple:
+    levels = [z]
+    while 2 ** len(levels) <= window:
+        block = levels[-1]
+        levels.append(('AddShift', block, block, 2 ** (len(levels) - 1)))
+    node, offset = None, 0
+    for k in range(len(levels) - 1, -1, -1):
+        if window & (1 << k):
+            node = levels[k] if node is None else ('AddShift', node, levels[k], offset)
+            offset += 1 << k
+    return node
+
+def _rank_counts(x: tuple, window: int) -> tuple:
+    """窗口内早于当日且小于/等于当日值的观测数，沿回看天数逐日累加，不同窗口共用同一条链"""
+    node = ('RankCount', x, 0)
+    for lag in range(1, window):
+        node = ('RankCount', x, lag, node)
+    return node
+
+def _shift(values: np.ndarray, n: int) -> np.ndarray:
+    """沿日期轴后移n行，前面补NaN"""
+    result = np.full(values.shape, np.nan)
+    if n < len(values):
+        result[n:] = values[:len(values) - n]
+    return result
+
+def _rolling(values: np.ndarray, window: int):
+    """与Qlib一致：min_periods=1，窗口为0时为扩展窗口"""
+    frame = pd.DataFrame(values)
+    if window == 0:
+        return frame.expanding(min_periods=1)
+    return frame.rolling(window, min_periods=1)
+
+class ExpressionFactor(BaseFactor):
+    """由表达式定义的因子，params: {'expression': 表达式字符串}
+
+    通过FactorEngine批量计算时，同一面板上的全部表达式因子共用一个ExpressionEngine。
+    """
+
+    def __init__(self, params: dict):
+        super().__init__(params)
+        self.key = parse(params['expression'])
+        self.fields = fields_of(self.key)
+
+    @property
+    def expression(self) -> str:
+        return self.params['expression']
+
+    @property
+    def warmup_period(self) -> int:
+        return lookback(self.key) + 1
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        panel = {field: data[field].to_frame('value') for field in self.fields}
+        return ExpressionEngine(panel, cache_size=0).evaluate(self.expression).iloc[:, 0]
+
+    def calculate_panel(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        return ExpressionEngine(panel, cache_size=0).evaluate(self.expression)
+
+    @staticmethod
+    def calculate_many(factors: Mapping[str, 'ExpressionFactor'],
+                       panel: Dict[str, pd.DataFrame],
+                       engine: Optional[ExpressionEngine] = None) -> Dict[str, pd.DataFrame]:
+        """一批表达式因子共享子表达式计算"""
+        engine = engine or ExpressionEngine(panel)
+        return engine.evaluate_many({name: factor.expression for name, factor in factors.items()})
+
+    def generate_signal(self, factor_value: float) -> int:
+        """因子值为正买入，为负卖出"""
+        if factor_value > 0:
+            return 1
+        if factor_value < 0:
+            return -1
+        return 0
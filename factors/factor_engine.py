@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, List, Optional
+import pandas as pd
+from strategies.factor_base import BaseFactor
+from factors.expression import ExpressionEngine, ExpressionFactor
+
+logger = logging.getLogger(__name__)
+
+class FactorEngine:
+    """截面因子引擎：一次读取 日期×股票 面板，所有因子整表计算
+
+    factors: {因子名: BaseFactor实例}，各因子通过calculate_panel对全市场
+    一次完成计算，结果为 {因子名: 日期×股票矩阵}，策略每个bar只需取一行。
+    指定store（FactorStore）时因子值从持久化因子库增量更新后读取，不再每次重算。
+    """
+
+    def __init__(self, factors: Dict[str, BaseFactor], store=None):
+        self.factors = factors
+        self.store = store
+
+    @property
+    def fields(self) -> List[str]:
+        """全部因子所需的行情字段（去重，保持顺序）"""
+        fields = []
+        for factor in self.factors.values():
+            fields.extend(f for f in factor.fields if f not in fields)
+        return fields
+
+    def load_panel(self,
+                   data_source,
+                   symbols: Optional[List[str]],
+                   start_date: str,
+                   end_date: str) -> Dict[str, pd.DataFrame]:
+        """读取行情面板 {字段: 日期×股票矩阵}
+
+        存储层支持get_daily_panel时单次范围查询，否则逐只获取后一次性拼接
+        """
+        fields = self.fields
+        if hasattr(type(data_source), 'get_daily_panel'):
+            return data_source.get_daily_panel(symbols, start_date, end_date, fields, layout='wide')
+
+        frames = {}
+        for symbol in symbols or []:
+            df = data_source.get_daily_data(symbol, start_date, end_date)
+            if df is not None and not df.empty:
+                if not isinstance(df.index, pd.DatetimeIndex):
+                    df = df.set_index(pd.to_datetime(df['trade_date']))
+                frames[symbol] = df[fields]
+        if not frames:
+            return {field: pd.DataFrame() for field in fields}
+
+        combined = pd.concat(frames, axis=1).sort_index()
+        return {field: combined.xs(field, axis=1, level=1) for field in fields}
+
+    def compute(self, panel: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """计算全部因子，表达式因子整批求值以共享公共子表达式"""
+        expressions = {name: f for name, f in self.factors.items() if isinstance(f, ExpressionFactor)}
+        batch = {}
+        if expressions:
+            engine = ExpressionEngine(panel)
+            batch = ExpressionFactor.calculate_many(expressions, panel, engine)
+            logger.debug(f"表达式因子 {len(expressions)} 个: {engine.stats()}")
+
+        results = {}
+        for name, factor in self.factors.items():
+            results[name] = batch[name] if name in batch else factor.calculate_panel(panel)
+            logger.debug(f"因子 {name}: {results[name].shape}")
+        return results
+
+    def run(self,
+            data_source,
+            symbols: Optional[List[str]],
+            start_date: str,
+            end_date: str) -> Dict[str, pd.DataFrame]:
+        """读取面板并计算，返回因子矩阵和所需行情字段矩阵"""
+        panel = self.load_panel(data_source, symbols, start_date, end_date)
+        if self.store is None:
+            return {**panel, **self.compute(panel)}
+
+        frame = next(iter(panel.values()))
+        factors = {
+            name: self.store.load(factor, start_date, end_date, symbols).reindex(
+                index=frame.index, columns=frame.columns)
+            for name, factor in self.factors.items()
+        }
+        return {**panel, **factors}
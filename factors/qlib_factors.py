@@ -1,50 +1,53 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 import pandas as pd
-from qlib.data import D
+from qlib.contrib.data.loader import Alpha158DL
+from data.data_source.qlib_source import QlibFeatureLoader
 from strategies.factor_base import BaseFactor
 
 class QlibFactorMixin:
     """Qlib因子混入类"""
-    
-    def __init__(self):
-        self.provider = D
-        
-    def get_alpha158_factors(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
-        """获取Alpha158因子集"""
+
+    def __init__(self, loader: QlibFeatureLoader):
+        # 通常为QlibDataSource.loader：带Qlib初始化配置，大股票池可分片到多进程
+        self.loader = loader
+
+    def get_alpha158_factors(self, instruments: Union[str, List[str]], start_date: str,
+                             end_date: str) -> pd.DataFrame:
+        """获取Alpha158因子集
+
+        instruments: 股票列表或市场名（如 'csi300'、'all'），全部股票一次读取
+        """
         # Alpha158是Qlib内置的常用因子集
-        fields = []
-        for group in ['Alpha158']:
-            fields.extend(D.list_factors(group=group))
-            
-        df = D.features(
-            instruments=[symbol],
-            fields=fields,
-            start_time=start_date,
-            end_time=end_date,
-            freq='day'
-        )
+        fields, names = Alpha158DL.get_feature_config()
+
+        df = self.loader.features(instruments, fields, start_date, end_date, freq='day')
+        df.columns = names
         return df
 
 class QlibMomentumFactor(BaseFactor, QlibFactorMixin):
-    """使用Qlib实现的动量因子"""
-    
-    def __init__(self, params: dict):
+    """使用Qlib实现的动量因子
+
+    params: lookback_period（默认20）
+    loader不放入params，避免因子库/回测缓存按params计算的键随对象地址变化
+    """
+
+    def __init__(self, params: dict, loader: QlibFeatureLoader):
         BaseFactor.__init__(self, params)
-        QlibFactorMixin.__init__(self)
-        
+        QlibFactorMixin.__init__(self, loader)
+
     def calculate(self, data: pd.DataFrame) -> pd.Series:
-        """计算动量因子"""
-        symbol = data.index.get_level_values(1)[0]
-        start_date = data.index.get_level_values(0)[0]
-        end_date = data.index.get_level_values(0)[-1]
-        
-        # 使用Qlib的动量因子
-        fields = ['momentum_20']
-        df = self.provider.features(
-            instruments=[symbol],
-            fields=fields,
-            start_time=start_date,
-            end_time=end_date,
-            freq='day'
-        )
-        return df['momentum_20'] 
\ No newline at end of file
+        """计算动量因子，data中的全部股票一次读取
+
+        data以(日期, 股票)或Qlib的(instrument, datetime)为索引
+        """
+        names = list(data.index.names)
+        date_level = names.index('datetime') if 'datetime' in names else 0
+        dates = data.index.get_level_values(date_level)
+        symbols = data.index.get_level_values(1 - date_level).unique().tolist()
+
+        # 使用Qlib表达式计算动量
+        field = f"$close / Ref($close, {self.params.get('lookback_period', 20)}) - 1"
+        momentum = self.loader.features(symbols, [field], dates.min(), dates.max(), freq='day')[field]
+        if date_level == 0:
+            momentum = momentum.swaplevel()
+        return momentum.rename('momentum').reindex(data.index)
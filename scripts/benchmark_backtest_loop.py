@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestEngine
+from strategies.base_strategy import BaseStrategy
+
+def make_bars(n_symbols: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """生成回测引擎使用的长表（日期索引 + symbol列）"""
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"{i:06d}.SZ" for i in range(n_symbols)])
+    dates = pd.bdate_range(end='2024-12-31', periods=n_days)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0).ravel()
+    return pd.DataFrame({
+        'symbol': np.tile(symbols, n_days),
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': 1e6
+    }, index=pd.DatetimeIndex(np.repeat(dates, n_symbols), name='trade_date'))
+
+class RotationStrategy(BaseStrategy):
+    """每月轮动持有固定数量股票，用于压测引擎本身的开销"""
+
+    def __init__(self, n_holdings: int):
+        super().__init__(data_source=None)
+        self.n_holdings = n_holdings
+        self.month = None
+
+    def initialize(self):
+        pass
+
+    def get_positions_value(self) -> float:
+        return sum(self.positions_value.get(s, 0.0) for s in self.positions)
+
+    def on_daily_bar(self, bar):
+        self.on_bar(bar)
+
+    def on_bar(self, bar: pd.DataFrame):
+        if self.current_time.month == self.month:
+            return
+        self.month = self.current_time.month
+        self.positions.clear()
+        self.positions_value.clear()
+        start = (self.month * self.n_holdings) % max(len(bar) - self.n_holdings, 1)
+        for symbol in bar['symbol'].iloc[start:start + self.n_holdings]:
+            self.positions[symbol] = 100
+
+def run_legacy(engine: BacktestEngine, strategy: BaseStrategy, data: pd.DataFrame):
+    """原实现：groupby逐日 + 逐只布尔过滤"""
+    for date, bars in data.groupby(level=0):
+        strategy.current_time = date
+        for symbol, quantity in strategy.positions.items():
+            symbol_data = bars[bars['symbol'] == symbol]
+            if not symbol_data.empty:
+                strategy.positions_value[symbol] = quantity * symbol_data['close'].iloc[0]
+        engine._record_daily_stats(strategy, date)
+        strategy.on_bar(bars)
+
+def main():
+    parser = argparse.ArgumentParser(description='回测主循环基准测试（数组化市值计算 vs 原实现）')
+    parser.add_argument('--symbols', type=int, default=3000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--holdings', type=int, default=50)
+    parser.add_argument('--legacy-days', type=int, default=250,
+                        help='原实现只跑前N个交易日再按比例外推，0表示全量')
+    args = parser.parse_args()
+
+    n_days = args.years * 244
+    data = make_bars(args.symbols, n_days)
+    print(f"数据规模: {args.symbols} 只股票 x {n_days} 天 = {len(data):,} 行\n")
+
+    engine = BacktestEngine(data_source=None)
+    strategy = RotationStrategy(args.holdings)
+    start = time.perf_counter()
+    engine._run_bars(strategy, data)
+    new_time = time.perf_counter() - start
+    new_value = engine.daily_stats[-1]['total_value']
+
+    legacy_days = args.legacy_days or n_days
+    legacy_data = data.iloc[:legacy_days * args.symbols]
+    engine = BacktestEngine(data_source=None)
+    strategy = RotationStrategy(args.holdings)
+    start = time.perf_counter()
+    run_legacy(engine, strategy, legacy_data)
+    legacy_time = (time.perf_counter() - start) * n_days / legacy_days
+
+    print(f"{'实现':<12}{'耗时(秒)':>12}{'每日(毫秒)':>12}")
+    print(f"{'legacy':<12}{legacy_time:>12.2f}{legacy_time / n_days * 1000:>12.3f}")
+    print(f"{'array':<12}{new_time:>12.2f}{new_time / n_days * 1000:>12.3f}")
+    print(f"\n加速比: {legacy_time / new_time:.1f}x，期末总资产: {new_value:,.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import List
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage.market_data import MarketDataStorage
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def make_daily_frame(symbols: List[str], dates: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """生成多只股票的模拟日线长表"""
+    rng = np.random.default_rng(seed)
+    n_days, n_symbols = len(dates), len(symbols)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+    return pd.DataFrame({
+        'symbol': np.tile(symbols, n_days),
+        'trade_date': np.repeat(dates.strftime('%Y%m%d'), n_symbols),
+        'open': close.ravel(),
+        'high': close.ravel() * 1.01,
+        'low': close.ravel() * 0.99,
+        'close': close.ravel(),
+        'volume': rng.uniform(1e5, 1e7, n_days * n_symbols),
+        'amount': rng.uniform(1e6, 1e8, n_days * n_symbols),
+    })
+
+def legacy_save(storage: MarketDataStorage, symbol: str, df: pd.DataFrame):
+    """旧实现：iterrows逐行构造参数"""
+    df = storage._clean_daily_data(df, symbol)
+    data = [
+        (symbol, row['trade_date'].strftime('%Y%m%d'), row['open'], row['high'],
+         row['low'], row['close'], row['volume'], row.get('amount', 0), row.get('adj_factor', 1.0))
+        for _, row in df.iterrows()
+    ]
+    with storage._get_connection() as conn:
+        conn.executemany(storage.DAILY_INSERT_SQL, data)
+
+def main():
+    parser = argparse.ArgumentParser(description='日线批量写入基准测试')
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--batch-symbols', type=int, default=100, help='每个事务包含的股票数')
+    parser.add_argument('--legacy-symbols', type=int, default=20, help='旧实现抽样股票数')
+    args = parser.parse_args()
+
+    symbols = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    dates = pd.bdate_range(end='2024-12-31', periods=args.years * 244)
+    print(f"数据规模: {args.symbols} 只股票 x {len(dates)} 天 = {args.symbols * len(dates):,} 行")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 旧实现（抽样）
+        storage = MarketDataStorage(db_path=os.path.join(tmp_dir, 'legacy.db'))
+        sample = make_daily_frame(symbols[:args.legacy_symbols], dates)
+        start = time.perf_counter()
+        for symbol, df in sample.groupby('symbol'):
+            legacy_save(storage, symbol, df.copy())
+        elapsed = time.perf_counter() - start
+        print(f"{'iterrows (旧)':<24}{len(sample) / elapsed:>14,.0f} 行/秒")
+        storage._pool.close_all()
+
+        for name, use_staging in [('executemany', False), ('staging + INSERT SELECT', True)]:
+            storage = MarketDataStorage(db_path=os.path.join(tmp_dir, f'bulk_{use_staging}.db'))
+            total_rows, total_time = 0, 0.0
+            for i in range(0, args.symbols, args.batch_symbols):
+                batch = make_daily_frame(symbols[i:i + args.batch_symbols], dates, seed=i)
+                start = time.perf_counter()
+                total_rows += storage.save_daily_data_bulk(batch, use_staging=use_staging)
+                total_time += time.perf_counter() - start
+            print(f"{name:<24}{total_rows / total_time:>14,.0f} 行/秒  ({total_rows:,} 行, {total_time:.1f} 秒)")
+            storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
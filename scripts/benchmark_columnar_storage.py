@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage.market_data import MarketDataStorage
+from data.storage.parquet_store import ParquetMarketDataStorage
+from scripts.benchmark_bulk_write import make_daily_frame
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def dir_size_mb(path: str) -> float:
+    """目录占用空间（MB）"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1024 / 1024
+
+def timed(func, repeat: int = 3) -> float:
+    """取多次运行的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite与列式分区存储对比基准测试')
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--batch-symbols', type=int, default=200)
+    args = parser.parse_args()
+
+    symbols = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    dates = pd.bdate_range(end='2024-12-31', periods=args.years * 244)
+    print(f"数据规模: {args.symbols} 只股票 x {len(dates)} 天 = {args.symbols * len(dates):,} 行\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backends = {'sqlite': MarketDataStorage(db_path=os.path.join(tmp_dir, 'market.db'))}
+        for file_format in ['parquet', 'arrow']:
+            root = os.path.join(tmp_dir, file_format)
+            backends[file_format] = ParquetMarketDataStorage(
+                db_path=os.path.join(tmp_dir, f'{file_format}_meta.db'),
+                root_dir=root,
+                file_format=file_format
+            )
+
+        # 窗口查询：最近一年、全市场收盘价（动量回测的典型读法）
+        recent_start = dates[-244].strftime('%Y%m%d')
+        end = dates[-1].strftime('%Y%m%d')
+        sample = symbols[:50]
+
+        print(f"{'后端':<10}{'写入(秒)':>10}{'体积(MB)':>10}{'全量close(秒)':>16}{'近一年close(秒)':>18}{'50只全字段(秒)':>18}")
+        for name, storage in backends.items():
+            start = time.perf_counter()
+            for i in range(0, args.symbols, args.batch_symbols):
+                storage.save_daily_data_bulk(make_daily_frame(symbols[i:i + args.batch_symbols], dates, seed=i))
+            write_time = time.perf_counter() - start
+
+            size = dir_size_mb(storage.root_dir) if name != 'sqlite' else os.path.getsize(storage.db_path) / 1024 / 1024
+            full = timed(lambda: storage.get_daily_panel(None, dates[0], end, ['close']))
+            recent = timed(lambda: storage.get_daily_panel(None, recent_start, end, ['close']))
+            subset = timed(lambda: storage.get_daily_panel(sample, dates[0], end))
+            print(f"{name:<10}{write_time:>10.2f}{size:>10.1f}{full:>16.3f}{recent:>18.3f}{subset:>18.3f}")
+            storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
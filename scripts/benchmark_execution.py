@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestEngine
+from backtest_execution import ExecutionSimulator
+from strategies.base_strategy import BaseStrategy
+from scripts.benchmark_backtest_loop import make_bars
+
+class RebalanceStrategy(BaseStrategy):
+    """每rebalance天等权换仓到随机选出的n_holdings只股票，每次换仓产生大量订单"""
+
+    def __init__(self, n_holdings: int, rebalance: int = 5, seed: int = 0):
+        super().__init__(data_source=None)
+        self.n_holdings = n_holdings
+        self.rebalance = rebalance
+        self.rng = np.random.default_rng(seed)
+        self.day = 0
+
+    def initialize(self):
+        pass
+
+    def on_daily_bar(self, bar):
+        self.on_bar(bar)
+
+    def on_bar(self, bar: pd.DataFrame):
+        self.day += 1
+        if self.day % self.rebalance:
+            return
+        targets = set(self.rng.choice(bar['symbol'].to_numpy(), self.n_holdings, replace=False))
+        for symbol in list(self.positions):
+            if symbol not in targets:
+                self.sell(symbol, self.positions[symbol], self.get_price(symbol))
+        budget = self.get_total_value() / self.n_holdings
+        for symbol in targets - set(self.positions):
+            price = self.get_price(symbol)
+            if price > 0:
+                self.buy(symbol, int(budget / price), price)
+
+def main():
+    parser = argparse.ArgumentParser(description='A股撮合模拟开销：即时成交 vs 向量化撮合')
+    parser.add_argument('--symbols', type=int, default=3000)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--holdings', type=int, default=300)
+    args = parser.parse_args()
+
+    n_days = args.years * 244
+    data = make_bars(args.symbols, n_days)
+    # 随机制造涨跌停和低成交量，检验撮合约束
+    rng = np.random.default_rng(1)
+    data['volume'] = rng.choice([10.0, 1e4], size=len(data), p=[0.05, 0.95])
+    print(f"数据规模: {args.symbols} 只股票 x {n_days} 天，持仓 {args.holdings} 只\n")
+
+    print(f"{'模式':<10}{'耗时(秒)':>10}{'成交笔数':>10}{'总收益率':>10}")
+    for name, execution in [('instant', None), ('simulated', ExecutionSimulator())]:
+        engine = BacktestEngine(data_source=None, execution=execution)
+        strategy = RebalanceStrategy(args.holdings)
+        strategy.cash = engine.initial_capital
+        start = time.perf_counter()
+        engine._run_bars(strategy, data)
+        elapsed = time.perf_counter() - start
+        total = engine.daily_stats[-1]['total_value'] / engine.initial_capital - 1
+        print(f"{name:<10}{elapsed:>10.2f}{len(engine.trades):>10,}{total:>10.2%}")
+        if execution is not None:
+            print(f"\n撮合统计: {execution.stats}")
+            quantities = engine.trades.column('quantity')
+            directions = engine.trades.column('direction')
+            print(f"买入全部为整手: {bool((quantities[directions == 'buy'] % 100 == 0).all())}")
+
+if __name__ == "__main__":
+    main()
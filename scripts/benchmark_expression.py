@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from factors.expression import ExpressionFactor, ExpressionEngine
+from factors.factor_engine import FactorEngine
+
+WINDOWS = [3, 5, 10, 15, 20, 30, 40, 60, 90, 120]
+TEMPLATES = {
+    'ROC': "Ref($close, {d}) / $close",
+    'MA': "Mean($close, {d}) / $close",
+    'STD': "Std($close, {d}) / $close",
+    'MAX': "Max($high, {d}) / $close",
+    'MIN': "Min($low, {d}) / $close",
+    'RANK': "Rank($close, {d})",
+    'RSV': "($close - Min($low, {d})) / (Max($high, {d}) - Min($low, {d}) + 1e-12)",
+    'CORR': "Corr($close, Log($volume + 1), {d})",
+    'CORD': "Corr($close / Ref($close, 1), Log($volume / Ref($volume, 1) + 1), {d})",
+    'SUMD': "Sum(Abs($close - Ref($close, 1)), {d}) / $close",
+    'VMA': "Mean($volume, {d}) / ($volume + 1e-12)",
+    'VSTD': "Std($volume, {d}) / ($volume + 1e-12)",
+    'WVMA': "Std(Abs($close / Ref($close, 1) - 1) * $volume, {d}) / "
+            "(Mean(Abs($close / Ref($close, 1) - 1) * $volume, {d}) + 1e-12)",
+    'CSMOM': "CSRank(Ref($close, {d}) / $close)",
+    'CSVMA': "CSRank(Mean($volume, {d}) / ($volume + 1e-12))",
+}
+
+def make_panel(n_symbols: int, n_days: int, seed: int = 0) -> dict:
+    """生成 {字段: 日期×股票} 行情面板"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2024-12-31', periods=n_days)
+    symbols = [f"{i:06d}.SZ" for i in range(n_symbols)]
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+    spread = np.abs(rng.normal(0, 0.01, (n_days, n_symbols)))
+    frames = {
+        'close': close,
+        'high': close * (1 + spread),
+        'low': close * (1 - spread),
+        'volume': rng.uniform(1e5, 1e7, (n_days, n_symbols))
+    }
+    return {field: pd.DataFrame(values, index=dates, columns=symbols) for field, values in frames.items()}
+
+def alpha_factors() -> dict:
+    """10个窗口 x 15个模板 = 150个相关因子"""
+    return {
+        f"{name}{d}": ExpressionFactor({'expression': template.format(d=d)})
+        for d in WINDOWS for name, template in TEMPLATES.items()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='150个表达式因子：逐个独立求值 vs 公共子表达式合并')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--days', type=int, default=500)
+    args = parser.parse_args()
+
+    panel = make_panel(args.symbols, args.days)
+    factors = alpha_factors()
+    print(f"数据规模: {args.symbols} 只股票 x {args.days} 天, {len(factors)} 个因子\n")
+
+    # 基准：每个因子单独求值，滚动统计逐列调用pandas（与Qlib逐个表达式计算的方式相同）
+    start = time.perf_counter()
+    reference = {
+        name: ExpressionEngine(panel, cache_size=0, fast_rolling=False).evaluate(factor.expression)
+        for name, factor in factors.items()
+    }
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    independent = {name: factor.calculate_panel(panel) for name, factor in factors.items()}
+    independent_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = FactorEngine(factors).compute(panel)
+    batch_time = time.perf_counter() - start
+
+    engine = ExpressionEngine(panel)
+    engine.evaluate_many({name: f.expression for name, f in factors.items()})
+
+    diff = max(np.nanmax(np.abs(batch[name] - reference[name]).to_numpy(), initial=0) for name in factors)
+    same = all(batch[name].equals(independent[name]) for name in factors)
+    print(f"逐个独立求值(pandas滚动): {reference_time:.2f} 秒")
+    print(f"逐个独立求值(倍增块):     {independent_time:.2f} 秒")
+    print(f"合并批量求值:             {batch_time:.2f} 秒 (实际计算 {engine.stats()['computed']} 个节点)")
+    print(f"加速比: {reference_time / batch_time:.1f}x, 与pandas最大差异: {diff:.2e}, 与逐个求值一致: {same}")
+
+    # 同一面板上再次求值直接命中缓存
+    start = time.perf_counter()
+    engine.evaluate_many({name: f.expression for name, f in list(factors.items())[-15:]})
+    print(f"缓存命中再求值最后一个窗口的15个因子: {time.perf_counter() - start:.3f} 秒")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strategies.factor_base import MomentumFactor
+from factors.factor_engine import FactorEngine
+
+def make_close_panel(n_symbols: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """生成 日期×股票 收盘价矩阵"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2024-12-31', periods=n_days)
+    symbols = [f"{i:06d}.SZ" for i in range(n_symbols)]
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+    return pd.DataFrame(close, index=dates, columns=symbols)
+
+def main():
+    parser = argparse.ArgumentParser(description='动量因子：逐只计算 vs 截面整表计算')
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--legacy-symbols', type=int, default=500,
+                        help='逐只计算只跑前N只股票再按比例外推')
+    args = parser.parse_args()
+
+    close = make_close_panel(args.symbols, args.years * 244)
+    print(f"数据规模: {close.shape[1]} 只股票 x {close.shape[0]} 天\n")
+    factor = MomentumFactor({'lookback_period': 20})
+
+    n_legacy = min(args.legacy_symbols, args.symbols)
+    start = time.perf_counter()
+    legacy = {
+        symbol: factor.calculate(close[symbol].to_frame('close'))
+        for symbol in close.columns[:n_legacy]
+    }
+    legacy_time = (time.perf_counter() - start) * args.symbols / n_legacy
+
+    engine = FactorEngine({'momentum': factor})
+    start = time.perf_counter()
+    panel = engine.compute({'close': close})['momentum']
+    panel_time = time.perf_counter() - start
+
+    diff = max(np.nanmax(np.abs(panel[symbol] - values)) for symbol, values in legacy.items())
+    print(f"逐只计算(外推): {legacy_time:.2f} 秒")
+    print(f"截面整表计算:   {panel_time:.2f} 秒")
+    print(f"加速比: {legacy_time / panel_time:.1f}x, 最大差异: {diff:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage.market_data import MarketDataStorage
+from data.storage.parquet_store import ParquetMarketDataStorage
+from data.storage.factor_store import FactorStore
+from strategies.factor_base import MomentumFactor
+from scripts.benchmark_bulk_write import make_daily_frame
+
+def same(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """两个因子矩阵是否逐位一致（NaN位置也一致）"""
+    a, b = a.dropna(how='all'), b.dropna(how='all')
+    if not a.index.equals(b.index):
+        return False
+    b = b.reindex(columns=a.columns)
+    return np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True)
+
+def run(storage, data: pd.DataFrame, dates: pd.DatetimeIndex, work_dir: str):
+    last_day = dates[-1].strftime('%Y%m%d')
+    start, end = dates[0].strftime('%Y%m%d'), last_day
+    storage.save_daily_data_bulk(data[data['trade_date'] < last_day])
+
+    factor = MomentumFactor({'lookback_period': 20})
+    store = FactorStore(storage, os.path.join(work_dir, 'factors'), start_date=start)
+    t0 = time.perf_counter()
+    store.update(factor, end)
+    build_time = time.perf_counter() - t0
+
+    # 新交易日入库
+    storage.save_daily_data_bulk(data[data['trade_date'] == last_day])
+
+    t0 = time.perf_counter()
+    full = factor.calculate_panel(storage.get_daily_panel(None, start, end, ['close'], layout='wide'))
+    full_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    added = store.update(factor, end)
+    incr_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    stored = store.read(factor, start, end)
+    read_time = time.perf_counter() - t0
+
+    # load只从请求的起始日计算，请求更早的区间时向前补算
+    middle = dates[len(dates) // 2].strftime('%Y%m%d')
+    lazy = FactorStore(storage, os.path.join(work_dir, 'lazy'), start_date=end)
+    t0 = time.perf_counter()
+    lazy.load(factor, middle, end)
+    short_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    extended = lazy.load(factor, start, end)
+    extend_time = time.perf_counter() - t0
+
+    # 补录/修正一个历史交易日后，用更早的end_date调用load，end_date之后的已存值不能丢
+    fix_day = dates[len(dates) // 4].strftime('%Y%m%d')
+    fixed = data[data['trade_date'] == fix_day].copy()
+    fixed['close'] *= 1.1
+    storage.save_daily_data_bulk(fixed)
+    store.load(factor, start, middle)
+    rewritten = store.read(factor, start, end)
+    expected = factor.calculate_panel(storage.get_daily_panel(None, start, end, ['close'], layout='wide'))
+
+    diff = np.nanmax(np.abs(stored.to_numpy() - full.dropna(how='all').to_numpy()))
+    print(f"首次建库:          {build_time:.2f} 秒")
+    print(f"全量读取+重算:     {full_time:.2f} 秒")
+    print(f"增量更新({added}天):    {incr_time:.2f} 秒")
+    print(f"因子库读取全区间:  {read_time:.2f} 秒")
+    print(f"load后半区间:      {short_time:.2f} 秒，向前补算到起点: {extend_time:.2f} 秒")
+    print(f"每日更新加速比: {full_time / incr_time:.1f}x, 最大差异: {diff:.2e}")
+    print(f"增量结果与全量逐位一致: {same(stored, full)}，向前补算结果逐位一致: {same(extended, full)}")
+    print(f"历史改写后按较早end_date调用load，全区间结果逐位一致: {same(rewritten, expected)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='因子库：每日全量重算 vs 增量更新 + 列式读取')
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=5)
+    args = parser.parse_args()
+
+    symbols = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    dates = pd.bdate_range(end='2024-12-31', periods=args.years * 244)
+    data = make_daily_frame(symbols, dates)
+    print(f"数据规模: {args.symbols} 只股票 x {len(dates)} 天")
+
+    for name in ['sqlite', 'parquet']:
+        work_dir = tempfile.mkdtemp()
+        try:
+            if name == 'sqlite':
+                storage = MarketDataStorage(os.path.join(work_dir, 'market.db'))
+            else:
+                storage = ParquetMarketDataStorage(os.path.join(work_dir, 'market.db'),
+                                                   os.path.join(work_dir, 'columnar'))
+            print(f"\n[{name}]")
+            run(storage, data, dates, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
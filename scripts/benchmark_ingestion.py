@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_source.base import BaseDataSource
+from data.storage.market_data import MarketDataStorage
+from utils.rate_limiter import RateLimiter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+class FakeDataSource(BaseDataSource):
+    """本地模拟数据源：固定网络延迟，预先生成确定性的全市场日线"""
+
+    SUPPORTS_DAILY_BY_DATE = True
+
+    def __init__(self, n_symbols: int, latency: float = 0.05, n_days: int = 250):
+        self.symbols = np.array([f"{i:06d}.SZ" for i in range(n_symbols)])
+        self.latency = latency
+        self.dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n_days)
+        self.date_strs = self.dates.strftime('%Y%m%d').to_numpy()
+        rng = np.random.default_rng(0)
+        self.close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+        self.calls = 0
+
+    def get_stock_info(self) -> pd.DataFrame:
+        return pd.DataFrame({'ts_code': self.symbols})
+
+    def _frame(self, rows, cols) -> pd.DataFrame:
+        close = self.close[np.ix_(rows, cols)].ravel()
+        return pd.DataFrame({
+            'symbol': np.tile(self.symbols[cols], len(rows)),
+            'trade_date': np.repeat(self.date_strs[rows], len(cols)),
+            'open': close, 'high': close, 'low': close, 'close': close,
+            'volume': 1e6, 'amount': 1e7
+        })
+
+    def get_daily_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        time.sleep(self.latency)
+        self.calls += 1
+        rows = np.nonzero((self.date_strs >= start_date) & (self.date_strs <= end_date))[0]
+        return self._frame(rows, np.nonzero(self.symbols == symbol)[0])
+
+    def get_daily_data_by_date(self, trade_date: str) -> pd.DataFrame:
+        time.sleep(self.latency)
+        self.calls += 1
+        rows = np.nonzero(self.date_strs == trade_date)[0]
+        return self._frame(rows, np.arange(len(self.symbols)))
+
+    def get_min_data(self, symbol: str, freq: str = '1min') -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_realtime_data(self, symbol: str) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_trade_calendar(self, start_date: str, end_date: str) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_industry_info(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_financial_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_tick_data(self, symbol: str, trade_date: str) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def get_level2_quotes(self, symbol: str) -> pd.DataFrame:
+        return pd.DataFrame()
+
+def main():
+    parser = argparse.ArgumentParser(description='日线拉取基准测试（模拟数据源）')
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟单次调用延迟（秒）')
+    parser.add_argument('--rate', type=float, default=100.0, help='令牌桶速率（次/秒）')
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--gap-days', type=int, default=3, help='日常增量时缺失的交易日数')
+    args = parser.parse_args()
+
+    print(f"{'场景':<10}{'mode':>8}{'workers':>8}{'用时(秒)':>10}{'写入行数':>12}{'调用次数':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = FakeDataSource(args.symbols, args.latency)
+        for workers in args.workers:
+            # 全量回补：所有股票都没有历史数据
+            storage = MarketDataStorage(db_path=os.path.join(tmp_dir, f'ingest_{workers}.db'))
+            source.calls = 0
+            limiter = RateLimiter(rate=args.rate, capacity=args.burst)
+            start = time.perf_counter()
+            summary = storage.update_daily_data(source, workers=workers, rate_limiter=limiter, mode='symbol')
+            elapsed = time.perf_counter() - start
+            print(f"{'全量回补':<10}{'symbol':>8}{workers:>8}{elapsed:>10.2f}{summary['saved']:>12,}{source.calls:>10}")
+
+            # 再次运行应为增量：没有新数据
+            summary = storage.update_daily_data(source, workers=workers, rate_limiter=limiter)
+            assert summary['saved'] == 0, "增量更新不应重复写入"
+
+            # 日常增量：删除最近几个交易日，比较按股票与按日拉取
+            cutoff = source.date_strs[-args.gap_days]
+            for mode in ['symbol', 'auto']:
+                with storage._get_connection() as conn:
+                    conn.execute("DELETE FROM daily_price WHERE trade_date >= ?", (cutoff,))
+                source.calls = 0
+                start = time.perf_counter()
+                summary = storage.update_daily_data(source, workers=workers, rate_limiter=limiter, mode=mode)
+                elapsed = time.perf_counter() - start
+                print(f"{'日常增量':<10}{mode:>8}{workers:>8}{elapsed:>10.2f}{summary['saved']:>12,}{source.calls:>10}")
+            storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from typing import List
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestEngine
+from strategies.base_strategy import BaseStrategy
+from data.storage.market_data import MarketDataStorage
+from data.storage.minute_bars import MinuteBars
+
+def session_times(days: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """A股每日240根1分钟线的结束时间：09:31-11:30, 13:01-15:00"""
+    offsets = np.r_[np.arange(9 * 60 + 31, 11 * 60 + 31), np.arange(13 * 60 + 1, 15 * 60 + 1)]
+    return pd.DatetimeIndex((days.values[:, None] + offsets.astype('timedelta64[m]')).ravel())
+
+def make_minute_frame(symbols: List[str], days: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """生成多只股票的模拟1分钟线长表（含少量缺失bar）"""
+    rng = np.random.default_rng(seed)
+    times = session_times(days)
+    n_times, n_symbols = len(times), len(symbols)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.001, (n_times, n_symbols)), axis=0)
+    df = pd.DataFrame({
+        'time': np.repeat(times.values, n_symbols),
+        'symbol': np.tile(symbols, n_times),
+        'open': (close * (1 + rng.normal(0, 0.0005, close.shape))).ravel(),
+        'high': (close * 1.001).ravel(),
+        'low': (close * 0.999).ravel(),
+        'close': close.ravel(),
+        'volume': rng.uniform(1e3, 1e5, n_times * n_symbols),
+        'amount': rng.uniform(1e4, 1e6, n_times * n_symbols),
+    })
+    return df[rng.random(len(df)) > 0.01].reset_index(drop=True)
+
+def pandas_resample(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """参照实现：按上午/下午时段分别用pandas resample（右闭右标签）"""
+    minutes = int(freq.replace('min', ''))
+    df = df.set_index('time')
+    afternoon = df.index.hour >= 12
+    frames = []
+    for session, offset in [(~afternoon, '9h30min'), (afternoon, '13h')]:
+        part = df[session].groupby('symbol').resample(
+            f'{minutes}min', closed='right', label='right', offset=offset
+        ).agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+               'volume': 'sum', 'amount': 'sum'})
+        frames.append(part.dropna(subset=['close']))
+    return pd.concat(frames).reset_index().sort_values(['time', 'symbol'], ignore_index=True)
+
+class MinuteRotationStrategy(BaseStrategy):
+    """每rebalance根bar买入最近收益最高的股票，直接读取BarView数组"""
+    def __init__(self, data_source, params: dict):
+        super().__init__(data_source)
+        self.rebalance = params.get('rebalance', 30)
+        self.history_window = self.rebalance + 1
+        self.count = 0
+
+    def initialize(self):
+        pass
+
+    def on_bar(self, bar: pd.DataFrame):
+        pass
+
+    def on_minute_bar(self, bar):
+        self.count += 1
+        if self.count % self.rebalance or len(self.history) < self.history_window:
+            return
+        closes = self.history.to_array()
+        momentum = np.nan_to_num(closes[-1] / closes[0] - 1, nan=-np.inf)
+        best = bar.symbols[int(np.argmax(momentum))]
+        for symbol in list(self.positions):
+            if symbol != best:
+                self.sell(symbol, self.positions[symbol], self.get_price(symbol))
+        price = self.get_price(best)
+        if best not in self.positions and price > 0:
+            self.buy(best, int(self.cash * 0.95 / price / 100) * 100, price)
+
+def main():
+    parser = argparse.ArgumentParser(description='分钟线日内回测：重采样正确性与吞吐')
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--freqs', nargs='+', default=['5min', '15min', '30min', '60min'])
+    args = parser.parse_args()
+
+    symbols = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    days = pd.bdate_range(end='2024-12-31', periods=args.days)
+    df = make_minute_frame(symbols, days)
+    print(f"数据规模: {args.symbols} 只股票 x {args.days} 天 x 240 = {len(df):,} 条1分钟线\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = MarketDataStorage(db_path=os.path.join(tmp_dir, 'market.db'), cache_size=0)
+        for symbol, part in df.groupby('symbol'):
+            part = part.drop(columns='symbol').assign(time=part['time'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+            storage._save_minute_data(symbol, part, '1min')
+
+        start = time.perf_counter()
+        bars = MinuteBars.from_storage(storage, symbols, days[0], days[-1], '1min')
+        print(f"读取并构建稠密数组: {time.perf_counter() - start:.2f} 秒, {len(bars)} 根bar\n")
+
+        print(f"{'频率':<8}{'bar数':>8}{'重采样(秒)':>12}{'pandas(秒)':>12}{'一致':>6}")
+        for freq in args.freqs:
+            start = time.perf_counter()
+            resampled = bars.resample(freq)
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = pandas_resample(df, freq)
+            pandas_elapsed = time.perf_counter() - start
+
+            actual = pd.concat([resampled.to_frame(t) for t in range(len(resampled))])
+            actual = actual.reset_index().sort_values(['time', 'symbol'], ignore_index=True)
+            same = len(actual) == len(expected) and np.allclose(
+                actual[expected.columns[2:]].to_numpy(), expected[expected.columns[2:]].to_numpy()
+            ) and (actual['time'] == expected['time']).all()
+            print(f"{freq:<8}{len(resampled):>8}{elapsed:>12.3f}{pandas_elapsed:>12.3f}{str(same):>6}")
+
+        print(f"\n{'回测频率':<8}{'bar数':>10}{'耗时(秒)':>10}{'bar/秒':>12}{'总收益率':>10}")
+        for freq in ['1min'] + args.freqs:
+            data = bars if freq == '1min' else bars.resample(freq)
+            engine = BacktestEngine(storage)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = engine.run_intraday(MinuteRotationStrategy(storage, {'rebalance': 10}), data)
+            elapsed = time.perf_counter() - start
+            n_bars = len(data) * args.symbols
+            print(f"{freq:<8}{n_bars:>10,}{elapsed:>10.2f}{n_bars / elapsed:>12,.0f}"
+                  f"{result['total_return']:>10.2%}")
+        storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
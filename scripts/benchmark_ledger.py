@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ledger import ColumnarLedger, TRADE_FIELDS
+
+def fill_list(n: int, times, symbols) -> list:
+    trades = []
+    for i in range(n):
+        trades.append({'time': times[i], 'symbol': symbols[i], 'direction': 'buy',
+                       'quantity': 100, 'price': 10.0, 'cost': 1000.0})
+    return trades
+
+def fill_ledger(n: int, times, symbols) -> ColumnarLedger:
+    trades = ColumnarLedger(TRADE_FIELDS)
+    for i in range(n):
+        trades.append({'time': times[i], 'symbol': symbols[i], 'direction': 'buy',
+                       'quantity': 100, 'price': 10.0, 'cost': 1000.0})
+    return trades
+
+def measure(fill, to_frame, n: int, times, symbols):
+    """返回 (写入秒数, 峰值内存MB, 导出DataFrame秒数)"""
+    start = time.perf_counter()
+    trades = fill(n, times, symbols)
+    fill_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    to_frame(trades)
+    frame_time = time.perf_counter() - start
+
+    # tracemalloc会拖慢写入，内存单独测一次
+    del trades
+    tracemalloc.start()
+    trades = fill(n, times, symbols)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return fill_time, peak / 1024 / 1024, frame_time
+
+def main():
+    parser = argparse.ArgumentParser(description='交易记录：dict列表 vs 列式账本')
+    parser.add_argument('--trades', type=int, default=500000)
+    parser.add_argument('--symbols', type=int, default=3000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = list(pd.date_range('2015-01-01', periods=args.trades, freq='min'))
+    names = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    symbols = [names[i] for i in rng.integers(0, args.symbols, args.trades)]
+    print(f"交易笔数: {args.trades:,}\n")
+
+    print(f"{'实现':<10}{'写入(秒)':>10}{'峰值内存(MB)':>14}{'导出(秒)':>10}")
+    for name, fill, to_frame in [
+        ('list', fill_list, pd.DataFrame),
+        ('ledger', fill_ledger, ColumnarLedger.to_frame)
+    ]:
+        fill_time, peak, frame_time = measure(fill, to_frame, args.trades, times, symbols)
+        print(f"{name:<10}{fill_time:>10.2f}{peak:>14.1f}{frame_time:>10.3f}")
+
+    print(f"\n账本内存: {fill_ledger(args.trades, times, symbols).memory_usage()}")
+
+if __name__ == "__main__":
+    main()
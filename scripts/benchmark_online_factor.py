@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strategies.factor_base import MomentumFactor
+
+def make_closes(n_symbols: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """模拟收盘价：含停牌（NaN）和连续不变的价格（一字板）"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+    for _ in range(n_symbols * 3):
+        start, length, col = rng.integers(n_days), rng.integers(1, 30), rng.integers(n_symbols)
+        if rng.random() < 0.5:
+            close[start:start + length, col] = np.nan
+        else:
+            close[start:start + length, col] = close[start, col]
+    return pd.DataFrame(close, index=pd.bdate_range(end='2024-12-31', periods=n_days),
+                        columns=[f"{i:06d}.SZ" for i in range(n_symbols)])
+
+def main():
+    parser = argparse.ArgumentParser(description='因子增量更新：逐bar O(1)更新 vs 每次全量calculate')
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--lookback', type=int, nargs='+', default=[1, 5, 20, 60])
+    args = parser.parse_args()
+
+    closes = make_closes(args.symbols, args.days)
+    print(f"数据规模: {args.symbols} 只股票 x {args.days} 天\n")
+    # 新bar到来时，全量方式需对该股票全部历史重算一次，增量方式只需一次update
+    print(f"{'回看期':<8}{'单只全量重算(微秒)':>20}{'单次增量更新(微秒)':>20}{'逐位一致':>10}")
+    for lookback in args.lookback:
+        factor = MomentumFactor({'lookback_period': lookback})
+
+        t0 = time.perf_counter()
+        batch = {symbol: factor.calculate(closes[[symbol]].rename(columns={symbol: 'close'}))
+                 for symbol in closes.columns}
+        batch_time = time.perf_counter() - t0
+
+        online = np.empty(closes.shape)
+        values = closes.to_numpy()
+        t0 = time.perf_counter()
+        for j, symbol in enumerate(closes.columns):
+            for t in range(len(values)):
+                online[t, j] = factor.update(symbol, {'close': values[t, j]})
+        online_time = time.perf_counter() - t0
+
+        expected = pd.DataFrame(batch).to_numpy()
+        identical = np.array_equal(online, expected, equal_nan=True)
+        per_symbol = batch_time / closes.shape[1] * 1e6
+        per_update = online_time / values.size * 1e6
+        print(f"{lookback:<8}{per_symbol:>20.1f}{per_update:>20.2f}{str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
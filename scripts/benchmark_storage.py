@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage.market_data import MarketDataStorage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_symbols(n_symbols: int) -> List[str]:
+    """生成测试股票代码"""
+    return [f"{600000 + i:06d}.SH" for i in range(n_symbols)]
+
+def fill_daily_price(storage: MarketDataStorage, symbols: List[str], n_days: int):
+    """写入模拟日线数据"""
+    dates = pd.bdate_range(end='2024-12-31', periods=n_days).strftime('%Y%m%d')
+    rng = np.random.default_rng(0)
+    with storage._get_connection() as conn:
+        for symbol in symbols:
+            close = 10 * np.cumprod(1 + rng.normal(0, 0.02, n_days))
+            rows = [
+                (symbol, d, c, c * 1.01, c * 0.99, c, 1e6, 1e7, 1.0)
+                for d, c in zip(dates, close)
+            ]
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_price VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+def legacy_latest_price(db_path: str, symbol: str) -> dict:
+    """旧实现：每次调用新建连接"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA foreign_keys = ON")
+        df = pd.read_sql(
+            "SELECT * FROM realtime_price WHERE symbol = ? ORDER BY time DESC LIMIT 1",
+            conn, params=(symbol,)
+        )
+        if not df.empty:
+            return df.iloc[0].to_dict()
+        df = pd.read_sql(
+            "SELECT * FROM daily_price WHERE symbol = ? ORDER BY trade_date DESC LIMIT 1",
+            conn, params=(symbol,)
+        )
+        return df.iloc[0].to_dict() if not df.empty else None
+
+def legacy_kline(db_path: str, symbol: str) -> pd.DataFrame:
+    """旧实现：每次调用新建连接"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA foreign_keys = ON")
+        return pd.read_sql(
+            "SELECT * FROM daily_price WHERE symbol = ? ORDER BY trade_date DESC LIMIT ?",
+            conn, params=(symbol, 100)
+        )
+
+def measure(func: Callable, symbols: List[str], rounds: int) -> Dict[str, float]:
+    """统计单次查询延迟（毫秒）"""
+    latencies = []
+    for _ in range(rounds):
+        for symbol in symbols:
+            start = time.perf_counter()
+            func(symbol)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.asarray(latencies)
+    return {
+        'mean_ms': latencies.mean(),
+        'p50_ms': np.percentile(latencies, 50),
+        'p99_ms': np.percentile(latencies, 99)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='连接池查询延迟基准测试')
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench_market.db')
+        storage = MarketDataStorage(db_path=db_path)
+        symbols = make_symbols(args.symbols)
+        logger.info(f"写入模拟数据: {args.symbols} 只股票 x {args.days} 天")
+        fill_daily_price(storage, symbols, args.days)
+
+        cases = {
+            'get_latest_price (旧)': lambda s: legacy_latest_price(db_path, s),
+            'get_latest_price (连接池)': storage.get_latest_price,
+            'get_kline_data (旧)': lambda s: legacy_kline(db_path, s),
+            'get_kline_data (连接池)': lambda s: storage.get_kline_data(s, freq='1d', limit=100),
+        }
+        print(f"\n{'用例':<28}{'mean(ms)':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+        for name, func in cases.items():
+            result = measure(func, symbols, args.rounds)
+            print(f"{name:<28}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+        print(f"\n连接池统计: {storage._pool.stats()}")
+        storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestEngine
+from data.storage.market_data import MarketDataStorage
+from data.storage.chunked_feed import ChunkedDailyFeed
+from strategies.factor_strategy import SimpleFactorStrategy
+from scripts.benchmark_bulk_write import make_daily_frame
+
+def traced(func):
+    """返回 (结果, 耗时秒, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+def suspend(df: pd.DataFrame, n_symbols: int, rate: float, seed: int = 0) -> pd.DataFrame:
+    """随机删除连续若干天的行情，模拟停牌（平均停牌10天）"""
+    rng = np.random.default_rng(seed)
+    n_days = len(df) // n_symbols
+    keep = np.ones((n_days, n_symbols), dtype=bool)
+    for _ in range(int(n_days * n_symbols * rate / 10)):
+        start, length = rng.integers(n_days), rng.integers(1, 20)
+        keep[start:start + length, rng.integers(n_symbols)] = False
+    return df[keep.ravel()]
+
+def main():
+    parser = argparse.ArgumentParser(description='全量加载 vs 分块流式回测的峰值内存')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--chunk-days', type=int, nargs='+', default=[20, 60, 250])
+    parser.add_argument('--suspend-rate', type=float, default=0.02, help='停牌的股票日比例')
+    args = parser.parse_args()
+
+    symbols = [f"{i:06d}.SZ" for i in range(args.symbols)]
+    dates = pd.bdate_range(end='2024-12-31', periods=args.years * 244)
+    start_date, end_date = dates[0].strftime('%Y%m%d'), dates[-1].strftime('%Y%m%d')
+    params = {'symbols': symbols, 'start_date': start_date, 'end_date': end_date,
+              'lookback_period': 20}
+    print(f"数据规模: {args.symbols} 只股票 x {len(dates)} 天 = {args.symbols * len(dates):,} 行\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = MarketDataStorage(db_path=os.path.join(tmp_dir, 'market.db'), cache_size=0)
+        for i in range(0, args.symbols, 200):
+            frame = make_daily_frame(symbols[i:i + 200], dates, seed=i)
+            storage.save_daily_data_bulk(suspend(frame, len(symbols[i:i + 200]), args.suspend_rate, seed=i))
+
+        def run_full():
+            # 一次性读入全部行情、整表计算因子后回测
+            data = storage.get_daily_panel(symbols, start_date, end_date).reset_index('symbol')
+            engine = BacktestEngine(storage)
+            strategy = SimpleFactorStrategy(storage, params)
+            strategy.cash = engine.initial_capital
+            strategy.initialize()
+            engine._run_bars(strategy, data)
+            return engine._calculate_results()
+
+        def run_stream(chunk_days):
+            feed = ChunkedDailyFeed(storage, symbols, start_date, end_date, chunk_days=chunk_days)
+            strategy = SimpleFactorStrategy(storage, dict(params, streaming=True))
+            return BacktestEngine(storage).run_stream(strategy, feed)
+
+        print(f"{'模式':<14}{'耗时(秒)':>10}{'峰值内存(MB)':>14}{'总收益率':>10}{'交易一致':>10}")
+        full, elapsed, peak = traced(run_full)
+        print(f"{'full':<14}{elapsed:>10.2f}{peak:>14.1f}{full['total_return']:>10.2%}")
+        for chunk_days in args.chunk_days:
+            result, elapsed, peak = traced(lambda: run_stream(chunk_days))
+            # 停牌股票的收益和选股须与全量因子计算一致
+            same = result['trades'].reset_index(drop=True).equals(full['trades'].reset_index(drop=True))
+            print(f"{f'stream-{chunk_days}d':<14}{elapsed:>10.2f}{peak:>14.1f}"
+                  f"{result['total_return']:>10.2%}{str(same):>10}")
+        storage._pool.close_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest_sweep import ParameterSweep
+from strategies.factor_strategy import SimpleFactorStrategy
+from scripts.benchmark_backtest_loop import make_bars
+
+def main():
+    parser = argparse.ArgumentParser(description='参数扫描并行加速基准测试')
+    parser.add_argument('--symbols', type=int, default=30)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    data = make_bars(args.symbols, args.years * 244)
+    symbols = data['symbol'].unique().tolist()
+    start_date = data.index[0].strftime('%Y%m%d')
+    end_date = data.index[-1].strftime('%Y%m%d')
+    grid = {
+        'lookback_period': [5, 10, 20, 40],
+        'position_size': [0.1, 0.2, 0.3, 0.5]
+    }
+    n_points = int(np.prod([len(v) for v in grid.values()]))
+    print(f"数据规模: {args.symbols} 只股票 x {args.years * 244} 天，{n_points} 组参数，CPU {os.cpu_count()} 核\n")
+
+    print(f"{'进程数':<8}{'耗时(秒)':>10}{'每组(秒)':>10}{'加速比':>8}")
+    baseline, reference = None, None
+    for workers in args.workers:
+        sweep = ParameterSweep(data_source=None, workers=workers)
+        start = time.perf_counter()
+        table = sweep.run(SimpleFactorStrategy, symbols, start_date, end_date, grid, data=data)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        if reference is None:
+            reference = table
+        else:
+            assert np.allclose(table['total_return'], reference['total_return'], equal_nan=True)
+        print(f"{workers:<8}{elapsed:>10.2f}{elapsed / n_points:>10.3f}{baseline / elapsed:>8.2f}")
+
+    print("\n最优参数（按夏普比率）:")
+    print(reference.sort_values('sharpe_ratio', ascending=False).head(5).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestEngine
+from strategies.weight_strategy import TargetWeightStrategy
+from scripts.benchmark_backtest_loop import make_bars
+
+def momentum_weights(data: pd.DataFrame, lookback: int = 20, top: float = 0.2) -> pd.DataFrame:
+    """动量前top比例股票等权（日期×股票）"""
+    close = data.pivot(columns='symbol', values='close')
+    momentum = close.pct_change(fill_method=None).rolling(lookback, min_periods=1).sum()
+    rank = momentum.rank(axis=1, ascending=False, pct=True)
+    selected = (rank <= top) & (momentum > 0)
+    return selected.div(selected.sum(axis=1).replace(0, np.nan), axis=0).fillna(0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化权重回测 vs 事件循环基准测试')
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--commission', type=float, default=0.0003)
+    args = parser.parse_args()
+
+    n_days = args.years * 244
+    data = make_bars(args.symbols, n_days)
+    # 随机剔除部分行情，模拟停牌
+    rng = np.random.default_rng(1)
+    data = data[rng.random(len(data)) > 0.01]
+    weights = momentum_weights(data)
+    print(f"数据规模: {args.symbols} 只股票 x {n_days} 天 = {len(data):,} 行\n")
+
+    engine = BacktestEngine(data_source=None, commission_rate=args.commission)
+    start = time.perf_counter()
+    vectorized = engine.run_weights(weights, data=data)
+    vectorized_time = time.perf_counter() - start
+
+    engine = BacktestEngine(data_source=None, commission_rate=args.commission)
+    strategy = TargetWeightStrategy(None, {'weights': weights, 'commission_rate': args.commission})
+    strategy.cash = engine.initial_capital
+    strategy.initialize()
+    start = time.perf_counter()
+    engine._run_bars(strategy, data)
+    event_time = time.perf_counter() - start
+
+    event_equity = engine.daily_stats['total_value']
+    diff = np.max(np.abs(vectorized['equity_curve'].to_numpy() - event_equity) / event_equity)
+
+    print(f"{'实现':<12}{'耗时(秒)':>12}")
+    print(f"{'event':<12}{event_time:>12.3f}")
+    print(f"{'vectorized':<12}{vectorized_time:>12.3f}")
+    print(f"\n加速比: {event_time / vectorized_time:.1f}x，净值最大相对误差: {diff:.2e}")
+    print(f"总收益率: {vectorized['total_return']:.2%}，"
+          f"日均换手: {vectorized['turnover'].mean():.2%}，"
+          f"总佣金: {vectorized['commission'].sum():,.2f}")
+
+if __name__ == "__main__":
+    main()
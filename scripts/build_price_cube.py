@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import logging
+import argparse
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.storage.market_data import MarketDataStorage
+from data.storage.price_cube import PriceCube
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='构建/追加内存映射价格立方体')
+    parser.add_argument('--db', default='data/market.db')
+    parser.add_argument('--path', default='data/price_cube')
+    parser.add_argument('--start', default='20150101')
+    parser.add_argument('--end', default=datetime.now().strftime('%Y%m%d'))
+    parser.add_argument('--append', action='store_true', help='在已有立方体后追加新交易日')
+    args = parser.parse_args()
+
+    storage = MarketDataStorage(db_path=args.db)
+    start = time.perf_counter()
+    if args.append:
+        cube = PriceCube(args.path, mode='r+')
+        cube.append(storage, args.end)
+    else:
+        cube = PriceCube.build(storage, args.path, args.start, args.end)
+    logger.info(f"完成，用时 {time.perf_counter() - start:.1f} 秒")
+
+    # 挂载耗时（回测启动时的开销）
+    start = time.perf_counter()
+    cube = PriceCube(args.path)
+    close = cube.field('close')
+    logger.info(f"挂载用时 {(time.perf_counter() - start) * 1000:.1f} 毫秒，close矩阵 {close.shape}")
+
+if __name__ == "__main__":
+    main()
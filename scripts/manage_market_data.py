@@ -4,17 +4,22 @@ import time
 from typing import List
 from data.data_source.tushare_source import TushareDataSource
 from data.storage.market_data import MarketDataStorage
+from data.storage.factor_store import FactorStore
+from strategies.factor_base import BaseFactor, MomentumFactor
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MarketDataManager:
-    def __init__(self, token: str, symbols: List[str]):
+    def __init__(self, token: str, symbols: List[str], factors: List[BaseFactor] = None):
         self.data_source = TushareDataSource(token)
         self.storage = MarketDataStorage()
         self.symbols = symbols
         self.is_trading_time = False
+        # 日线入库后增量更新的全市场因子
+        self.factor_store = FactorStore(self.storage)
+        self.factors = factors if factors is not None else [MomentumFactor({'lookback_period': 20})]
         
     def _is_trading_time(self) -> bool:
         """判断是否为交易时段"""
@@ -44,6 +49,17 @@ class MarketDataManager:
             logger.info("日线数据更新完成")
         except Exception as e:
             logger.error(f"日线数据更新失败: {str(e)}")
+            return
+        self.update_factors()
+
+    def update_factors(self):
+        """增量计算新入库交易日的因子值"""
+        logger.info("开始更新因子库...")
+        try:
+            updated = self.factor_store.update_all(self.factors)
+            logger.info(f"因子库更新完成: {updated}")
+        except Exception as e:
+            logger.error(f"因子库更新失败: {str(e)}")
     
     def update_minute_data(self):
         """更新分钟数据"""
@@ -13,7 +13,7 @@ def test_qlib_factors():
         
         # 测试因子
         params = {'lookback_period': 20}
-        factor = QlibMomentumFactor(params)
+        factor = QlibMomentumFactor(params, data_source.loader)
         
         # 获取测试数据
         symbol = '000001.SZ'
@@ -30,7 +30,7 @@ def test_qlib_factors():
             logger.info(factor_values.head())
             
             # 获取Alpha158因子集
-            alpha158_df = factor.get_alpha158_factors(symbol, start_date, end_date)
+            alpha158_df = factor.get_alpha158_factors([symbol], start_date, end_date)
             logger.info(f"\nAlpha158因子集包含 {len(alpha158_df.columns)} 个因子")
             logger.info("因子列表:")
             logger.info(alpha158_df.columns.tolist()[:5])  # 显示前5个因子
@@ -62,7 +62,7 @@ def test_factor_calculation():
     try:
         data_source = QlibDataSource()
         params = {'lookback_period': 20}
-        factor = QlibMomentumFactor(params)
+        factor = QlibMomentumFactor(params, data_source.loader)
         
         # 测试单个股票的因子计算
         symbol = '000001.SZ'
@@ -78,7 +78,7 @@ def test_factor_calculation():
         
         # 测试Alpha158因子集
         alpha158_df = factor.get_alpha158_factors(
-            symbol=symbol,
+            instruments=[symbol],
             start_date='20230101',
             end_date='20230131'
         )
@@ -1,22 +1,82 @@
+import os
+import sys
 import time
 import logging
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from data.data_source.tushare_source import TushareDataSource
 from data.storage.market_data import MarketDataStorage
+from strategies.factor_base import MomentumFactor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def update_realtime_loop(token: str, symbols: List[str], interval: int = 3):
-    """实时数据更新循环"""
+def warm_up_factor(factor: MomentumFactor, storage: MarketDataStorage, symbols: List[str],
+                   days: int = 120) -> Dict[str, pd.Timestamp]:
+    """用本地日线初始化因子的增量状态，返回各股票已计入状态的最后交易日"""
+    end = datetime.now().strftime('%Y%m%d')
+    start = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+    close = storage.get_daily_panel(symbols, start, end, ['close'], layout='wide')['close']
+    today = pd.Timestamp(datetime.now().date())
+    applied = {}
+    for symbol in close.columns:
+        # 当日日线可能是盘中快照，只用已收盘的bar
+        history = close[symbol].loc[:today - pd.Timedelta(days=1)].dropna()
+        factor.warm_up(symbol, history.to_frame('close'))
+        if not history.empty:
+            applied[symbol] = history.index[-1]
+    return applied
+
+def update_realtime_loop(token: str, symbols: List[str], interval: int = 3, close_time: str = '15:00'):
+    """实时数据更新循环
+
+    盘中按最新价O(1)试算当日动量因子（preview，不改变状态）；
+    收盘后、或出现新交易日的行情时，把该交易日最后的价格作为日线收盘价O(1)计入因子状态（update），
+    进程跨多个交易日运行时因子始终基于最新的收盘价
+    """
     data_source = TushareDataSource(token)
     storage = MarketDataStorage()
-    
+    factor = MomentumFactor({'lookback_period': 20})
+    applied = warm_up_factor(factor, storage, symbols)  # {股票: 已计入状态的最后交易日}
+    pending: Dict[str, tuple] = {}                       # {股票: (交易日, 当日最新价)}，尚未收盘计入
+
     while True:
         try:
             logger.info("更新实时数据...")
             storage.update_realtime_data(data_source, symbols)
+            now = datetime.now()
+            session_closed = now.strftime('%H:%M') >= close_time
+            for symbol in symbols:
+                latest = storage.get_latest_price(symbol)
+                price = latest and (latest.get('price') or latest.get('close'))
+                if not price:
+                    continue
+                date = pd.Timestamp(latest.get('time') or latest.get('trade_date')).normalize()
+                if symbol in applied and date <= applied[symbol]:
+                    # 该交易日已计入（停牌、非交易日或已收盘）
+                    continue
+
+                previous = pending.get(symbol)
+                if previous is not None and previous[0] < date:
+                    # 新交易日开始，上一交易日未在收盘后计入时用其最后价格补记
+                    factor.update(symbol, {'close': previous[1]})
+                    applied[symbol] = previous[0]
+
+                if session_closed and date == pd.Timestamp(now.date()):
+                    value = factor.update(symbol, {'close': float(price)})
+                    applied[symbol] = date
+                    pending.pop(symbol, None)
+                    logger.info(f"{symbol} 收盘价 {price:.2f}, 动量因子 {value:.4f}")
+                else:
+                    pending[symbol] = (date, float(price))
+                    logger.info(f"{symbol} 最新价 {price:.2f}, 动量因子 {factor.preview(symbol, {'close': price}):.4f}")
             time.sleep(interval)  # 休眠3秒
-            
+
         except Exception as e:
             logger.error(f"更新失败: {str(e)}")
             time.sleep(interval)
@@ -25,5 +85,5 @@ if __name__ == "__main__":
     # 配置
     TUSHARE_TOKEN = "your_token_here"
     SYMBOLS = ['000001.SZ', '600000.SH']  # 示例股票
-    
-    update_realtime_loop(TUSHARE_TOKEN, SYMBOLS) 
\ No newline at end of file
+
+    update_realtime_loop(TUSHARE_TOKEN, SYMBOLS)
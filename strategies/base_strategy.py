@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
 import pandas as pd
 from datetime import datetime
+from utils.ledger import ColumnarLedger, TRADE_FIELDS
 
 class BaseStrategy(ABC):
     def __init__(self, data_source):
@@ -9,8 +10,12 @@ class BaseStrategy(ABC):
         self.positions: Dict[str, int] = {}        # 当前持仓 {symbol: quantity}
         self.positions_value: Dict[str, float] = {} # 持仓市值 {symbol: value}
         self.cash: float = 0.0                     # 可用资金
-        self.trades: List[Dict] = []               # 交易记录
+        self.trades = ColumnarLedger(TRADE_FIELDS) # 交易记录（列式存储）
         self.current_time: Optional[datetime] = None # 当前回测时间点
+        self.price_snapshot = None                 # 回测引擎提供的当前bar价格快照，实盘为None
+        self.history_window: int = 0               # 需要引擎维护的回看bar数，0表示不需要
+        self.history = None                        # 回测引擎维护的最近history_window个bar收盘价
+        self.execution = None                      # 回测撮合模拟器，设置后buy/sell只提交订单
         
     @abstractmethod
     def initialize(self):
@@ -21,9 +26,23 @@ class BaseStrategy(ABC):
     def on_bar(self, bar: pd.DataFrame):
         """K线更新时的回调"""
         pass
-    
+
+    def on_daily_bar(self, bar):
+        """日线回测回调，bar为DailyBarView，可按列直接取当日数组
+        默认转换为长表交给on_bar；只用到少数列的策略可重写以避免逐日构造DataFrame
+        """
+        self.on_bar(bar.to_frame())
+
+    def on_minute_bar(self, bar):
+        """分钟线回调（日内回测），bar为BarView，可按字段直接取当前行数组
+        默认转换为长表交给on_bar；高频策略应重写以避免逐bar构造DataFrame
+        """
+        self.on_bar(bar.to_frame())
+
     def buy(self, symbol: str, quantity: int, price: float):
         """买入接口"""
+        if self.execution is not None:
+            return self.execution.submit(symbol, quantity, price)
         cost = quantity * price
         if cost > self.cash:
             return False
@@ -46,6 +65,8 @@ class BaseStrategy(ABC):
         
     def sell(self, symbol: str, quantity: int, price: float):
         """卖出接口"""
+        if self.execution is not None:
+            return self.execution.submit(symbol, -quantity, price)
         if symbol not in self.positions or self.positions[symbol] < quantity:
             return False
             
@@ -74,11 +95,19 @@ class BaseStrategy(ABC):
         """获取持仓数量"""
         return self.positions.get(symbol, 0)
         
+    def get_price(self, symbol: str) -> float:
+        """获取当前价格
+        回测中读取引擎的价格快照（当前bar收盘价，无未来数据）；实盘才查询数据源
+        """
+        if self.price_snapshot is not None:
+            return self.price_snapshot.get(symbol, 0.0)
+        return self.data_source.get_latest_price(symbol)
+        
     def get_positions_value(self) -> float:
         """获取当前持仓市值"""
         total_value = 0.0
         for symbol, quantity in self.positions.items():
-            current_price = self.data_source.get_latest_price(symbol)
+            current_price = self.get_price(symbol)
             total_value += quantity * current_price
         return total_value
         
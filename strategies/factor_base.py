@@ -1,15 +1,141 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from collections import deque
+from typing import Dict, List, Mapping
+import numpy as np
 import pandas as pd
 
+class RollingSum:
+    """定长窗口滚动求和的增量版本，每次push为O(1)
+
+    与 Series.rolling(window, min_periods).sum() 使用相同的补偿求和
+    （Kahan，增删分别补偿）和相同的窗口重置规则，结果逐位一致。
+    """
+    __slots__ = ('window', 'min_periods', '_buffer', '_pos', '_count', '_nobs', '_sum',
+                 '_comp_add', '_comp_remove', '_same', '_prev')
+
+    def __init__(self, window: int, min_periods: int = 1):
+        self.window = window
+        self.min_periods = min_periods
+        self._buffer = [np.nan] * window
+        self._pos = 0
+        self._count = 0
+        self._nobs = 0
+        self._sum = self._comp_add = self._comp_remove = 0.0
+        self._same = 0
+        self._prev = np.nan
+
+    def push(self, value: float) -> float:
+        """加入新值（窗口满时移出最旧值），返回当前窗口和"""
+        state = self._advance(value)
+        self._nobs, self._sum, self._comp_add, self._comp_remove, self._same, self._prev = state
+        self._buffer[self._pos] = value
+        self._pos = (self._pos + 1) % self.window
+        self._count += 1
+        return self._result(*state)
+
+    def peek(self, value: float) -> float:
+        """假设加入value后的窗口和，不改变状态"""
+        return self._result(*self._advance(value))
+
+    def _advance(self, value: float) -> tuple:
+        if self._count == 0 or self.window == 1:
+            nobs, total, comp_add, comp_remove, same, prev = 0, 0.0, 0.0, 0.0, 0, value
+        else:
+            nobs, total, comp_add, comp_remove = self._nobs, self._sum, self._comp_add, self._comp_remove
+            same, prev = self._same, self._prev
+            if self._count >= self.window:
+                old = self._buffer[self._pos]
+                if old == old:
+                    nobs -= 1
+                    y = -old - comp_remove
+                    t = total + y
+                    comp_remove = t - total - y
+                    total = t
+        if value == value:
+            nobs += 1
+            y = value - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            same = same + 1 if value == prev else 1
+            prev = value
+        return nobs, total, comp_add, comp_remove, same, prev
+
+    def _result(self, nobs, total, comp_add, comp_remove, same, prev) -> float:
+        if nobs == 0 == self.min_periods:
+            return 0.0
+        if nobs >= self.min_periods:
+            # 窗口内全为同一值时直接相乘，消除浮点残差
+            return prev * nobs if same >= nobs else total
+        return np.nan
+
 class BaseFactor(ABC):
+    fields: List[str] = ['close']  # 计算所需的行情字段
+    online_window: int = 0         # 通用增量计算保留的最近bar数，0表示保留全部
+
     def __init__(self, params: dict):
         self.params = params
-        
+
+    @property
+    def warmup_period(self) -> int:
+        """增量计算新日期时需要向前多取的交易日数"""
+        return int(self.params.get('lookback_period', 20)) + 1
+
     @abstractmethod
     def calculate(self, data: pd.DataFrame) -> pd.Series:
         """计算因子值"""
         pass
+
+    def calculate_panel(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """截面计算：panel为{字段: 日期×股票矩阵}，返回日期×股票因子矩阵
+        默认逐只调用calculate，子类应重写为整表运算
+        """
+        frame = panel[self.fields[0]]
+        result = {}
+        for symbol in frame.columns:
+            df = pd.DataFrame({field: panel[field][symbol] for field in self.fields}).dropna(how='all')
+            if not df.empty:
+                result[symbol] = self.calculate(df)
+        return pd.DataFrame(result).reindex(index=frame.index, columns=frame.columns)
+    
+    def _online_states(self) -> Dict:
+        states = getattr(self, '_online', None)
+        if states is None:
+            states = self._online = {}
+        return states
+
+    def reset_online(self):
+        """清空全部股票的增量计算状态"""
+        self._online = {}
+
+    def warm_up(self, symbol: str, history: pd.DataFrame) -> float:
+        """用历史bar（按时间正序）初始化某只股票的增量状态，返回最新因子值"""
+        self._online_states().pop(symbol, None)
+        value = np.nan
+        for bar in history[self.fields].to_dict('records'):
+            value = self.update(symbol, bar)
+        return value
+
+    def update(self, symbol: str, bar: Mapping[str, float]) -> float:
+        """新bar收盘后增量更新，返回该股票最新因子值（与对全部历史calculate的末值一致）
+        默认保留最近online_window根bar并重算，子类应重写为O(1)更新
+        """
+        states = self._online_states()
+        window = states.get(symbol)
+        if window is None:
+            window = states[symbol] = deque(maxlen=self.online_window or None)
+        window.append({field: bar[field] for field in self.fields})
+        return float(self.calculate(pd.DataFrame(list(window))).iloc[-1])
+
+    def preview(self, symbol: str, bar: Mapping[str, float]) -> float:
+        """盘中用未完成的bar（如最新价）试算因子值，不改变状态"""
+        window = list(self._online_states().get(symbol, []))
+        window.append({field: bar[field] for field in self.fields})
+        return float(self.calculate(pd.DataFrame(window)).iloc[-1])
+
+    def update_many(self, bars: Mapping[str, Mapping[str, float]]) -> Dict[str, float]:
+        """一个截面的新bar {股票: bar}，逐只增量更新"""
+        return {symbol: self.update(symbol, bar) for symbol, bar in bars.items()}
     
     @abstractmethod
     def generate_signal(self, factor_value: float) -> int:
@@ -31,4 +157,42 @@ class MomentumFactor(BaseFactor):
         return returns.rolling(
             window=self.params.get('lookback_period', 20),
             min_periods=1
-        ).sum() 
\ No newline at end of file
+        ).sum()
+
+    def calculate_panel(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """整表计算动量因子
+        停牌日无收益，复牌日收益相对停牌前最后收盘价（与逐只pct_change一致）；
+        回看窗口按面板交易日计，窗口内有停牌时与逐只计算的结果不同
+        """
+        close = panel['close']
+        returns = close / close.ffill().shift(1) - 1
+        return returns.rolling(
+            window=self.params.get('lookback_period', 20),
+            min_periods=1
+        ).sum()
+
+    def update(self, symbol: str, bar: Mapping[str, float]) -> float:
+        """O(1)增量更新：保存上一收盘价和收益率滚动和"""
+        states = self._online_states()
+        state = states.get(symbol)
+        if state is None:
+            state = states[symbol] = [np.nan, RollingSum(self.params.get('lookback_period', 20))]
+        close, prev = float(bar['close']), state[0]
+        value = state[1].push(close / prev - 1 if prev != 0 else np.nan)
+        state[0] = close
+        return value
+
+    def preview(self, symbol: str, bar: Mapping[str, float]) -> float:
+        state = self._online_states().get(symbol)
+        if state is None:
+            return np.nan
+        close, prev = float(bar['close']), state[0]
+        return state[1].peek(close / prev - 1 if prev != 0 else np.nan)
+
+    def generate_signal(self, factor_value: float) -> int:
+        """动量为正买入，低于止损阈值卖出"""
+        if factor_value > 0:
+            return 1
+        if factor_value < self.params.get('stop_threshold', -0.02):
+            return -1
+        return 0 
\ No newline at end of file
@@ -1,4 +1,6 @@
 from strategies.base_strategy import BaseStrategy
+from strategies.factor_base import MomentumFactor
+from factors.factor_engine import FactorEngine
 import pandas as pd
 import numpy as np
 from typing import Dict, List
@@ -15,54 +17,48 @@ class SimpleFactorStrategy(BaseStrategy):
         self.start_date = params.get('start_date')               # 开始日期
         self.end_date = params.get('end_date')                   # 结束日期
         self.cash = params.get('initial_capital', 1000000)       # 初始资金，默认100万
+        self.streaming = params.get('streaming', False)          # 流式回测：不预加载历史，只保留回看窗口
+        if self.streaming:
+            # 引擎只需提供当日收盘价行，回看窗口保存收益率
+            self.history_window = 1
         
     def initialize(self):
         """策略初始化"""
         print(f"\n=== 策略初始化 ===")
         print(f"初始资金: {self.cash:,.2f}")
+
+        if self.streaming:
+            self.factor_data = {}
+            self._returns = None      # 最近lookback_period个交易日的收益率（bar × 股票）
+            self._last_close = np.empty(0)  # 各股票最近一个有效收盘价（停牌日沿用）
+            self._bar_close = np.empty(0)   # 当日收盘价，停牌为NaN
+            return
+
+        # 复用外部在更长区间上预先计算好的因子（如walk-forward），只按回测区间切片
+        factor_data = self.params.get('factor_data')
+        if factor_data is not None:
+            start, end = pd.Timestamp(self.start_date), pd.Timestamp(self.end_date)
+            self.factor_data = {name: df.loc[start:end] for name, df in factor_data.items()}
+            return
         
-        # 获取历史数据
-        self.history_data = {}
-        for symbol in self.symbols:
-            df = self.data_source.get_daily_data(
-                symbol,
-                start_date=self.params['start_date'],
-                end_date=self.params['end_date']
-            )
-            if df is not None and not df.empty:
-                self.history_data[symbol] = df
-                print(f"获取到 {symbol} 的历史数据: {len(df)} 条")
-        
-        # 初始化因子数据
+        # 全部股票一次读取面板，因子整表计算
         self.factor_data = self._prepare_factors()
+        momentum = self.factor_data['momentum']
+        print(f"因子面板: {momentum.shape[0]} 天 x {momentum.shape[1]} 只股票")
         
     def _prepare_factors(self) -> Dict[str, pd.DataFrame]:
-        """准备动量因子数据"""
-        factor_data = {}
-        for symbol in self.symbols:
-            df = self.history_data.get(symbol)
-            if df is not None and not df.empty:
-                try:
-                    print(f"\n处理 {symbol} 的因子数据...")
-                    # 计算收益率
-                    df['returns'] = df['close'].pct_change()
-                    print(f"收益率范围: {df['returns'].min():.4f} 到 {df['returns'].max():.4f}")
-                    
-                    # 计算动量因子 (过去N日收益)
-                    df['momentum'] = df['returns'].rolling(
-                        window=self.lookback_period, 
-                        min_periods=1
-                    ).sum()
-                    
-                    print(f"数据点数: {len(df)}")
-                    print(f"动量因子范围: {df['momentum'].min():.4f} 到 {df['momentum'].max():.4f}")
-                    print(f"非空动量因子数: {df['momentum'].count()}")
-                    factor_data[symbol] = df
-                except Exception as e:
-                    print(f"计算 {symbol} 因子时出错: {str(e)}")
-                    import traceback
-                    print(traceback.format_exc())
-        return factor_data
+        """准备动量因子面板 {因子名/行情字段: 日期×股票矩阵}"""
+        engine = FactorEngine({
+            'momentum': MomentumFactor({'lookback_period': self.lookback_period})
+        }, store=self.params.get('factor_store'))
+        return engine.run(self.data_source, self.symbols, self.start_date, self.end_date)
+        
+    def _factor_row(self, name: str, date) -> pd.Series:
+        """某个因子在当日的截面（一行），没有当日数据时为空"""
+        df = self.factor_data.get(name)
+        if df is None or date not in df.index:
+            return pd.Series(dtype=float)
+        return df.loc[date]
         
     def _get_current_factors(self, bar: pd.DataFrame) -> Dict[str, float]:
         """获取当前因子值"""
@@ -70,18 +66,46 @@ class SimpleFactorStrategy(BaseStrategy):
         current_date = bar.index[0]
         print(f"\n当前日期: {current_date}")
         
-        for symbol in self.symbols:
-            if symbol in self.factor_data:
-                df = self.factor_data[symbol]
-                if current_date in df.index:
-                    momentum = df.loc[current_date, 'momentum']
-                    if not pd.isna(momentum):  # 确保不是 NaN
-                        current_factors[symbol] = momentum
-                        print(f"{symbol} 动量因子值: {momentum:.4f}")
-                    else:
-                        print(f"警告: {symbol} 在 {current_date} 的动量因子为 NaN")
-                else:
-                    print(f"警告: {symbol} 没有 {current_date} 的数据")
+        if self.streaming:
+            return self._rolling_factors(bar)
+        
+        row = self._factor_row('momentum', current_date).dropna()
+        if row.empty:
+            print(f"警告: 没有 {current_date} 的因子数据")
+        else:
+            print(f"有效动量因子数: {len(row)}")
+        current_factors.update(row.items())
+        return current_factors
+        
+    def _rolling_factors(self, bar: pd.DataFrame) -> Dict[str, float]:
+        """由回看窗口计算当前动量因子
+
+        与MomentumFactor.calculate_panel一致：停牌日无收益，复牌日收益相对停牌前最后收盘价，
+        窗口为最近lookback_period个交易日（求和顺序不同，只有舍入级差异）；
+        与全量因子截面一样包含当日停牌但窗口内有收益的股票
+        """
+        from backtest import RollingWindow
+
+        close = self._bar_close = self.history.to_array()[-1]
+        if self._returns is None:
+            self._returns = RollingWindow(self.lookback_period, self.history.symbol_index)
+        if len(close) > len(self._last_close):
+            self._last_close = np.concatenate(
+                [self._last_close, np.full(len(close) - len(self._last_close), np.nan)])
+        self._returns.push(close / self._last_close - 1)
+        self._last_close = np.where(np.isnan(close), self._last_close, close)
+
+        returns = self._returns.to_array()
+        valid = ~np.isnan(returns)
+        momentum = np.where(valid, returns, 0.0).sum(axis=0)
+        has_value = valid.any(axis=0)
+        
+        universe = set(self.symbols) if self.symbols else None
+        current_factors = {}
+        for symbol, i in self.history.symbol_index.items():
+            if not has_value[i] or (universe is not None and symbol not in universe):
+                continue
+            current_factors[symbol] = float(momentum[i])
         return current_factors
         
     def _generate_signals(self, current_factors: Dict[str, float]) -> Dict[str, int]:
@@ -117,18 +141,16 @@ class SimpleFactorStrategy(BaseStrategy):
     def _execute_trades(self, signals: Dict[str, int]):
         """执行交易"""
         print("\n执行交易...")
+        closes = None if self.streaming else self._factor_row('close', self.current_time)
         for symbol, signal in signals.items():
-            if symbol not in self.factor_data:
-                print(f"警告: {symbol} 不在因子数据中")
-                continue
-            
-            df = self.factor_data[symbol]
-            current_date = self.current_time
-            if current_date not in df.index:
-                print(f"警告: {symbol} 没有当前日期 {current_date} 的数据")
+            if self.streaming:
+                # 流式回测价格取当日收盘价行，停牌股票与全量模式一样跳过
+                current_price = self._bar_close[self.history.symbol_index[symbol]]
+            else:
+                current_price = closes.get(symbol)
+            if current_price is None or pd.isna(current_price):
+                print(f"警告: {symbol} 没有当前日期 {self.current_time} 的数据")
                 continue
-            
-            current_price = df.loc[current_date, 'close']
             print(f"{symbol} 信号: {signal}, 当前价格: {current_price:.2f}")
             
             if signal == 1 and symbol not in self.positions:
@@ -152,6 +174,10 @@ class SimpleFactorStrategy(BaseStrategy):
                     else:
                         print(f"卖出失败")
 
+    def on_daily_bar(self, bar):
+        """回测引擎回调：只用到日期和股票列，直接使用DailyBarView"""
+        self.on_bar(bar)
+
     def on_bar(self, bar: pd.DataFrame):
         """K线更新时的回调"""
         # 获取当前的因子值
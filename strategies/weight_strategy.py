@@ -0,0 +1,62 @@
+from strategies.base_strategy import BaseStrategy
+import pandas as pd
+import numpy as np
+
+class TargetWeightStrategy(BaseStrategy):
+    """按目标权重矩阵每日收盘调仓（事件循环版本）
+
+    与BacktestEngine.run_weights的向量化实现逐日等价，
+    主要用于核对向量化结果，或在权重之外还需要逐bar逻辑时使用。
+    """
+    def __init__(self, data_source, params: dict):
+        super().__init__(data_source)
+        self.params = params
+        self.weights: pd.DataFrame = params['weights']                # 日期×股票 目标权重
+        self.commission_rate = params.get('commission_rate', 0.0003)  # 佣金费率
+
+    def initialize(self):
+        """策略初始化"""
+        self.weights = self.weights.sort_index()
+
+    def _current_weights(self) -> pd.Series:
+        """当前日期生效的目标权重（沿用最近一次）"""
+        i = self.weights.index.searchsorted(self.current_time, side='right') - 1
+        if i < 0:
+            return pd.Series(dtype=float)
+        return self.weights.iloc[i].fillna(0.0)
+
+    def on_daily_bar(self, bar):
+        """回测引擎回调：只用到股票和收盘价列，直接使用DailyBarView"""
+        self.on_bar(bar)
+
+    def on_bar(self, bar: pd.DataFrame):
+        """调整到目标持仓，允许零碎股"""
+        equity = self.cash + self.get_positions_value()
+        weights = self._current_weights()
+        commission = 0.0
+
+        for symbol, price in zip(bar['symbol'].tolist(), bar['close'].tolist()):
+            if np.isnan(price) or price <= 0:
+                continue
+            current = self.positions.get(symbol, 0.0)
+            quantity = weights.get(symbol, 0.0) * equity / price
+            delta = quantity - current
+            if delta == 0:
+                continue
+
+            commission += abs(delta) * price * self.commission_rate
+            self.cash -= delta * price
+            if quantity == 0:
+                self.positions.pop(symbol, None)
+            else:
+                self.positions[symbol] = quantity
+            self.positions_value[symbol] = quantity * price
+            self.trades.append({
+                'time': self.current_time,
+                'symbol': symbol,
+                'direction': 'buy' if delta > 0 else 'sell',
+                'quantity': abs(delta),
+                'price': price
+            })
+
+        self.cash -= commission
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, Mapping
+
+TRADE_FIELDS = {
+    'time': 'datetime64[ns]',
+    'symbol': 'category',
+    'direction': 'category',
+    'quantity': 'float64',
+    'price': 'float64',
+    'cost': 'float64',
+    'revenue': 'float64',
+    'commission': 'float64',
+    'stamp_duty': 'float64'
+}
+
+DAILY_STATS_FIELDS = {
+    'date': 'datetime64[ns]',
+    'cash': 'float64',
+    'positions_value': 'float64',
+    'total_value': 'float64'
+}
+
+class ColumnarLedger:
+    """预分配、可增长的列式记录表（结构化NumPy数组）
+
+    fields: {字段名: dtype}，dtype为'category'的字符串字段按编码存储（int32）。
+    append接受与原先list.append相同的dict，未给出的字段记为缺失值；
+    容量不足时按2倍扩容，导出时直接按列生成DataFrame。
+    """
+    GROWTH = 2
+
+    def __init__(self, fields: Dict[str, str], capacity: int = 1024):
+        self.fields = dict(fields)
+        self._categories = {name: {} for name, kind in fields.items() if kind == 'category'}
+        self._labels = {name: [] for name in self._categories}
+        self._dtype = np.dtype([
+            (name, 'int32' if kind == 'category' else kind) for name, kind in fields.items()
+        ])
+        # (字段名, 类型, 缺失值)，append时按此顺序组装一行
+        self._layout = tuple(
+            (name, 'category' if name in self._categories else self._dtype[name].kind, self._missing_value(name))
+            for name in fields
+        )
+        self._data = np.empty(max(capacity, 1), dtype=self._dtype)
+        self._size = 0
+
+    def _missing_value(self, name: str):
+        kind = self._dtype[name]
+        if name in self._categories:
+            return -1
+        if kind.kind == 'M':
+            return np.datetime64('NaT')
+        if kind.kind == 'f':
+            return np.nan
+        return 0
+
+    def append(self, record: Mapping[str, Any] = None, **values):
+        """追加一条记录"""
+        if record is None:
+            record = values
+        elif values:
+            record = {**record, **values}
+        if self._size == len(self._data):
+            self._grow()
+
+        get = record.get
+        row = []
+        for name, kind, missing in self._layout:
+            value = get(name)
+            if value is None:
+                row.append(missing)
+            elif kind == 'category':
+                code = self._categories[name].get(value)
+                row.append(self._encode(name, value) if code is None else code)
+            elif kind == 'M':
+                row.append(value.asm8 if isinstance(value, pd.Timestamp) else np.datetime64(value, 'ns'))
+            else:
+                row.append(value)
+        self._data[self._size] = tuple(row)
+        self._size += 1
+
+    def extend(self, columns: Mapping[str, Any]):
+        """按列批量追加（各列等长），未给出的字段记为缺失值"""
+        n = len(next(iter(columns.values())))
+        while self._size + n > len(self._data):
+            self._grow()
+        rows = slice(self._size, self._size + n)
+        for name, _, missing in self._layout:
+            values = columns.get(name)
+            if values is None:
+                self._data[name][rows] = missing
+            elif name in self._categories:
+                self._data[name][rows] = [self._encode(name, v) for v in values]
+            else:
+                self._data[name][rows] = np.asarray(values, dtype=self._dtype[name])
+        self._size += n
+
+    def _encode(self, name: str, value: str) -> int:
+        codes = self._categories[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._labels[name].append(value)
+        return code
+
+    def _grow(self):
+        grown = np.empty(len(self._data) * self.GROWTH, dtype=self._dtype)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+
+    def clear(self):
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def column(self, name: str) -> np.ndarray:
+        """单列数据（数值列为零拷贝视图，分类列解码为字符串数组）"""
+        values = self._data[name][:self._size]
+        if name in self._categories:
+            labels = np.asarray(self._labels[name] + [None], dtype=object)
+            return labels[values]
+        return values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError(key)
+        return self._record(self._data[key])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._size):
+            yield self._record(self._data[i])
+
+    def _record(self, row) -> Dict:
+        record = {}
+        for name in self.fields:
+            value = row[name]
+            if name in self._categories:
+                value = self._labels[name][value] if value >= 0 else None
+            elif self._dtype[name].kind == 'M':
+                value = pd.Timestamp(value)
+            else:
+                value = value.item()
+            record[name] = value
+        return record
+
+    def to_frame(self) -> pd.DataFrame:
+        """按列导出为DataFrame（分类字段为Categorical）"""
+        columns = {}
+        for name in self.fields:
+            values = self._data[name][:self._size]
+            if name in self._categories:
+                columns[name] = pd.Categorical.from_codes(values, categories=self._labels[name])
+            else:
+                columns[name] = values.copy()
+        return pd.DataFrame(columns)
+
+    @property
+    def nbytes(self) -> int:
+        """已用记录占用的字节数"""
+        return self._size * self._dtype.itemsize
+
+    def memory_usage(self) -> Dict[str, int]:
+        """内存占用（已用/已分配字节数、行数与容量）"""
+        return {
+            'rows': self._size,
+            'capacity': len(self._data),
+            'used_bytes': self.nbytes,
+            'allocated_bytes': self._data.nbytes,
+            'category_labels': sum(len(labels) for labels in self._labels.values())
+        }
@@ -0,0 +1,99 @@
+import time
+import contextlib
+from array import array
+from functools import wraps
+from typing import Dict, Iterable, Iterator
+import numpy as np
+import pandas as pd
+
+class PhaseProfiler:
+    """按阶段统计墙钟时间、CPU时间、调用次数和单次耗时分位数
+
+    wrap把对象上的方法替换为计时版本（实例属性），未开启时对象保持原样，
+    热循环中没有任何额外判断；单次耗时存入array('d')，百万次调用约8MB。
+    """
+    PERCENTILES = [50, 95, 99]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._wall: Dict[str, float] = {}
+        self._cpu: Dict[str, float] = {}
+        self._samples: Dict[str, array] = {}
+        self._started = time.perf_counter()
+        self._last_bar = None
+
+    def wrap(self, obj, names: Iterable[str], prefix: str = ''):
+        """为obj的方法加计时，阶段名为 prefix + 方法名；重复调用不会重复包装"""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is None or getattr(method, '_profiled', False):
+                continue
+            setattr(obj, name, self._timed(prefix + name.lstrip('_'), method))
+
+    def _timed(self, phase: str, func):
+        perf_counter, process_time = time.perf_counter, time.process_time
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            wall, cpu = perf_counter(), process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - wall
+                self._cpu[phase] = self._cpu.get(phase, 0.0) + process_time() - cpu
+                self._wall[phase] = self._wall.get(phase, 0.0) + elapsed
+                # reset后写入新的样本数组
+                self._samples.setdefault(phase, array('d')).append(elapsed)
+        wrapper._profiled = True
+        return wrapper
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """计时一段代码"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - wall
+            self._cpu[name] = self._cpu.get(name, 0.0) + time.process_time() - cpu
+            self._wall[name] = self._wall.get(name, 0.0) + elapsed
+            self._samples.setdefault(name, array('d')).append(elapsed)
+
+    def start_bars(self):
+        """bar循环开始"""
+        self._last_bar = time.perf_counter()
+
+    def mark_bar(self):
+        """一根bar处理完毕，记录自上一根以来的延迟"""
+        now = time.perf_counter()
+        if self._last_bar is not None:
+            elapsed = now - self._last_bar
+            self._wall['bar'] = self._wall.get('bar', 0.0) + elapsed
+            self._samples.setdefault('bar', array('d')).append(elapsed)
+        self._last_bar = now
+
+    def report(self) -> pd.DataFrame:
+        """各阶段汇总：调用次数、总墙钟/CPU秒数、占比和单次耗时分位数（微秒）"""
+        total = time.perf_counter() - self._started
+        rows = {}
+        for name, samples in self._samples.items():
+            if not len(samples):
+                continue
+            values = np.frombuffer(samples, dtype=float) * 1e6
+            row = {
+                'calls': len(samples),
+                'wall_s': self._wall.get(name, 0.0),
+                'cpu_s': self._cpu.get(name, np.nan),
+                'wall_pct': self._wall.get(name, 0.0) / total if total else np.nan,
+                'mean_us': values.mean()
+            }
+            for q, value in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES)):
+                row[f'p{q}_us'] = value
+            row['max_us'] = values.max()
+            rows[name] = row
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        report.index.name = 'phase'
+        report.attrs['total_s'] = total
+        return report
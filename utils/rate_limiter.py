@@ -0,0 +1,61 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QuotaExceededError(Exception):
+    """API调用次数超出配额"""
+    pass
+
+class RateLimiter:
+    """令牌桶限流器（线程安全）
+
+    rate: 每秒补充的令牌数
+    capacity: 桶容量，即允许的瞬时突发调用数
+    max_calls: 调用总配额，超出后抛出QuotaExceededError
+    """
+
+    def __init__(self, rate: float, capacity: int = 1, max_calls: int = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_calls = max_calls
+        self.calls = 0
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'RateLimiter':
+        """按配置创建：API_CALL_INTERVAL 决定速率，MAX_API_CALLS 决定配额"""
+        return cls(
+            rate=1.0 / config.API_CALL_INTERVAL,
+            capacity=getattr(config, 'API_BURST', 1),
+            max_calls=config.MAX_API_CALLS
+        )
+
+    def acquire(self) -> float:
+        """获取一个令牌，必要时等待；返回等待的秒数"""
+        with self._lock:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                raise QuotaExceededError("达到每日API调用上限")
+            self.calls += 1
+
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+
+            # 令牌不足时预留（令牌数可为负），在锁外等待，保证先到先得
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    @property
+    def remaining_calls(self) -> float:
+        """剩余调用配额"""
+        if self.max_calls is None:
+            return float('inf')
+        return max(self.max_calls - self.calls, 0)
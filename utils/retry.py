@@ -9,9 +9,13 @@ def retry_on_error(
     max_retries: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: tuple = (Exception,)
+    exceptions: tuple = (Exception,),
+    no_retry: tuple = ()
 ) -> Callable:
-    """错误重试装饰器"""
+    """错误重试装饰器
+
+    no_retry中的异常（如配额耗尽）不重试，直接抛出
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
@@ -21,6 +25,8 @@ def retry_on_error(
             while retries < max_retries:
                 try:
                     return func(*args, **kwargs)
+                except no_retry:
+                    raise
                 except exceptions as e:
                     retries += 1
                     if retries == max_retries:
@@ -38,8 +44,11 @@ def retry_on_error(
         return wrapper
     return decorator
 
-def retry_with_log(tries=3, delay=1, backoff=2):
-    """带日志的重试装饰器"""
+def retry_with_log(tries=3, delay=1, backoff=2, no_retry: tuple = ()):
+    """带日志的重试装饰器
+
+    no_retry中的异常（如配额耗尽）不重试，直接抛出
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -47,6 +56,8 @@ def retry_with_log(tries=3, delay=1, backoff=2):
             while _tries > 1:
                 try:
                     return func(*args, **kwargs)
+                except no_retry:
+                    raise
                 except Exception as e:
                     logger.warning(f"操作失败: {str(e)}，剩余重试次数: {_tries-1}")
                     time.sleep(_delay)
@@ -0,0 +1,201 @@
+import os
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from backtest import BacktestEngine
+from backtest_sweep import METRICS, SharedFrame, FrameDataSource, _init_worker, _param_grid, _worker
+
+def _factor_data(strategy_class, params: Dict, quiet: bool):
+    """全区间因子数据（每个进程按参数只计算一次）"""
+    cache = _worker.setdefault('factors', {})
+    key = (strategy_class.__module__, strategy_class.__qualname__, repr(sorted(params.items())))
+    if key not in cache:
+        strategy = strategy_class(_worker['source'], params)
+        with open(os.devnull, 'w') as devnull, \
+                (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            strategy.initialize()
+        cache[key] = getattr(strategy, 'factor_data', None)
+    return cache[key]
+
+def _run_window(strategy_class, params: Dict, start: str, end: str,
+                engine_options: Dict, quiet: bool) -> Dict:
+    """在[start, end]区间回测，复用全区间因子，返回指标和净值序列"""
+    factor_data = _factor_data(strategy_class, params, quiet)
+    window_params = dict(params, start_date=start, end_date=end)
+    if factor_data is not None:
+        window_params['factor_data'] = factor_data
+
+    data, source = _worker['data'], _worker['source']
+    window = data.loc[pd.Timestamp(start):pd.Timestamp(end)]
+    engine = BacktestEngine(source, **engine_options)
+    strategy = strategy_class(source, window_params)
+    source.clock = strategy
+
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        strategy.cash = engine.initial_capital
+        strategy.initialize()
+        engine._run_bars(strategy, window)
+        results = engine._calculate_results()
+
+    metrics = {name: results[name] for name in METRICS}
+    metrics['equity'] = engine.daily_stats['total_value'].copy()
+    return metrics
+
+class WalkForward:
+    """滚动训练/测试（walk-forward）回测
+
+    行情只加载一次放入共享内存，因子按参数在全区间只计算一次，
+    各窗口只对行情和因子切片。训练段在参数网格中按metric选优，
+    测试段用选出的参数做样本外回测；各窗口、各参数组合在进程池中并行。
+    """
+    def __init__(self,
+                 data_source,
+                 train_days: int = 244,
+                 test_days: int = 61,
+                 step_days: int = None,
+                 initial_capital: float = 1000000.0,
+                 commission_rate: float = 0.0003,
+                 workers: int = None,
+                 quiet: bool = True):
+        if test_days < 2:
+            raise ValueError("测试窗口至少需要2个交易日")
+        self.data_source = data_source
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step_days = step_days or test_days
+        self.engine_options = {'initial_capital': initial_capital, 'commission_rate': commission_rate}
+        self.workers = workers or os.cpu_count() or 1
+        self.quiet = quiet
+
+    def windows(self, dates: pd.DatetimeIndex) -> List[Tuple[str, str, str, str]]:
+        """按交易日切分窗口：(训练开始, 训练结束, 测试开始, 测试结束)"""
+        days = dates.strftime('%Y%m%d')
+        result = []
+        i = 0
+        while i + self.train_days + self.test_days <= len(days):
+            train = days[i:i + self.train_days]
+            test = days[i + self.train_days:i + self.train_days + self.test_days]
+            result.append((train[0], train[-1], test[0], test[-1]))
+            i += self.step_days
+        return result
+
+    def run(self,
+            strategy_class,
+            symbols: List[str],
+            start_date: str,
+            end_date: str,
+            param_grid: Dict[str, List] = None,
+            base_params: Dict = None,
+            metric: str = 'sharpe_ratio',
+            data: pd.DataFrame = None) -> Dict:
+        """运行walk-forward回测
+        param_grid: 训练段选优的参数网格，为空时各窗口直接用base_params做测试
+        返回 {'windows': 每窗口结果表, 'summary': 汇总指标, 'equity_curve': 拼接的样本外净值}
+        """
+        if data is None:
+            data = BacktestEngine(self.data_source, **self.engine_options)._prepare_data(
+                symbols, start_date, end_date)
+        windows = self.windows(data.index.unique().sort_values())
+        if not windows:
+            raise ValueError("数据长度不足一个训练+测试窗口")
+
+        base = {'symbols': symbols, 'start_date': start_date, 'end_date': end_date,
+                'initial_capital': self.engine_options['initial_capital']}
+        base.update(base_params or {})
+        points = [dict(base, **point) for point in _param_grid(param_grid or {})]
+
+        if self.workers <= 1:
+            _worker.update(data=data, source=FrameDataSource(data))
+            try:
+                return self._walk(lambda *args: _Done(_run_window(*args)), strategy_class,
+                                  windows, points, list(param_grid or {}), metric)
+            finally:
+                _worker.clear()
+
+        shared = SharedFrame.create(data)
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                     initargs=(shared.spec,)) as pool:
+                return self._walk(lambda *args: pool.submit(_run_window, *args), strategy_class,
+                                  windows, points, list(param_grid or {}), metric)
+        finally:
+            shared.unlink()
+
+    def _walk(self, submit, strategy_class, windows: List[Tuple], points: List[Dict],
+              keys: List[str], metric: str) -> Dict:
+        """训练段选优 -> 测试段回测 -> 汇总"""
+        options = (self.engine_options, self.quiet)
+
+        # 训练段：所有窗口 × 参数组合一次性提交
+        best = [points[0]] * len(windows)
+        train_scores = [np.nan] * len(windows)
+        if len(points) > 1:
+            futures = [
+                [submit(strategy_class, params, train_start, train_end, *options) for params in points]
+                for train_start, train_end, _, _ in windows
+            ]
+            for w, window_futures in enumerate(futures):
+                scores = np.array([f.result()[metric] for f in window_futures], dtype=float)
+                if np.isnan(scores).all():
+                    continue
+                k = int(np.nanargmax(scores))
+                best[w], train_scores[w] = points[k], scores[k]
+
+        # 测试段：每个窗口用选出的参数做样本外回测
+        futures = [
+            submit(strategy_class, best[w], test_start, test_end, *options)
+            for w, (_, _, test_start, test_end) in enumerate(windows)
+        ]
+
+        rows, curves = [], []
+        for w, future in enumerate(futures):
+            result = future.result()
+            train_start, train_end, test_start, test_end = windows[w]
+            row = {'window': w, 'train_start': train_start, 'train_end': train_end,
+                   'test_start': test_start, 'test_end': test_end}
+            row.update({key: best[w][key] for key in keys})
+            row[f'train_{metric}'] = train_scores[w]
+            row.update({name: result[name] for name in METRICS})
+            rows.append(row)
+            curves.append(result['equity'])
+
+        table = pd.DataFrame(rows)
+        equity_curve = self._stitch(curves)
+        return {'windows': table, 'summary': self._summarize(table, equity_curve), 'equity_curve': equity_curve}
+
+    @staticmethod
+    def _stitch(curves: List[np.ndarray]) -> np.ndarray:
+        """将各测试窗口的净值按收益率首尾相接（初始为1）"""
+        returns = [curve[1:] / curve[:-1] for curve in curves if len(curve) > 1]
+        if not returns:
+            return np.ones(1)
+        return np.concatenate([[1.0], np.cumprod(np.concatenate(returns))])
+
+    @staticmethod
+    def _summarize(table: pd.DataFrame, equity_curve: np.ndarray) -> Dict:
+        """样本外汇总指标"""
+        returns = equity_curve[1:] / equity_curve[:-1] - 1
+        risk_free_rate = 0.03
+        excess = returns - risk_free_rate / 252
+        drawdown = 1 - equity_curve / np.maximum.accumulate(equity_curve)
+        return {
+            'windows': len(table),
+            'mean_window_return': table['total_return'].mean(),
+            'median_window_return': table['total_return'].median(),
+            'positive_window_ratio': (table['total_return'] > 0).mean(),
+            'mean_window_sharpe': table['sharpe_ratio'].mean(),
+            'oos_total_return': equity_curve[-1] - 1,
+            'oos_sharpe_ratio': np.sqrt(252) * excess.mean() / excess.std(ddof=1) if len(excess) > 1 else np.nan,
+            'oos_max_drawdown': drawdown.max()
+        }
+
+class _Done:
+    """单进程模式下与Future接口一致的已完成结果"""
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value